@@ -0,0 +1,58 @@
+"""
+Frames/sec of the counting loop for different inference batch sizes.
+
+Runs detection and counting (without display or video writing) over the
+input video once per batch size, reports the throughput and checks that
+the Enter/Exit totals match the unbatched run.
+
+Run from the repository root:
+    python benchmarks/bench_batch_inference.py [video] [max_frames]
+"""
+import os
+import sys
+import time
+from itertools import islice
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import videoCount
+from tracker.peoplecounter import PeopleCounter
+
+BATCH_SIZES = (1, 2, 4, 8, 16)
+
+
+def run(video_path, batch_size, max_frames):
+    cap = cv2.VideoCapture(video_path)
+    W = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    H = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    counter = PeopleCounter(W, H, maxDisappeared=40, maxDistance=40)
+
+    frames = islice(videoCount.read_sampled_frames(cap), max_frames)
+    num_frames = 0
+    start = time.perf_counter()
+    for frame, per_corr in videoCount.detect_frames(frames, batch_size):
+        counter.update(frame, per_corr)
+        num_frames += 1
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return num_frames / elapsed, (counter.totalUp, counter.totalDown)
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 else videoCount.test_video
+    max_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    print("{:>6} {:>10} {:>12}".format("batch", "fps", "enter/exit"))
+    reference = None
+    for batch_size in BATCH_SIZES:
+        fps, totals = run(video_path, batch_size, max_frames)
+        if reference is None:
+            reference = totals
+        status = "" if totals == reference else "  MISMATCH vs batch 1"
+        print("{:>6} {:>10.2f} {:>12}{}".format(batch_size, fps, "{}/{}".format(*totals), status))
+
+
+if __name__ == "__main__":
+    main()
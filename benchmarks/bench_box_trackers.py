@@ -0,0 +1,75 @@
+"""
+Per-frame update time of the dlib and optical-flow box trackers.
+
+Tracks 10, 100 and 500 boxes on a synthetic textured scene that pans by a
+few pixels per frame, and reports the mean update time and the mean error
+of the tracked box positions.
+
+Run from the repository root:
+    python benchmarks/bench_box_trackers.py
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker.boxtracker import DlibBoxTracker, FlowBoxTracker
+
+FRAME_SIZE = (1920, 1080)
+SHIFT = (2, 1)
+NUM_FRAMES = 10
+
+
+def textured_scene(seed=0):
+    rng = np.random.default_rng(seed)
+    w, h = FRAME_SIZE
+    noise = rng.integers(0, 256, size=(h // 8 + NUM_FRAMES, w // 8 + NUM_FRAMES, 3), dtype=np.uint8)
+    return cv2.resize(noise, None, fx=8, fy=8, interpolation=cv2.INTER_LINEAR)
+
+
+def frame_at(scene, t):
+    w, h = FRAME_SIZE
+    dx, dy = SHIFT
+    # the camera pans, so the content moves by -SHIFT per frame
+    x, y = t * dx, t * dy
+    return np.ascontiguousarray(scene[y:y + h, x:x + w])
+
+
+def random_boxes(num_boxes, seed=1):
+    rng = np.random.default_rng(seed)
+    w, h = FRAME_SIZE
+    xy = rng.uniform(50, [w - 150, h - 250], size=(num_boxes, 2))
+    wh = rng.uniform([30, 60], [80, 200], size=(num_boxes, 2))
+    return np.hstack([xy, xy + wh])
+
+
+def run(tracker, scene, boxes):
+    tracker.start(frame_at(scene, 0), boxes)
+    elapsed = 0.0
+    for t in range(1, NUM_FRAMES + 1):
+        frame = frame_at(scene, t)
+        start = time.perf_counter()
+        rects = tracker.update(frame)
+        elapsed += time.perf_counter() - start
+    expected = boxes - np.array(SHIFT * 2) * NUM_FRAMES
+    error = np.abs(np.asarray(rects, dtype=float) - expected).mean()
+    return elapsed / NUM_FRAMES, error
+
+
+def main():
+    scene = textured_scene()
+    print("{:>6} {:>14} {:>14} {:>10} {:>10}".format("tracks", "dlib (ms)", "flow (ms)", "dlib err", "flow err"))
+    for num_boxes in (10, 100, 500):
+        boxes = random_boxes(num_boxes)
+        dlib_time, dlib_err = run(DlibBoxTracker(), scene, boxes)
+        flow_time, flow_err = run(FlowBoxTracker(), scene, boxes)
+        print("{:>6} {:>14.2f} {:>14.2f} {:>10.2f} {:>10.2f}".format(
+            num_boxes, dlib_time * 1e3, flow_time * 1e3, dlib_err, flow_err))
+
+
+if __name__ == "__main__":
+    main()
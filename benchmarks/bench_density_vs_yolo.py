@@ -0,0 +1,79 @@
+"""
+Count accuracy and CPU latency of the CSRNet density backend against YOLO.
+
+Runs both backends on the test split used in data_analysis/ (images with YOLO
+format labels, one line per person) and reports the mean absolute and root
+mean squared count error, overall and by crowd size, with the mean time per
+image.
+
+Run from the repository root:
+    python benchmarks/bench_density_vs_yolo.py [test_dir] [yolo_weights] [csrnet_weights]
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector.persondetector import PersonDetector
+from detector.densityestimator import DensityEstimator
+
+TEST_DIR = "dataset_size64/test"
+# crowd size buckets, by number of labelled people
+BUCKETS = (("sparse", 0, 10), ("medium", 10, 50), ("dense", 50, float("inf")))
+
+
+def load_split(test_dir):
+    images_dir = os.path.join(test_dir, "images")
+    labels_dir = os.path.join(test_dir, "labels")
+    for name in sorted(os.listdir(images_dir)):
+        label_path = os.path.join(labels_dir, os.path.splitext(name)[0] + ".txt")
+        if not os.path.exists(label_path):
+            continue
+        with open(label_path, "r") as label_file:
+            truth = sum(1 for line in label_file if line.strip())
+        yield os.path.join(images_dir, name), truth
+
+
+def evaluate(count, split):
+    truths, predictions, latencies = [], [], []
+    for image_path, truth in split:
+        image = cv2.imread(image_path)
+        start = time.perf_counter()
+        predictions.append(count(image))
+        latencies.append(time.perf_counter() - start)
+        truths.append(truth)
+    return np.array(truths), np.array(predictions, dtype=float), np.array(latencies)
+
+
+def report(name, truths, predictions, latencies):
+    errors = predictions - truths
+    row = [name, np.abs(errors).mean(), np.sqrt((errors ** 2).mean())]
+    for _, low, high in BUCKETS:
+        mask = (truths >= low) & (truths < high)
+        row.append(np.abs(errors[mask]).mean() if mask.any() else float("nan"))
+    row.append(latencies.mean() * 1e3)
+    print("{:>8} {:>7.2f} {:>7.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>13.1f}".format(*row))
+
+
+def main():
+    test_dir = sys.argv[1] if len(sys.argv) > 1 else TEST_DIR
+    yolo_weights = sys.argv[2] if len(sys.argv) > 2 else "trained_models/best.pt"
+    csrnet_weights = sys.argv[3] if len(sys.argv) > 3 else "trained_models/csrnet.pth"
+    split = list(load_split(test_dir))
+
+    detector = PersonDetector(yolo_weights)
+    estimator = DensityEstimator(csrnet_weights)
+
+    print("{} images from {}".format(len(split), test_dir))
+    print("{:>8} {:>7} {:>7} {:>9} {:>9} {:>9} {:>13}".format(
+        "backend", "MAE", "RMSE", *("MAE " + name for name, _, _ in BUCKETS), "latency (ms)"))
+    report("YOLO", *evaluate(lambda image: len(detector.detect(image)[0]), split))
+    report("CSRNet", *evaluate(lambda image: estimator.estimate(image)[0], split))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Re-run cost of people_counter with the on-disk detection cache.
+
+Counts the same video three times: without the cache, with an empty cache
+(the detections are written) and with the filled cache (only tracking and
+counting are left), and reports the elapsed time and cache hits of each run.
+
+Run from the repository root:
+    python benchmarks/bench_detection_cache.py [video] [weights]
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import videoCount
+from detector.detectioncache import DetectionCache
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 else "Input/input.mp4"
+    weights = sys.argv[2] if len(sys.argv) > 2 else "yolov8x.pt"
+    videoCount.load_detector(weights)
+
+    cache_dir = tempfile.mkdtemp(prefix="detections-")
+    try:
+        print("{:>8} {:>11} {:>8} {:>7} {:>7}".format("run", "elapsed s", "fps", "hits", "misses"))
+        for name, cache in (("no cache", None), ("cold", DetectionCache(cache_dir)), ("warm", DetectionCache(cache_dir))):
+            summary = videoCount.people_counter(video_path, output_path=None, display=False, max_seconds=0,
+                                                detection_cache=cache)
+            stats = summary.get("detection_cache", {"hits": 0, "misses": 0})
+            print("{:>8} {:>11.2f} {:>8.2f} {:>7} {:>7}".format(
+                name, summary["elapsed"], summary["fps"], stats["hits"], stats["misses"]))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Throughput and latency of the local detection service for a growing number of clients.
+
+Starts a DetectionServer in this process and runs N client threads, each with its
+own connection, sending frames of the input video through shared memory (and
+inline, for comparison). Reports the total requests/sec, the mean batch size and
+the server-side latency percentiles.
+
+Run from the repository root:
+    python benchmarks/bench_detection_service.py [video] [requests per client] [weights]
+"""
+import os
+import sys
+import threading
+import time
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector.detectionservice import DetectionClient, DetectionServer
+from detector.modelmanager import model_manager
+
+CLIENT_COUNTS = (1, 2, 4, 8)
+ADDRESS = "/tmp/crowd-detect-bench.sock"
+
+
+def read_frames(video_path, count, size=(500, 280)):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, size))
+    cap.release()
+    return frames
+
+
+def run_clients(num_clients, frames, shared):
+    def client_loop():
+        client = DetectionClient(ADDRESS, shared=shared)
+        for frame in frames:
+            client.detect(frame)
+        client.close()
+
+    threads = [threading.Thread(target=client_loop) for _ in range(num_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 else "Input/input.mp4"
+    num_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    weights = sys.argv[3] if len(sys.argv) > 3 else "yolov8x.pt"
+    frames = read_frames(video_path, num_requests)
+
+    print("{:>8} {:>7} {:>9} {:>11} {:>9} {:>9} {:>9}".format(
+        "clients", "via", "req/sec", "mean batch", "p50 ms", "p95 ms", "p99 ms"))
+    for shared in (True, False):
+        for num_clients in CLIENT_COUNTS:
+            # a fresh server per run so that the statistics only cover this run
+            server = DetectionServer(model_manager.get(weights), ADDRESS, max_batch=num_clients).start()
+            elapsed = run_clients(num_clients, frames, shared)
+            stats = server.stats()
+            server.close()
+            print("{:>8} {:>7} {:>9.2f} {:>11.2f} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+                num_clients, "shm" if shared else "inline", num_clients * len(frames) / elapsed,
+                stats["mean_batch"], stats["latency_p50_ms"], stats["latency_p95_ms"], stats["latency_p99_ms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cost of the event log in the counting loop, and the size of its output.
+
+Logs a synthetic multi-hour run (one row per processed frame, a crossing every
+few seconds) with EventLog as Parquet and Arrow IPC, and with a csv.writer for
+comparison. Reports the time per logged frame as seen by the counting loop, the
+peak Python memory, and the size on disk (timings include the
+tracemalloc overhead, the same for all three).
+
+Run from the repository root:
+    python benchmarks/bench_event_log.py [hours]
+"""
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video.eventlog import EventLog, STAGES
+
+FPS = 30
+SKIP = 3
+
+
+def synthetic_run(hours, seed=0):
+    rng = np.random.default_rng(seed)
+    num_frames = int(hours * 3600 * FPS / SKIP)
+    people = rng.poisson(6, num_frames)
+    timings = rng.gamma(2.0, 2.0, (num_frames, len(STAGES))).astype(np.float32)
+    return num_frames, people, timings
+
+
+class CsvLog:
+    def __init__(self, directory):
+        self.file = open(os.path.join(directory, "frames.csv"), "w", newline="")
+        self.writer = csv.writer(self.file)
+
+    def log_frame(self, frame, seconds, people, detected, enter, exit, timings):
+        self.writer.writerow([frame, seconds, people, detected, enter, exit, *timings])
+
+    def log_events(self, frame, seconds, events):
+        pass
+
+    def close(self):
+        self.file.close()
+
+
+def measure(make_log, num_frames, people, timings):
+    directory = tempfile.mkdtemp(prefix="eventlog-")
+    try:
+        tracemalloc.start()
+        log = make_log(directory)
+        start = time.perf_counter()
+        enter = 0
+        for i in range(num_frames):
+            frame = (i + 1) * SKIP - 1
+            seconds = frame / FPS
+            log.log_frame(frame, seconds, int(people[i]), i % 10 == 0, enter, enter // 2, timings[i].tolist())
+            if i % 50 == 0:
+                enter += 1
+                log.log_events(frame, seconds, [(i, "line", "up")])
+        loop = time.perf_counter() - start
+        log.close()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        return loop / num_frames, peak, size
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    num_frames, people, timings = synthetic_run(hours)
+    print("{:.1f} h at {} fps, one frame out of {}: {} frame rows".format(hours, FPS, SKIP, num_frames))
+    print("{:>8} {:>16} {:>14} {:>10}".format("format", "us per frame", "peak mem MB", "size MB"))
+    for name, make_log in (("parquet", lambda d: EventLog(d, "parquet")),
+                           ("arrow", lambda d: EventLog(d, "arrow")),
+                           ("csv", CsvLog)):
+        per_frame, peak, size = measure(make_log, num_frames, people, timings)
+        print("{:>8} {:>16.2f} {:>14.1f} {:>10.2f}".format(name, per_frame * 1e6, peak / 2 ** 20, size / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main()
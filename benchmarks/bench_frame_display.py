@@ -0,0 +1,86 @@
+"""
+Per-frame cost of putting a counted frame on screen, before and after FrameView.
+
+The previous path converted every 500x280 frame BGR->RGB, resized it to the
+800x600 label, wrapped it in a QImage and uploaded it into a new QPixmap.
+FrameView wraps the BGR buffer as a QImage and lets the painter scale it when
+the widget is painted. Both paths are timed offscreen; the frame buffers
+allocated per frame are counted with tracemalloc (NumPy/OpenCV arrays; the
+QPixmap upload is an extra copy inside Qt that tracemalloc does not see).
+
+Run from the repository root:
+    python benchmarks/bench_frame_display.py [frames]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QPixmap, QPainter
+from PySide6.QtCore import Qt, QRect
+
+FRAME_SIZE = (500, 280)
+VIEW_SIZE = (800, 600)
+
+
+def old_path(frame):
+    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    frame_resized = cv2.resize(frame, VIEW_SIZE)
+    h, w, ch = frame_resized.shape
+    qt_image = QImage(frame_resized.data, w, h, ch * w, QImage.Format_RGB888)
+    return QPixmap.fromImage(qt_image)
+
+
+def new_path(frame, surface):
+    # what FrameView.set_frame and paintEvent do
+    h, w = frame.shape[:2]
+    image = QImage(frame.data, w, h, frame.strides[0], QImage.Format_BGR888)
+    painter = QPainter(surface)
+    target = image.size().scaled(surface.size(), Qt.KeepAspectRatio)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+    painter.drawImage(QRect(0, 0, target.width(), target.height()), image)
+    painter.end()
+
+
+def measure(display, frames):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    allocated = 0
+    start = time.perf_counter()
+    for frame in frames:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        display(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return elapsed / len(frames), allocated / len(frames)
+
+
+def main():
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app = QApplication(sys.argv)
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8) for _ in range(16)]
+    frames = [frames[i % len(frames)] for i in range(num_frames)]
+    surface = QImage(VIEW_SIZE[0], VIEW_SIZE[1], QImage.Format_ARGB32_Premultiplied)
+
+    print("frame {}x{}, view {}x{}".format(FRAME_SIZE[0], FRAME_SIZE[1], VIEW_SIZE[0], VIEW_SIZE[1]))
+    print("{:>10} {:>14} {:>22} {:>13}".format("path", "per frame (ms)", "arrays allocated (KB)", "frame copies"))
+    # before: cvtColor, resize and the QPixmap upload; FrameView: none, the
+    # painter reads the wrapped buffer while drawing
+    for name, display, copies in (("before", old_path, 3), ("FrameView", lambda f: new_path(f, surface), 0)):
+        per_frame, allocated = measure(display, frames)
+        print("{:>10} {:>14.3f} {:>22.1f} {:>13}".format(name, per_frame * 1e3, allocated / 1024, copies))
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
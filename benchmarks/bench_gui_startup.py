@@ -0,0 +1,95 @@
+"""
+Cold-start time of the GUI dashboard, up to its first paint.
+
+Starts a fresh interpreter with `-X importtime` that imports gui/gui.py, shows
+the dashboard offscreen exactly as `gui.py` does, and keeps the event loop idle
+for a while after the first paint. Reports the wall time to first paint, the
+slowest imports (cumulative, in ms) and fails if a module that must be deferred
+until a feature window is opened (OpenCV, pandas, torch, ultralytics) was
+imported by then, or if the first paint exceeds the time budget.
+
+Run from the repository root:
+    python benchmarks/bench_gui_startup.py [budget_seconds] [top_imports]
+"""
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("cv2", "pandas", "torch", "ultralytics")
+
+# milliseconds the event loop stays idle after the first paint, during which
+# nothing heavy may be imported in the background either
+IDLE_MS = 3000
+
+# the dashboard as started by gui.py; prints the time from the launch of the
+# interpreter to the first paint, then the deferred modules imported by the end
+STARTUP = """
+import sys
+import time
+sys.path.insert(0, "gui")
+import gui
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QTimer
+app = QApplication(sys.argv)
+gui.qdarktheme.setup_theme()
+window = gui.DashboardWindow()
+window.show()
+painted = []
+def first_paint():
+    painted.append(time.time() - {launched!r})
+    QTimer.singleShot({idle_ms}, app.quit)
+QTimer.singleShot(0, first_paint)
+app.exec()
+print(painted[0])
+print(" ".join(name for name in {deferred!r} if name in sys.modules))
+"""
+
+
+def parse_importtime(stderr):
+    # lines look like "import time:  self [us] | cumulative | imported package"
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # top-level imports are not indented
+        if not name.startswith("  "):
+            imports.append((int(cumulative) / 1e3, name.strip()))
+    return imports
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    script = STARTUP.format(launched=time.time(), idle_ms=IDLE_MS, deferred=DEFERRED)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                            cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        sys.exit(result.returncode)
+
+    lines = result.stdout.splitlines()
+    elapsed = float(lines[0])
+    imports = parse_importtime(result.stderr)
+    print("time to first paint: {:.2f}s (budget {:.2f}s)".format(elapsed, budget))
+    print("imports: {:.0f} ms in {} top-level modules".format(sum(ms for ms, _ in imports), len(imports)))
+    print("{:>10}  {}".format("ms", "module"))
+    for ms, name in sorted(imports, reverse=True)[:top]:
+        print("{:>10.1f}  {}".format(ms, name))
+
+    loaded = lines[1].split() if len(lines) > 1 else []
+    if loaded:
+        print("FAIL: imported within {:.1f}s of startup: {}".format(IDLE_MS / 1e3, ", ".join(loaded)))
+        sys.exit(1)
+    if elapsed > budget:
+        print("FAIL: startup took longer than the budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
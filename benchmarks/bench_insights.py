@@ -0,0 +1,100 @@
+"""
+Month-long Data Insights query over 10M+ per-frame rows, with and without rollups.
+
+Generates a month of per-frame rows (31 daily runs, 4 frames/sec), adds them to
+a RollupStore one run at a time, then times the "Last month" view of an 800
+pixel wide chart three ways:
+  - raw: bucketing every per-frame row at query time (what plotting the logs
+    directly would have to do, with the rows already in memory)
+  - rollups (cold): a new RollupStore, mapping the files on the first query
+  - rollups (warm): the same store queried again
+
+Run from the repository root:
+    python benchmarks/bench_insights.py [days] [frames_per_second]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video.rollups import RollupStore, choose_resolution
+
+WIDTH = 800
+START = 1700000000
+
+
+def synthetic_day(day, fps, rng):
+    times = START + day * 86400 + np.arange(0, 86400, 1.0 / fps)
+    hour = (times - START) % 86400 / 3600
+    # busier during the day
+    people = rng.poisson(2 + 10 * np.exp(-((hour - 14) / 4) ** 2))
+    enter = rng.random(len(times)) < 0.002
+    exit = rng.random(len(times)) < 0.002
+    return times, people, enter.astype(np.int64), exit.astype(np.int64)
+
+
+def raw_query(times, people, start, end, width):
+    # bucket every row of the range at query time
+    _, size = choose_resolution(end - start, width)
+    first, last = np.searchsorted(times, [start, end])
+    keys = ((times[first:last] - start) // size).astype(np.int64)
+    frames = np.bincount(keys)
+    return np.bincount(keys, people[first:last]) / np.maximum(frames, 1)
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 31
+    fps = float(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp(prefix="insights-")
+    try:
+        store = RollupStore(directory)
+        all_times, all_people = [], []
+        ingest = []
+        for day in range(days):
+            times, people, enter, exit = synthetic_day(day, fps, rng)
+            start = time.perf_counter()
+            store.add_frames(times, people, enter, exit)
+            ingest.append(time.perf_counter() - start)
+            all_times.append(times)
+            all_people.append(people)
+        times = np.concatenate(all_times)
+        people = np.concatenate(all_people)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print("{} rows over {} days; rollups {:.1f} MB; adding a daily run: mean {:.1f} ms, last {:.1f} ms".format(
+            len(times), days, size / 2 ** 20, np.mean(ingest) * 1e3, ingest[-1] * 1e3))
+
+        end = START + days * 86400
+        begin = end - 30 * 86400
+
+        def timed(query, repeat=5):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = query()
+                best = min(best, time.perf_counter() - start)
+            return best, result
+
+        raw_seconds, _ = timed(lambda: raw_query(times, people, begin, end, WIDTH))
+        start = time.perf_counter()
+        cold = RollupStore(directory).query(begin, end, WIDTH)
+        cold_seconds = time.perf_counter() - start
+        warm_seconds, warm = timed(lambda: store.query(begin, end, WIDTH))
+
+        print("last month at {} px: {} {} buckets".format(WIDTH, len(warm["start"]), warm["resolution"]))
+        print("{:>16} {:>10}".format("query", "ms"))
+        print("{:>16} {:>10.2f}".format("raw rows", raw_seconds * 1e3))
+        print("{:>16} {:>10.2f}".format("rollups (cold)", cold_seconds * 1e3))
+        print("{:>16} {:>10.2f}".format("rollups (warm)", warm_seconds * 1e3))
+        assert len(cold["start"]) == len(warm["start"])
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
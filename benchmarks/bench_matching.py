@@ -0,0 +1,63 @@
+"""
+Centroid matching time for very large crowds.
+
+Simulates one tracker update with N existing objects that each move a few
+pixels, plus some newcomers and some disappearances, and times the dense
+(full distance matrix), gated greedy and Hungarian matchers. The dense and
+gated greedy matches are checked to be identical.
+
+Run from the repository root:
+    python benchmarks/bench_matching.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker.matching import match_centroids
+
+MAX_DISTANCE = 40
+# the dense matrix needs 8 * N * M bytes, skip it above this size
+DENSE_LIMIT = 5000
+
+
+def scene(num_objects, seed=0):
+    rng = np.random.default_rng(seed)
+    # keep the density roughly constant: ~1 person per 40x40 px
+    side = int(np.sqrt(num_objects) * 40)
+    objects = rng.integers(0, side, size=(num_objects, 2))
+    moved = objects + rng.integers(-6, 7, size=objects.shape)
+    keep = rng.random(num_objects) > 0.05
+    newcomers = rng.integers(0, side, size=(num_objects // 20, 2))
+    inputs = np.vstack([moved[keep], newcomers])
+    return objects, inputs[rng.permutation(len(inputs))]
+
+
+def timed(method, objects, inputs):
+    start = time.perf_counter()
+    rows, cols = match_centroids(objects, inputs, MAX_DISTANCE, method)
+    return time.perf_counter() - start, set(zip(rows.tolist(), cols.tolist()))
+
+
+def main():
+    print("{:>7} {:>12} {:>12} {:>14} {:>9}".format("objects", "dense (ms)", "greedy (ms)", "hungarian (ms)", "matched"))
+    for num_objects in (1000, 5000, 20000, 100000):
+        objects, inputs = scene(num_objects)
+        greedy_time, greedy_pairs = timed("greedy", objects, inputs)
+        hungarian_time, _ = timed("hungarian", objects, inputs)
+
+        dense = "-"
+        if num_objects <= DENSE_LIMIT:
+            dense_time, dense_pairs = timed("dense", objects, inputs)
+            assert dense_pairs == greedy_pairs, "gated greedy matching differs from the dense matcher"
+            dense = "{:.1f}".format(dense_time * 1e3)
+
+        print("{:>7} {:>12} {:>12.1f} {:>14.1f} {:>9}".format(
+            num_objects, dense, greedy_time * 1e3, hungarian_time * 1e3, len(greedy_pairs)))
+
+
+if __name__ == "__main__":
+    main()
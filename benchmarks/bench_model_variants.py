@@ -0,0 +1,31 @@
+"""
+Speed and count accuracy of the exported and quantized model variants.
+
+Exports the checkpoint to every runtime of the model registry (cached under
+trained_models/exported), runs each variant on frames sampled from the Input/
+videos and reports the latency per frame and the mean absolute difference in
+people per frame against the PyTorch checkpoint.
+
+Run from the repository root:
+    python benchmarks/bench_model_variants.py [weights] [variant ...]
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector.modelregistry import ModelRegistry, VARIANTS
+
+
+def main():
+    weights = sys.argv[1] if len(sys.argv) > 1 else "trained_models/best.pt"
+    variants = tuple(sys.argv[2:]) or VARIANTS
+
+    registry = ModelRegistry()
+    print("{:>14} {:>13} {:>8} {:>10} {:>11}".format("variant", "latency (ms)", "fps", "count MAE", "mean count"))
+    for row in registry.compare(weights, variants):
+        print("{variant:>14} {latency_ms:>13.2f} {fps:>8.2f} {count_mae:>10.3f} {mean_count:>11.2f}".format(**row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Total throughput of multi-stream counting with one shared, batched model.
+
+Counts N copies of the input video at once through the shared inference
+scheduler, for increasing N, and reports the total and per-stream frames/sec,
+the mean batch size and the frames dropped.
+
+Run from the repository root:
+    python benchmarks/bench_multistream.py [video] [seconds] [weights]
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector.modelmanager import model_manager
+from video.multistream import count_streams
+
+STREAM_COUNTS = (1, 2, 4, 8)
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 else "Input/input.mp4"
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 30
+    weights = sys.argv[3] if len(sys.argv) > 3 else "yolov8x.pt"
+    detector = model_manager.get(weights)
+
+    print("{:>8} {:>11} {:>17} {:>11} {:>8}".format("streams", "total fps", "fps per stream", "mean batch", "dropped"))
+    for num_streams in STREAM_COUNTS:
+        summary = count_streams([video_path] * num_streams, detector, max_batch=num_streams,
+                                max_seconds=seconds)
+        dropped = sum(stream["dropped"] for stream in summary["streams"])
+        print("{:>8} {:>11.2f} {:>17.2f} {:>11.2f} {:>8}".format(
+            num_streams, summary["fps"], summary["fps"] / num_streams, summary["mean_batch"], dropped))
+
+
+if __name__ == "__main__":
+    main()
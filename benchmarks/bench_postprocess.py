@@ -0,0 +1,60 @@
+"""
+Per-frame post-processing time of the person detections.
+
+Compares the old pandas `iterrows` loop against `filter_person_boxes` on
+synthetic YOLO outputs with 10, 100 and 1000 boxes.
+
+Run from the repository root:
+    python benchmarks/bench_postprocess.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector.persondetector import filter_person_boxes, load_class_list
+
+
+def synthetic_result(num_boxes, seed=0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 500, size=(num_boxes, 2))
+    wh = rng.uniform(5, 60, size=(num_boxes, 2))
+    scores = rng.uniform(0.25, 1.0, size=(num_boxes, 1))
+    # roughly 80% persons, the rest random COCO classes
+    classes = np.where(rng.random(num_boxes) < 0.8, 0, rng.integers(1, 80, num_boxes))
+    return np.hstack([xy, xy + wh, scores, classes[:, None]]).astype(np.float32)
+
+
+def legacy_postprocess(data, class_list):
+    import pandas as pd
+
+    px = pd.DataFrame(data).astype("float")
+    list_corr = []
+    for index, row in px.iterrows():
+        d = int(row[5])
+        if 'person' in class_list[d]:
+            list_corr.append([row[0], row[1], row[2], row[3]])
+    return list_corr
+
+
+def main():
+    class_list = load_class_list("coco.txt")
+    print("{:>6} {:>14} {:>14} {:>9}".format("boxes", "iterrows (ms)", "mask (ms)", "speedup"))
+    for num_boxes in (10, 100, 1000):
+        data = synthetic_result(num_boxes)
+        legacy_boxes = legacy_postprocess(data, class_list)
+        boxes, _ = filter_person_boxes(data)
+        assert np.allclose(np.asarray(legacy_boxes, dtype=np.float32).reshape(-1, 4), boxes)
+
+        repeats = 20 if num_boxes >= 1000 else 200
+        legacy = min(timeit.repeat(lambda: legacy_postprocess(data, class_list), number=repeats, repeat=3)) / repeats
+        vectorized = min(timeit.repeat(lambda: filter_person_boxes(data), number=repeats, repeat=3)) / repeats
+        print("{:>6} {:>14.3f} {:>14.4f} {:>8.0f}x".format(
+            num_boxes, legacy * 1e3, vectorized * 1e3, legacy / vectorized))
+
+
+if __name__ == "__main__":
+    main()
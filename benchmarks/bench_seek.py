@@ -0,0 +1,83 @@
+"""
+Latency of slider seeks, before and after the seek index and frame cache.
+
+Replays a scrubbing session (jumps across the file, then small moves around
+the playhead) three ways: CAP_PROP_POS_FRAMES + read (the previous seek_video),
+FrameSeeker with a cold cache, and FrameSeeker replaying the same session
+with the cache warm. Also times the previous return to frame 0, which
+reopened the capture.
+
+Run from the repository root:
+    python benchmarks/bench_seek.py [video] [seeks]
+"""
+import os
+import random
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video.seekindex import SeekIndex, FrameSeeker
+
+
+def scrub_session(frame_count, num_seeks, seed=0):
+    rng = random.Random(seed)
+    targets = []
+    position = 0
+    for i in range(num_seeks):
+        if i % 5 == 0:  # jump somewhere else
+            position = rng.randrange(frame_count)
+        else:  # small move around the playhead
+            position = min(frame_count - 1, max(0, position + rng.randint(-30, 30)))
+        targets.append(position)
+    return targets
+
+
+def time_seeks(seek, targets):
+    times = []
+    for target in targets:
+        start = time.perf_counter()
+        seek(target)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1e3
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 else "Input/input.mp4"
+    num_seeks = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    start = time.perf_counter()
+    index = SeekIndex.load(video_path)
+    print("index: {} frames, {} keyframes, longest keyframe interval {}, loaded in {:.1f} ms".format(
+        index.frame_count, len(index.keyframes), index.max_gop(), (time.perf_counter() - start) * 1e3))
+    targets = scrub_session(index.frame_count - 1, num_seeks)
+
+    cap = cv2.VideoCapture(video_path)
+
+    def old_seek(target):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+        cap.read()
+
+    seeker = FrameSeeker(cv2.VideoCapture(video_path), index)
+    results = [("before", time_seeks(old_seek, targets)),
+               ("cold cache", time_seeks(seeker.frame_at, targets)),
+               ("warm cache", time_seeks(seeker.frame_at, targets))]
+
+    print("{:>11} {:>9} {:>9} {:>9}".format("seek", "p50 ms", "p95 ms", "max ms"))
+    for name, times in results:
+        print("{:>11} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+            name, np.percentile(times, 50), np.percentile(times, 95), times.max()))
+
+    start = time.perf_counter()
+    cap.release()
+    cap = cv2.VideoCapture(video_path)
+    cap.read()
+    print("reopening the capture for frame 0: {:.2f} ms".format((time.perf_counter() - start) * 1e3))
+    cap.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+People found and latency of tiled inference compared with single-shot inference.
+
+Runs the detector on a wide crowd image once on the whole image and once on
+overlapping tiles for a few tile sizes (batched), and
+reports the number of people found and the mean latency of each mode.
+
+Run from the repository root:
+    python benchmarks/bench_tiled_inference.py [image] [weights]
+"""
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector.persondetector import PersonDetector
+from detector.tileddetector import TiledDetector, plan_tiles
+
+IMAGE = "stock-photo-la-courneuve-france-september-crowd-waiting-during-a-concert-198385169.jpg"
+TILE_SIZES = (960, 640, 480)
+OVERLAP = 0.2
+REPEATS = 5
+
+
+def timed(detect, image):
+    # the first call warms up the model and is not timed
+    boxes, _ = detect(image)
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        detect(image)
+    return len(boxes), (time.perf_counter() - start) / REPEATS
+
+
+def main():
+    image_path = sys.argv[1] if len(sys.argv) > 1 else IMAGE
+    weights = sys.argv[2] if len(sys.argv) > 2 else "yolov8x.pt"
+    image = cv2.imread(image_path)
+    if image is None:
+        raise IOError("cannot read image: {}".format(image_path))
+    height, width = image.shape[:2]
+    detector = PersonDetector(weights)
+
+    print("{} ({}x{}), overlap {}".format(image_path, width, height, OVERLAP))
+    print("{:>18} {:>6} {:>7} {:>13} {:>9}".format("mode", "tiles", "people", "latency (ms)", "slowdown"))
+    people, single = timed(detector.detect, image)
+    print("{:>18} {:>6} {:>7} {:>13.1f} {:>9}".format("single shot", 1, people, single * 1e3, "1.0x"))
+
+    for tile_size in TILE_SIZES:
+        num_tiles = len(plan_tiles(width, height, tile_size, OVERLAP))
+        tiled = TiledDetector(detector, tile_size=tile_size, overlap=OVERLAP)
+        people, latency = timed(tiled.detect, image)
+        print("{:>18} {:>6} {:>7} {:>13.1f} {:>8.1f}x".format(
+            "{} batch".format(tile_size), num_tiles, people, latency * 1e3, latency / single))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Long synthetic soak run of the counting loop, checking that memory stays flat.
+
+People keep walking up and down through a 500x280 scene for the simulated
+duration; the detections are fed to PeopleCounter on every processed frame.
+Traced Python memory and the number of live trackable objects are sampled
+every simulated hour. The run fails if the memory at the end exceeds the
+memory after the first hour by more than the allowed margin.
+
+Run from the repository root:
+    python benchmarks/soak_track_memory.py [hours] [processed_fps]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker.peoplecounter import PeopleCounter
+
+W, H = 500, 280
+PEOPLE_ON_SCREEN = 20
+ALLOWED_GROWTH = 256 * 1024
+
+
+def walkers(rng):
+    # every walker enters at the top or the bottom edge and crosses the
+    # scene vertically at a constant speed
+    while True:
+        down = rng.random() < 0.5
+        x = rng.uniform(20, W - 40)
+        speed = rng.uniform(1.5, 4.0) * (1 if down else -1)
+        y = -40.0 if down else H + 0.0
+        yield np.array([x, y, speed])
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    processed_fps = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    num_frames = int(hours * 3600 * processed_fps)
+    frames_per_hour = int(3600 * processed_fps)
+
+    rng = np.random.default_rng(0)
+    spawn = walkers(rng)
+    people = np.array([next(spawn) for _ in range(PEOPLE_ON_SCREEN)])
+    people[:, 1] = rng.uniform(0, H, PEOPLE_ON_SCREEN)
+
+    frame = np.zeros((H, W, 3), dtype=np.uint8)
+    counter = PeopleCounter(W, H, maxDisappeared=40, maxDistance=40, tracker="flow", annotate=False)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    baseline = None
+    print("{:>5} {:>12} {:>10} {:>8} {:>8}".format("hour", "traced (KB)", "objects", "enter", "exit"))
+    for index in range(1, num_frames + 1):
+        people[:, 1] += people[:, 2]
+        gone = (people[:, 1] < -40) | (people[:, 1] > H)
+        for i in np.flatnonzero(gone):
+            people[i] = next(spawn)
+
+        boxes = np.column_stack([people[:, 0], people[:, 1], people[:, 0] + 20, people[:, 1] + 40])
+        counter.update(frame, boxes)
+
+        if index % frames_per_hour == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            if baseline is None:
+                baseline = current
+            print("{:>5} {:>12.1f} {:>10} {:>8} {:>8}".format(
+                index // frames_per_hour, current / 1024, len(counter.trackableObjects),
+                counter.totalUp, counter.totalDown))
+
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{} frames in {:.1f}s".format(num_frames, time.perf_counter() - start))
+
+    if baseline is not None and current - baseline > ALLOWED_GROWTH:
+        print("FAIL: memory grew by {:.1f} KB".format((current - baseline) / 1024))
+        sys.exit(1)
+    print("OK: memory is flat")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import cv2
+import numpy as np
+
+# CSRNet: the first ten convolutions of VGG-16 as front end, followed by
+# dilated convolutions; the density map is 1/8 of the input resolution
+FRONTEND = [64, 64, 'M', 128, 128, 'M', 256, 256, 256, 'M', 512, 512, 512]
+BACKEND = [512, 512, 512, 256, 128, 64]
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def build_csrnet():
+    """
+    Builds the CSRNet network (Li et al., 2018).
+
+    Returns:
+        torch.nn.Module: Network mapping a normalized RGB batch (N, 3, H, W) to a
+        density map batch (N, 1, H/8, W/8).
+    """
+    from torch import nn
+
+    def make_layers(cfg, in_channels, dilation):
+        layers = []
+        for v in cfg:
+            if v == 'M':
+                layers.append(nn.MaxPool2d(kernel_size=2, stride=2))
+            else:
+                layers.append(nn.Conv2d(in_channels, v, kernel_size=3, padding=dilation, dilation=dilation))
+                layers.append(nn.ReLU(inplace=True))
+                in_channels = v
+        return nn.Sequential(*layers)
+
+    class CSRNet(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.frontend = make_layers(FRONTEND, 3, dilation=1)
+            self.backend = make_layers(BACKEND, 512, dilation=2)
+            self.output_layer = nn.Conv2d(64, 1, kernel_size=1)
+
+        def forward(self, x):
+            return self.output_layer(self.backend(self.frontend(x)))
+
+    return CSRNet()
+
+
+def render_heatmap(frame, density, alpha=0.5):
+    """
+    Draws a density map over a frame.
+
+    Args:
+        frame: BGR image.
+        density: float array of shape (h, w), at any resolution.
+        alpha: Weight of the heatmap in the blend.
+
+    Returns:
+        numpy.ndarray: BGR image of the frame size.
+    """
+    peak = float(density.max()) if density.size else 0.0
+    scaled = np.zeros(density.shape, dtype=np.uint8) if peak <= 0 else \
+        (np.clip(density / peak, 0, 1) * 255).astype(np.uint8)
+    heatmap = cv2.applyColorMap(cv2.resize(scaled, (frame.shape[1], frame.shape[0])), cv2.COLORMAP_JET)
+    return cv2.addWeighted(frame, 1 - alpha, heatmap, alpha, 0)
+
+
+class DensityEstimator:
+    """
+    Counts people with a CSRNet density map on the CPU.
+
+    Every frame is resized to a fixed input size, so the time per frame does not
+    depend on the number of people in it: there is no per-box post-processing or
+    tracking. The count is the integral of the density map.
+    """
+
+    def __init__(self, weights='trained_models/csrnet.pth', input_size=(640, 360), num_threads=None):
+        """
+        Args:
+            weights: CSRNet state dict (a checkpoint with a 'state_dict' entry also works).
+            input_size: (width, height) the frames are resized to; multiples of 8.
+            num_threads: torch intra-op threads, None keeps the torch default.
+        """
+        import torch
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.weights = weights
+        self.input_size = tuple(input_size)
+        self.model = build_csrnet()
+        state = torch.load(weights, map_location='cpu')
+        self.model.load_state_dict(state.get('state_dict', state))
+        self.model.eval()
+        self._torch = torch
+
+    def _prepare(self, frames):
+        batch = np.empty((len(frames), self.input_size[1], self.input_size[0], 3), dtype=np.float32)
+        for i, frame in enumerate(frames):
+            rgb = cv2.cvtColor(cv2.resize(frame, self.input_size), cv2.COLOR_BGR2RGB)
+            batch[i] = (rgb.astype(np.float32) / 255.0 - IMAGENET_MEAN) / IMAGENET_STD
+        return self._torch.from_numpy(batch.transpose(0, 3, 1, 2).copy())
+
+    def estimate(self, frame):
+        """
+        Estimates the number of people in a single frame.
+
+        Args:
+            frame: BGR image.
+
+        Returns:
+            tuple: (count, density) where count is a float and density a float32 array of
+            shape (H/8, W/8) for the input size, summing to the count.
+        """
+        return self.estimate_batch([frame])[0]
+
+    def estimate_batch(self, frames):
+        """
+        Runs the network once on a list of frames.
+
+        Args:
+            frames: List of BGR images.
+
+        Returns:
+            list: One (count, density) tuple per frame, in input order.
+        """
+        with self._torch.inference_mode():
+            output = self.model(self._prepare(frames)).numpy()[:, 0]
+        # the network may produce small negative densities
+        output = np.maximum(output, 0)
+        return [(float(density.sum()), density) for density in output]
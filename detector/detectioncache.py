@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: entries are not locked
+    fcntl = None
+
+import numpy as np
+
+from detector.modelregistry import file_digest
+
+# (frame number, first row, number of rows) per detected frame
+INDEX_RECORD = np.dtype([("frame", "<i8"), ("offset", "<i8"), ("count", "<i8")])
+# x1, y1, x2, y2, score per box
+ROW = np.dtype("<f4")
+ROW_WIDTH = 5
+# bytes a writer appends between two checks of the size of the cache
+EVICT_CHECK_BYTES = 32 * 1024 ** 2
+
+
+def video_digest(path, sample_size=1 << 20):
+    """
+    Content hash of a video, from its size and three samples (start, middle, end).
+
+    Hashing every byte of an hour-long recording would cost more than it saves;
+    re-encoded or edited files change size or sampled content.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        for position in (0, max(0, size // 2 - sample_size // 2), max(0, size - sample_size)):
+            f.seek(position)
+            digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+def _try_lock(f):
+    # Exclusive lock on an open file without waiting; False if another process holds it
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _in_use(path):
+    # Whether another process holds the lock of an entry
+    try:
+        with open(path + ".index", "rb") as f:
+            return not _try_lock(f)
+    except OSError:
+        return False
+
+
+class VideoDetections:
+    """
+    Cached detections of one video, for one model and one input resolution.
+
+    Stored as two append-only files: "<key>.rows" holds the boxes and scores of all
+    frames as float32 rows, "<key>.index" one (frame, offset, count) record per frame.
+    Both are memory-mapped when opened; new detections are appended, the last
+    record of a frame wins, and are read back through the rows mapping (remapped
+    when it does not reach them yet). A record only counts once its rows are on
+    disk, so an interrupted run leaves a readable cache.
+
+    One process at a time writes an entry: the first to open it takes an exclusive
+    lock on the index file, the others get a read-only view whose `put` is a no-op.
+    """
+
+    def __init__(self, path, cache=None):
+        """
+        Args:
+            path: Entry path without suffix.
+            cache: DetectionCache that the entry belongs to, to keep it within its
+                size limit while detections are added.
+        """
+        self.path = path
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self.writable = True
+        self._offsets = {}  # frame number -> (offset, count) in the rows file
+        self._rows = np.empty((0, ROW_WIDTH), dtype=ROW)
+        self._unchecked_bytes = 0  # written since the size of the cache was last checked
+
+        rows_path, index_path = path + ".rows", path + ".index"
+        self._index_file = open(index_path, "ab")
+        if not _try_lock(self._index_file):
+            self.writable = False  # another process is filling this entry
+
+        num_rows = os.path.getsize(rows_path) // (ROW.itemsize * ROW_WIDTH) if os.path.exists(rows_path) else 0
+        num_records = os.path.getsize(index_path) // INDEX_RECORD.itemsize
+        if num_records:
+            records = np.memmap(index_path, dtype=INDEX_RECORD, mode="r", shape=(num_records,))
+            complete = records[records["offset"] + records["count"] <= num_rows]
+            self._offsets = dict(zip(complete["frame"].tolist(),
+                                     zip(complete["offset"].tolist(), complete["count"].tolist())))
+        self._next_offset = num_rows
+        self._map_rows()
+
+        self._rows_file = open(rows_path, "ab") if self.writable else None
+
+    def _map_rows(self):
+        if self._next_offset:
+            self._rows = np.memmap(self.path + ".rows", dtype=ROW, mode="r", shape=(self._next_offset, ROW_WIDTH))
+
+    def get(self, frame_number):
+        """
+        Returns the cached (boxes, scores) of a frame, or None.
+        """
+        location = self._offsets.get(frame_number)
+        if location is None:
+            self.misses += 1
+            return None
+        offset, count = location
+        if offset + count > len(self._rows):
+            self._map_rows()  # appended since the rows were mapped
+        rows = self._rows[offset:offset + count]
+        self.hits += 1
+        return np.array(rows[:, :4]), np.array(rows[:, 4])
+
+    def put(self, frame_number, boxes, scores):
+        if not self.writable:
+            return
+        rows = np.empty((len(boxes), ROW_WIDTH), dtype=ROW)
+        rows[:, :4] = np.reshape(boxes, (-1, 4))
+        rows[:, 4] = scores
+        self._rows_file.write(rows.tobytes())
+        self._rows_file.flush()
+        record = np.array([(frame_number, self._next_offset, len(rows))], dtype=INDEX_RECORD)
+        self._index_file.write(record.tobytes())
+        self._index_file.flush()
+        self._offsets[frame_number] = (self._next_offset, len(rows))
+        self._next_offset += len(rows)
+
+        self._unchecked_bytes += rows.nbytes + record.nbytes
+        if self.cache is not None and self._unchecked_bytes >= EVICT_CHECK_BYTES:
+            self._unchecked_bytes = 0
+            if not self.cache.evict(keep=self.path):
+                # this entry alone fills the cache: keep what it has, add nothing more
+                self.close_writer()
+
+    def close_writer(self):
+        """
+        Stops adding detections; the entry stays readable.
+        """
+        if self._rows_file is not None:
+            self._rows_file.close()
+            self._rows_file = None
+        self.writable = False
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def stats(self):
+        return {"cached_frames": len(self), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.close_writer()
+        self._index_file.close()  # releases the lock
+
+
+class DetectionCache:
+    """
+    On-disk cache of person detections, shared by the CLI and the GUI.
+
+    Entries are keyed by the content of the video, the model weights (by content
+    when they are a file), the detector configuration and the input resolution,
+    so any change in those misses the cache instead of returning stale boxes.
+    Whole entries are evicted, least recently opened first, when the cache grows
+    over `max_bytes`: when an entry is opened and while detections are added to it.
+    Entries open for writing in another process are left alone.
+    """
+
+    def __init__(self, cache_dir="cache/detections", max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._weights_digests = {}
+
+    def key(self, video_path, weights, size, config=""):
+        """
+        Name of the cache entry of a video, model and resolution.
+
+        Args:
+            video_path: Video file.
+            weights: Model weights (path or name).
+            size: (width, height) of the frames given to the detector.
+            config: Anything else that changes the detections, e.g. the tiling parameters.
+        """
+        if weights not in self._weights_digests:
+            self._weights_digests[weights] = file_digest(weights) if os.path.isfile(weights) else weights
+        description = json.dumps([video_digest(video_path), self._weights_digests[weights], list(size), config])
+        return hashlib.sha1(description.encode()).hexdigest()
+
+    def open(self, video_path, weights, size, config=""):
+        """
+        Opens (or creates) the cache entry of a video, model and resolution.
+
+        Returns:
+            VideoDetections: Close it when done.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, self.key(video_path, weights, size, config))
+        self.evict(keep=path)
+        for suffix in (".rows", ".index"):
+            if os.path.exists(path + suffix):
+                os.utime(path + suffix)  # mark as recently used
+        return VideoDetections(path, cache=self)
+
+    def entries(self):
+        """
+        (last used, bytes, path) of every entry, least recently used first.
+        """
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            base, suffix = os.path.splitext(name)
+            if suffix not in (".rows", ".index"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            used, size = entries.get(base, (0.0, 0))
+            entries[base] = (max(used, stat.st_mtime), size + stat.st_size)
+        return sorted((used, size, os.path.join(self.cache_dir, base)) for base, (used, size) in entries.items())
+
+    def evict(self, keep=None):
+        """
+        Deletes the least recently used entries until the cache fits in `max_bytes`.
+
+        Returns:
+            bool: True if the cache fits.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep or _in_use(path):
+                continue
+            for suffix in (".rows", ".index"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            total -= size
+        return total <= self.max_bytes
@@ -0,0 +1,335 @@
+"""
+Local detection service: one process holds the model, counting processes send it frames.
+
+Frames travel over a Unix socket (or a localhost TCP port) in a compact binary
+format, either inline or through a shared-memory block that the client reuses for
+every frame. A client batch of same-sized frames goes in one request. Requests
+from all clients are micro-batched by an InferenceScheduler.
+
+Start the service from the repository root:
+    python -m detector.detectionservice --model yolov8x.pt --address /tmp/crowd-detect.sock
+and print its statistics (queue depth, batch sizes, latency percentiles):
+    python -m detector.detectionservice --address /tmp/crowd-detect.sock --stats
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# request: magic, kind, height, width, channels, payload length
+REQUEST = struct.Struct("<4sBHHBI")
+# response: magic, status, payload length
+RESPONSE = struct.Struct("<4sBI")
+MAGIC = b"DET1"
+
+FRAME_INLINE = 1  # payload is the raw frame
+FRAME_SHARED = 2  # payload is the name of a shared-memory block holding the frame
+STATS = 3         # no payload, the response is a JSON object
+BATCH_INLINE = 4  # payload is the raw frames, one after the other
+BATCH_SHARED = 5  # payload is the number of frames (uint32) and the name of the block holding them
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+DEFAULT_ADDRESS = "/tmp/crowd-detect.sock"
+
+logger = logging.getLogger(__name__)
+
+
+def parse_address(address):
+    """
+    "host:port" is a TCP address, anything else the path of a Unix socket.
+    """
+    host, _, port = str(address).rpartition(":")
+    if host and port.isdigit():
+        return (host, int(port))
+    return str(address)
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("connection closed")
+        received += count
+    return buffer
+
+
+def _send_response(sock, status, payload=b""):
+    sock.sendall(RESPONSE.pack(MAGIC, status, len(payload)) + payload)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    # one handler thread per client connection; the requests of a connection are
+    # answered in order, the batching happens across connections
+
+    def handle(self):
+        scheduler = self.server.scheduler
+        attached = {}
+        try:
+            while True:
+                try:
+                    header = _recv_exactly(self.request, REQUEST.size)
+                except ConnectionError:
+                    break
+                magic, kind, height, width, channels, length = REQUEST.unpack(header)
+                if magic != MAGIC:
+                    _send_response(self.request, STATUS_ERROR, b"bad magic")
+                    break
+                payload = _recv_exactly(self.request, length) if length else b""
+
+                if kind == STATS:
+                    _send_response(self.request, STATUS_OK, json.dumps(self.server.stats()).encode())
+                    continue
+
+                try:
+                    frame_size = height * width * channels
+                    if kind in (FRAME_SHARED, BATCH_SHARED):
+                        if kind == BATCH_SHARED:
+                            count, = struct.unpack_from("<I", payload)
+                            payload = payload[4:]
+                        else:
+                            count = 1
+                        name = bytes(payload).decode()
+                        block = attached.get(name)
+                        if block is None:
+                            block = attached[name] = shared_memory.SharedMemory(name=name)
+                            # the client owns the block; keep this process from unlinking it on exit
+                            resource_tracker.unregister(block._name, "shared_memory")
+                        buffer = block.buf
+                    else:
+                        buffer = payload
+                        count = len(payload) // frame_size if kind == BATCH_INLINE and frame_size else 1
+                    frames = np.frombuffer(buffer, dtype=np.uint8, count=count * frame_size)
+                    # copied out of the block: the batch may outlive this request
+                    frames = frames.reshape(count, height, width, channels).copy()
+
+                    if kind in (FRAME_INLINE, FRAME_SHARED):
+                        boxes, scores = scheduler.submit(id(self), frames[0]).result()
+                        rows = np.column_stack([boxes, scores]).astype(np.float32)
+                        _send_response(self.request, STATUS_OK, rows.tobytes())
+                        continue
+
+                    # each frame of a client batch is its own scheduler stream, so that
+                    # the whole batch fits in one predict call (one frame per stream
+                    # and batch otherwise)
+                    futures = [scheduler.submit((id(self), i), frame) for i, frame in enumerate(frames)]
+                    results = [future.result() for future in futures]
+                    counts = np.array([len(scores) for _, scores in results], dtype=np.uint32)
+                    rows = [np.column_stack([boxes, scores]).astype(np.float32) for boxes, scores in results]
+                    rows = np.concatenate(rows) if rows else np.zeros((0, 5), dtype=np.float32)
+                    _send_response(self.request, STATUS_OK, counts.tobytes() + rows.tobytes())
+                except Exception as e:
+                    _send_response(self.request, STATUS_ERROR, repr(e).encode())
+        finally:
+            for block in attached.values():
+                block.close()
+
+
+class DetectionServer:
+    """
+    Serves person detection to local clients with one shared, micro-batched model.
+    """
+
+    def __init__(self, detector, address=DEFAULT_ADDRESS, max_batch=8, max_wait=0.005):
+        """
+        Args:
+            detector: PersonDetector (anything with `detect_batch`).
+            address: Unix socket path, or "host:port" for TCP (bind it to localhost).
+            max_batch: Maximum number of frames per predict call.
+            max_wait: Seconds to wait for more requests to fill a batch.
+        """
+        from video.multistream import InferenceScheduler
+
+        self.address = parse_address(address)
+        self.scheduler = InferenceScheduler(detector, max_batch=max_batch, max_wait=max_wait)
+        if isinstance(self.address, tuple):
+            server_class = socketserver.ThreadingTCPServer
+            server_class.allow_reuse_address = True
+        else:
+            server_class = socketserver.ThreadingUnixStreamServer
+            if os.path.exists(self.address):
+                os.remove(self.address)
+        self.server = server_class(self.address, _RequestHandler)
+        self.server.daemon_threads = True
+        self.server.scheduler = self.scheduler
+        self.server.stats = self.stats
+
+    def stats(self):
+        """
+        Queue depth, batch sizes and latency percentiles of the requests served so far.
+        """
+        return self.scheduler.stats()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def start(self):
+        """
+        Serves on a background thread.
+        """
+        thread = threading.Thread(target=self.serve_forever, name="detection-service", daemon=True)
+        thread.start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.scheduler.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+class DetectionClient:
+    """
+    Person detection through the local detection service, with the PersonDetector interface.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, shared=True):
+        """
+        Args:
+            address: Address of the service, see `parse_address`.
+            shared: Send frames through a shared-memory block instead of inline.
+        """
+        self.weights = "service:{}".format(address)
+        self.address = parse_address(address)
+        family = socket.AF_INET if isinstance(self.address, tuple) else socket.AF_UNIX
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.connect(self.address)
+        self.shared = shared
+        self._block = None
+        # one request at a time per connection
+        self._lock = threading.Lock()
+        # clients are shared process-wide (see detector.modelmanager) and live until
+        # exit; free the shared-memory block then
+        atexit.register(self.close)
+
+    def _request(self, kind, height=0, width=0, channels=0, payload=b""):
+        self.sock.sendall(REQUEST.pack(MAGIC, kind, height, width, channels, len(payload)) + payload)
+        magic, status, length = RESPONSE.unpack(_recv_exactly(self.sock, RESPONSE.size))
+        body = bytes(_recv_exactly(self.sock, length)) if length else b""
+        if magic != MAGIC or status != STATUS_OK:
+            raise RuntimeError("detection service error: {}".format(body.decode(errors="replace")))
+        return body
+
+    def _shared_block(self, nbytes):
+        # the block is reused for every request and only grows
+        if self._block is None or self._block.size < nbytes:
+            self._release_block()
+            self._block = shared_memory.SharedMemory(create=True, size=nbytes)
+        return self._block
+
+    def detect(self, frame):
+        """
+        Runs the detection of a single frame on the service.
+
+        Args:
+            frame: BGR image.
+
+        Returns:
+            tuple: (boxes, scores), see `filter_person_boxes`.
+        """
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+
+        with self._lock:
+            if self.shared:
+                block = self._shared_block(frame.nbytes)
+                np.ndarray(frame.shape, dtype=np.uint8, buffer=block.buf)[...] = frame
+                body = self._request(FRAME_SHARED, height, width, channels, block.name.encode())
+            else:
+                body = self._request(FRAME_INLINE, height, width, channels, frame.tobytes())
+
+        rows = np.frombuffer(body, dtype=np.float32).reshape(-1, 5)
+        return rows[:, :4].copy(), rows[:, 4].copy()
+
+    def detect_batch(self, frames):
+        """
+        Runs the detection of several frames in one request; the service batches them
+        together with other clients' frames. Frames of different sizes are sent one
+        by one.
+        """
+        frames = [np.ascontiguousarray(frame, dtype=np.uint8) for frame in frames]
+        if len(frames) < 2 or any(frame.shape != frames[0].shape for frame in frames):
+            return [self.detect(frame) for frame in frames]
+        height, width = frames[0].shape[:2]
+        channels = frames[0].shape[2] if frames[0].ndim == 3 else 1
+
+        with self._lock:
+            if self.shared:
+                nbytes = frames[0].nbytes * len(frames)
+                block = self._shared_block(nbytes)
+                np.ndarray((len(frames),) + frames[0].shape, dtype=np.uint8, buffer=block.buf)[...] = frames
+                body = self._request(BATCH_SHARED, height, width, channels,
+                                     struct.pack("<I", len(frames)) + block.name.encode())
+            else:
+                body = self._request(BATCH_INLINE, height, width, channels, b"".join(frame.tobytes() for frame in frames))
+
+        counts = np.frombuffer(body, dtype=np.uint32, count=len(frames))
+        rows = np.frombuffer(body, dtype=np.float32, offset=counts.nbytes).reshape(-1, 5)
+        results = []
+        for start, count in zip(np.cumsum(counts) - counts, counts.tolist()):
+            results.append((rows[start:start + count, :4].copy(), rows[start:start + count, 4].copy()))
+        return results
+
+    def stats(self):
+        with self._lock:
+            return json.loads(self._request(STATS).decode())
+
+    def _release_block(self):
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def close(self):
+        with self._lock:
+            self.sock.close()
+            self._release_block()
+        atexit.unregister(self.close)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local person detection service.")
+    parser.add_argument("--model", default="yolov8x.pt", help="YOLO weights (or an exported variant)")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="Unix socket path or host:port")
+    parser.add_argument("--max-batch", type=int, default=8, help="frames per predict call")
+    parser.add_argument("--max-wait", type=float, default=0.005, help="seconds to wait to fill a batch")
+    parser.add_argument("--stats", action="store_true", help="print the statistics of a running service and exit")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        client = DetectionClient(args.address, shared=False)
+        print(json.dumps(client.stats()))
+        client.close()
+        return
+
+    logging.basicConfig(level=logging.INFO, format="[INFO] %(message)s")
+    from detector.modelmanager import model_manager
+
+    server = DetectionServer(model_manager.get(args.model), args.address, args.max_batch, args.max_wait)
+    logger.info("Serving {} on {}".format(args.model, args.address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# frame size used for the warm-up inference, the size frames are resized to
+WARMUP_SIZE = (500, 280)
+
+
+def _load_model(weights, backend):
+    if backend == "yolo":
+        from detector.persondetector import PersonDetector
+        return PersonDetector(weights)
+    if backend == "csrnet":
+        from detector.densityestimator import DensityEstimator
+        return DensityEstimator(weights)
+    if backend == "service":
+        # weights is the address of a running detection service
+        from detector.detectionservice import DetectionClient
+        return DetectionClient(weights)
+    raise ValueError("unknown backend {!r}, expected 'yolo', 'csrnet' or 'service'".format(backend))
+
+
+def _warm_up(model):
+    # the first inference allocates buffers and picks kernels; run it on a
+    # blank frame so that the first real frame is not a latency spike
+    frame = np.zeros((WARMUP_SIZE[1], WARMUP_SIZE[0], 3), dtype=np.uint8)
+    if hasattr(model, "detect"):
+        model.detect(frame)
+    else:
+        model.estimate(frame)
+
+
+class ModelHandle:
+    """
+    A model being loaded in the background.
+    """
+
+    def __init__(self, weights, backend):
+        self.weights = weights
+        self.backend = backend
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._future = Future()
+
+    def ready(self):
+        """
+        True once the model is loaded and warmed up (or failed to load).
+        """
+        return self._future.done()
+
+    def result(self, timeout=None):
+        """
+        Waits for the model and returns it; raises the loading error if there was one.
+        """
+        return self._future.result(timeout)
+
+    def add_done_callback(self, fn):
+        """
+        Calls `fn(handle)` on the loading thread when the model is ready, or right
+        away if it already is.
+        """
+        self._future.add_done_callback(lambda _: fn(self))
+
+    def timings(self):
+        return {
+            "weights": self.weights,
+            "backend": self.backend,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+        }
+
+
+class ModelManager:
+    """
+    Process-wide cache of the loaded models.
+
+    Models are loaded and warmed up on a background thread the first time they
+    are requested; later requests for the same (weights, backend) share the same
+    instance, across windows and workers.
+    """
+
+    def __init__(self, warmup=True):
+        self.warmup = warmup
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def preload(self, weights, backend="yolo"):
+        """
+        Starts loading a model in the background, unless it is already loaded or loading.
+
+        Args:
+            weights: Model weights.
+            backend: "yolo" (PersonDetector), "csrnet" (DensityEstimator) or "service"
+                (DetectionClient, the weights being the address of the detection service).
+
+        Returns:
+            ModelHandle: Handle shared by every request for the same model.
+        """
+        key = (weights, backend)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                return handle
+            handle = ModelHandle(weights, backend)
+            self._handles[key] = handle
+
+        thread = threading.Thread(target=self._load, args=(handle,), name="load-{}".format(weights), daemon=True)
+        thread.start()
+        return handle
+
+    def get(self, weights, backend="yolo", timeout=None):
+        """
+        Returns the model, waiting for it to be loaded.
+        """
+        return self.preload(weights, backend).result(timeout)
+
+    def _load(self, handle):
+        try:
+            start = time.perf_counter()
+            model = _load_model(handle.weights, handle.backend)
+            handle.load_seconds = time.perf_counter() - start
+
+            if self.warmup:
+                start = time.perf_counter()
+                _warm_up(model)
+                handle.warmup_seconds = time.perf_counter() - start
+        except BaseException as e:
+            # forget the failed handle so that a later request retries
+            with self._lock:
+                self._handles.pop((handle.weights, handle.backend), None)
+            handle._future.set_exception(e)
+        else:
+            handle._future.set_result(model)
+
+    def timings(self):
+        """
+        Load and warm-up times of every model requested so far, in seconds.
+        """
+        with self._lock:
+            handles = list(self._handles.values())
+        return [handle.timings() for handle in handles]
+
+
+# shared by the GUI windows, their workers and videoCount.py
+model_manager = ModelManager()
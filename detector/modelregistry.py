@@ -0,0 +1,261 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+
+from detector.persondetector import PersonDetector
+
+# "torch" is the checkpoint itself; the other variants are exported artifacts
+VARIANTS = ("torch", "onnx", "onnx-int8", "openvino", "openvino-int8")
+
+# absolute path -> (size, mtime, digest) of the files hashed so far
+_digests = {}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Content hash of a file, so that retrained weights saved under the same name
+    get new artifacts. Remembered per path until the file's size or mtime changes.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cached = _digests.get(path)
+    if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    _digests[path] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+    return _digests[path][2]
+
+
+def calibration_frames(video_dir="Input", num_frames=64, size=(500, 280)):
+    """
+    Samples frames evenly from every video of a directory.
+
+    Args:
+        video_dir: Directory with the calibration videos.
+        num_frames: Total number of frames, split evenly across the videos.
+        size: (width, height) the frames are resized to, the size used for detection.
+
+    Returns:
+        list: BGR frames.
+    """
+    videos = sorted(glob.glob(os.path.join(video_dir, "*.mp4")) + glob.glob(os.path.join(video_dir, "*.avi")))
+    if not videos:
+        raise IOError("no calibration videos in {}".format(video_dir))
+
+    frames = []
+    per_video = max(1, num_frames // len(videos))
+    for video in videos:
+        cap = cv2.VideoCapture(video)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for index in np.linspace(0, max(total - 1, 0), per_video).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(cv2.resize(frame, tuple(size)))
+        cap.release()
+    return frames[:num_frames]
+
+
+def letterbox(frame, imgsz):
+    """
+    Resizes a BGR frame into a square model input the way ultralytics does, and
+    returns it as a normalized float32 RGB array of shape (1, 3, imgsz, imgsz).
+    """
+    height, width = frame.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    resized = cv2.resize(frame, (int(round(width * scale)), int(round(height * scale))))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    rgb = canvas[:, :, ::-1].transpose(2, 0, 1)
+    return (rgb[None].astype(np.float32) / 255.0).copy()
+
+
+class ModelRegistry:
+    """
+    Exports YOLO checkpoints to CPU inference runtimes and caches the artifacts.
+
+    Every artifact is stored under `cache_dir`, keyed by the content hash of the
+    checkpoint, the variant and the input size, and listed in `registry.json`.
+    The artifacts load through ultralytics, so they run behind the PersonDetector
+    interface.
+    """
+
+    def __init__(self, cache_dir="trained_models/exported", calibration_dir="Input", calibration_frames=64,
+                 imgsz=640):
+        """
+        Args:
+            cache_dir: Directory holding the exported artifacts and the manifest.
+            calibration_dir: Directory with the videos the INT8 variants are calibrated on.
+            calibration_frames: Number of calibration frames.
+            imgsz: Model input size of the exported variants.
+        """
+        self.cache_dir = cache_dir
+        self.calibration_dir = calibration_dir
+        self.calibration_frames = calibration_frames
+        self.imgsz = imgsz
+        self.manifest_path = os.path.join(cache_dir, "registry.json")
+        self.entries = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.entries = json.load(f)
+
+    def _save(self):
+        with open(self.manifest_path, "w") as f:
+            json.dump(self.entries, f, indent=2)
+
+    def _key(self, weights, variant):
+        return "{}-{}-{}".format(file_digest(weights)[:12], variant, self.imgsz)
+
+    def path(self, weights, variant="onnx"):
+        """
+        Returns the artifact of a checkpoint variant, exporting it on the first request.
+
+        Args:
+            weights: YOLO checkpoint (.pt).
+            variant: One of `VARIANTS`.
+
+        Returns:
+            str: Path that `ultralytics.YOLO` (and so PersonDetector) can load.
+        """
+        if variant not in VARIANTS:
+            raise ValueError("unknown variant {!r}, expected one of {}".format(variant, VARIANTS))
+        if variant == "torch":
+            return weights
+
+        key = self._key(weights, variant)
+        entry = self.entries.get(key)
+        if entry is not None and os.path.exists(entry["path"]):
+            return entry["path"]
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        start = time.perf_counter()
+        target = os.path.join(self.cache_dir, key)
+        if variant == "onnx":
+            artifact = self._export(weights, "onnx", target + ".onnx")
+        elif variant == "onnx-int8":
+            artifact = self._quantize_onnx(self.path(weights, "onnx"), target + ".onnx")
+        elif variant == "openvino":
+            artifact = self._export(weights, "openvino", target + "_openvino_model")
+        else:
+            artifact = self._export(weights, "openvino", target + "_openvino_model", int8=True,
+                                    data=self._calibration_dataset())
+
+        self.entries[key] = {
+            "source": os.path.abspath(weights),
+            "variant": variant,
+            "imgsz": self.imgsz,
+            "path": artifact,
+            "export_seconds": round(time.perf_counter() - start, 2),
+        }
+        self._save()
+        return artifact
+
+    def load(self, weights, variant="onnx", class_list_path="coco.txt"):
+        """
+        Loads a checkpoint variant behind the PersonDetector interface.
+        """
+        return PersonDetector(self.path(weights, variant), class_list_path)
+
+    def _export(self, weights, export_format, target, **kwargs):
+        from ultralytics import YOLO
+
+        exported = YOLO(weights).export(format=export_format, imgsz=self.imgsz, **kwargs)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        elif os.path.exists(target):
+            os.remove(target)
+        shutil.move(str(exported), target)
+        return target
+
+    def _calibration_dataset(self):
+        # ultralytics calibrates INT8 exports on a dataset description; the
+        # calibration frames are written out once as an image-only dataset
+        dataset_dir = os.path.join(self.cache_dir, "calibration")
+        images_dir = os.path.join(dataset_dir, "images")
+        if not os.path.isdir(images_dir) or not os.listdir(images_dir):
+            os.makedirs(images_dir, exist_ok=True)
+            frames = calibration_frames(self.calibration_dir, self.calibration_frames)
+            for index, frame in enumerate(frames):
+                cv2.imwrite(os.path.join(images_dir, "{:04d}.jpg".format(index)), frame)
+
+        data_path = os.path.join(dataset_dir, "data.yml")
+        with open(data_path, "w") as f:
+            f.write("path: {}\ntrain: images\nval: images\n\nnc: 1\nnames:\n  0: person\n".format(
+                os.path.abspath(dataset_dir)))
+        return data_path
+
+    def _quantize_onnx(self, onnx_path, target):
+        from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                              quantize_static)
+        import onnxruntime
+
+        input_name = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        frames = calibration_frames(self.calibration_dir, self.calibration_frames)
+        imgsz = self.imgsz
+
+        class FrameReader(CalibrationDataReader):
+            def __init__(self):
+                self.inputs = iter(frames)
+
+            def get_next(self):
+                frame = next(self.inputs, None)
+                return None if frame is None else {input_name: letterbox(frame, imgsz)}
+
+        quantize_static(onnx_path, target, FrameReader(), quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+        return target
+
+    def compare(self, weights, variants=VARIANTS, frames=None):
+        """
+        Measures the speed and the count accuracy of checkpoint variants.
+
+        The counts of the PyTorch checkpoint are the reference: the error of a
+        variant is its mean absolute difference in people per frame.
+
+        Args:
+            weights: YOLO checkpoint (.pt).
+            variants: Variants to compare.
+            frames: Evaluation frames, defaults to the calibration frames.
+
+        Returns:
+            list: One dict per variant with its mean latency, throughput and count error.
+        """
+        if frames is None:
+            frames = calibration_frames(self.calibration_dir, self.calibration_frames)
+
+        reference = None
+        report = []
+        for variant in ("torch",) + tuple(v for v in variants if v != "torch"):
+            detector = self.load(weights, variant)
+            detector.detect(frames[0])  # warm-up
+
+            counts = []
+            start = time.perf_counter()
+            for frame in frames:
+                counts.append(len(detector.detect(frame)[0]))
+            elapsed = time.perf_counter() - start
+
+            counts = np.array(counts)
+            if reference is None:
+                reference = counts
+            report.append({
+                "variant": variant,
+                "path": detector.weights,
+                "latency_ms": round(elapsed / len(frames) * 1e3, 2),
+                "fps": round(len(frames) / elapsed, 2),
+                "count_mae": round(float(np.abs(counts - reference).mean()), 3),
+                "mean_count": round(float(counts.mean()), 2),
+            })
+        return [row for row in report if row["variant"] in variants]
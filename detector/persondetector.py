@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+
+
+def load_class_list(path="coco.txt"):
+    """
+    Reads the class names used by the detection models.
+
+    Args:
+        path: Text file with one class name per line.
+
+    Returns:
+        list: Class names, indexed by class id.
+    """
+    with open(path, "r") as my_file:
+        return my_file.read().split("\n")
+
+
+def person_class_id(class_list):
+    """
+    Looks up the numeric id of the person class.
+
+    Args:
+        class_list: Class names, indexed by class id.
+
+    Returns:
+        int: Index of the 'person' entry.
+    """
+    for class_id, name in enumerate(class_list):
+        if name.strip() == 'person':
+            return class_id
+    raise ValueError("class list has no 'person' entry")
+
+
+def filter_person_boxes(data, class_id=0):
+    """
+    Keeps the person detections of a raw YOLO result.
+
+    Args:
+        data: Array of shape (N, 6) with rows [x1, y1, x2, y2, score, class].
+        class_id: Numeric id of the person class.
+
+    Returns:
+        tuple: (boxes, scores) where boxes is a float32 (K, 4) array in the
+        format [x1, y1, x2, y2] and scores is a float32 (K,) array.
+    """
+    data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+    mask = data[:, 5] == class_id
+    return data[mask, :4], data[mask, 4]
+
+
+class PersonDetector:
+    """
+    Wraps a YOLO model and returns person bounding boxes as NumPy arrays.
+
+    One instance is shared by every window and worker (see `detector.modelmanager`);
+    the Ultralytics predictor keeps per-model state, so predict calls are serialized.
+    """
+
+    def __init__(self, weights, class_list_path="coco.txt"):
+        from ultralytics import YOLO
+
+        self.weights = weights
+        # the task is given explicitly so that exported models (ONNX,
+        # OpenVINO) load the same way as the PyTorch checkpoints
+        self.model = YOLO(weights, task="detect")
+        self.class_id = person_class_id(load_class_list(class_list_path))
+        self._lock = threading.Lock()
+
+    def detect(self, frame):
+        """
+        Runs the model on a single frame.
+
+        Args:
+            frame: BGR image.
+
+        Returns:
+            tuple: (boxes, scores), see `filter_person_boxes`.
+        """
+        with self._lock:
+            results = self.model.predict(frame, classes=[self.class_id], verbose=False)
+        return filter_person_boxes(results[0].boxes.data.cpu().numpy(), self.class_id)
+
+    def detect_batch(self, frames):
+        """
+        Runs the model once on a list of frames.
+
+        Args:
+            frames: List of BGR images.
+
+        Returns:
+            list: One (boxes, scores) tuple per frame, in input order.
+        """
+        with self._lock:
+            results = self.model.predict(list(frames), classes=[self.class_id], verbose=False)
+        return [filter_person_boxes(r.boxes.data.cpu().numpy(), self.class_id) for r in results]
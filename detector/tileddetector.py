@@ -0,0 +1,184 @@
+import numpy as np
+
+# a box within this many pixels of an inner tile edge is taken as cut by the seam
+SEAM_MARGIN = 4
+
+
+def plan_tiles(width, height, tile_size=640, overlap=0.2):
+    """
+    Splits a frame into overlapping square tiles that cover it completely.
+
+    Args:
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        tile_size: Side of a tile in pixels; frames smaller than a tile give a single tile.
+        overlap: Fraction of the tile side shared by two neighbouring tiles.
+
+    Returns:
+        numpy.ndarray: int array of shape (T, 4) with the tiles as [x1, y1, x2, y2].
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    stride = max(1, int(round(tile_size * (1 - overlap))))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, stride))
+        # the last tile is aligned with the frame edge
+        positions.append(length - tile_size)
+        return positions
+
+    xs = starts(width)
+    ys = starts(height)
+    tiles = [(x, y, min(x + tile_size, width), min(y + tile_size, height)) for y in ys for x in xs]
+    return np.array(tiles, dtype=np.int64)
+
+
+def merge_boxes(boxes, scores, iou_threshold=0.5, tile_ids=None, at_seam=None):
+    """
+    Non-maximum suppression over the boxes collected from all tiles.
+
+    A person cut by a tile seam is usually detected in both tiles, once as a full
+    box and once as a truncated one. For two boxes from different tiles, one of
+    them touching a seam, a box is therefore also suppressed when most of it lies
+    inside a higher scoring box. Boxes from the same tile only go through plain
+    IoU suppression, so that occluded people in a dense crowd are kept.
+
+    Args:
+        boxes: float array of shape (N, 4) in the format [x1, y1, x2, y2].
+        scores: float array of shape (N,).
+        iou_threshold: Overlap above which the lower scoring box is dropped; the
+            overlap is the IoU, or across a seam the larger of the IoU and the
+            intersection over the smaller box.
+        tile_ids: int array of shape (N,), the tile each box comes from; None for a
+            single tile.
+        at_seam: bool array of shape (N,), whether a box touches an inner edge of its tile.
+
+    Returns:
+        numpy.ndarray: Indices of the kept boxes, by decreasing score.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+    tile_ids = np.zeros(len(boxes), dtype=np.int64) if tile_ids is None else np.asarray(tile_ids)
+    at_seam = np.zeros(len(boxes), dtype=bool) if at_seam is None else np.asarray(at_seam, dtype=bool)
+    areas = np.maximum(boxes[:, 2] - boxes[:, 0], 0) * np.maximum(boxes[:, 3] - boxes[:, 1], 0)
+    order = np.argsort(-scores, kind="stable")
+
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+
+        w = np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0])
+        h = np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1])
+        inter = np.maximum(w, 0) * np.maximum(h, 0)
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-6)
+        ios = inter / np.maximum(np.minimum(areas[i], areas[rest]), 1e-6)
+        across_seam = (tile_ids[rest] != tile_ids[i]) & (at_seam[rest] | at_seam[i])
+        overlap = np.where(across_seam, np.maximum(iou, ios), iou)
+        order = rest[overlap <= iou_threshold]
+
+    return np.array(keep, dtype=np.int64)
+
+
+class TiledDetector:
+    """
+    Runs a person detector on overlapping tiles of the full-resolution frame.
+
+    Small, distant people that vanish when the whole frame is resized to the model
+    input size stay large enough to be found inside a tile. The tile detections are
+    shifted back to frame coordinates and merged across the seams.
+    """
+
+    def __init__(self, detector, tile_size=640, overlap=0.2, iou_threshold=0.5, full_frame=True,
+                 max_batch=16):
+        """
+        Args:
+            detector: PersonDetector (or any object with `detect` and `detect_batch`).
+            tile_size: Side of a tile in pixels.
+            overlap: Fraction of the tile side shared by two neighbouring tiles.
+            iou_threshold: Overlap above which duplicate boxes are merged, see `merge_boxes`.
+            full_frame: Also run the detector on the whole frame, so that people larger
+                than a tile are still found.
+            max_batch: Maximum number of tiles per batched predict call. The tiles always
+                go through `detect_batch`: the wrapped model is not thread-safe, so running
+                tiles on a thread pool would only serialize on its lock.
+        """
+        self.detector = detector
+        self.weights = getattr(detector, "weights", None)
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.iou_threshold = iou_threshold
+        self.full_frame = full_frame
+        self.max_batch = max_batch
+
+    def _crops(self, frame):
+        height, width = frame.shape[:2]
+        tiles = plan_tiles(width, height, self.tile_size, self.overlap)
+        crops = [frame[y1:y2, x1:x2] for (x1, y1, x2, y2) in tiles]
+        if self.full_frame and len(tiles) > 1:
+            crops.append(frame)
+            tiles = np.vstack([tiles, [[0, 0, width, height]]])
+        # the edges of a tile inside the frame are seams, those on the frame border are not
+        seams = np.stack([tiles[:, 0] > 0, tiles[:, 1] > 0, tiles[:, 2] < width, tiles[:, 3] < height], axis=1)
+        return crops, tiles, seams
+
+    def _run(self, crops):
+        results = []
+        for start in range(0, len(crops), self.max_batch):
+            results.extend(self.detector.detect_batch(crops[start:start + self.max_batch]))
+        return results
+
+    def _merge(self, results, tiles, seams):
+        boxes = [b + np.tile(tile[:2], 2).astype(np.float32) for (b, _), tile in zip(results, tiles)]
+        scores = [s for (_, s) in results]
+        tile_ids = np.repeat(np.arange(len(results)), [len(s) for s in scores])
+        boxes = np.concatenate(boxes) if boxes else np.zeros((0, 4), dtype=np.float32)
+        scores = np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+        # distance of each box to the edges of its tile, counted only on seams
+        box_tiles = tiles[tile_ids]
+        gaps = np.concatenate([boxes[:, :2] - box_tiles[:, :2], box_tiles[:, 2:] - boxes[:, 2:]], axis=1)
+        at_seam = ((gaps <= SEAM_MARGIN) & seams[tile_ids]).any(axis=1)
+
+        keep = merge_boxes(boxes, scores, self.iou_threshold, tile_ids, at_seam)
+        return boxes[keep], scores[keep]
+
+    def detect(self, frame):
+        """
+        Runs the detector on the tiles of a single frame.
+
+        Args:
+            frame: BGR image at full resolution.
+
+        Returns:
+            tuple: (boxes, scores) in frame coordinates, see `filter_person_boxes`.
+        """
+        crops, tiles, seams = self._crops(frame)
+        return self._merge(self._run(crops), tiles, seams)
+
+    def detect_batch(self, frames):
+        """
+        Runs the detector on the tiles of several frames, all tiles sharing the batches.
+
+        Args:
+            frames: List of BGR images.
+
+        Returns:
+            list: One (boxes, scores) tuple per frame, in input order.
+        """
+        crops, layouts = [], []
+        for frame in frames:
+            frame_crops, tiles, seams = self._crops(frame)
+            crops.extend(frame_crops)
+            layouts.append((tiles, seams))
+
+        results = self._run(crops)
+        merged = []
+        start = 0
+        for tiles, seams in layouts:
+            merged.append(self._merge(results[start:start + len(tiles)], tiles, seams))
+            start += len(tiles)
+        return merged
@@ -0,0 +1,125 @@
+import glob
+import queue
+import threading
+import time
+
+from PySide6.QtCore import QObject, Signal
+
+
+def candidate_indices(max_devices=8):
+    """
+    Camera indices worth probing: the /dev/videoN nodes on Linux, else 0..max_devices-1.
+    """
+    nodes = glob.glob('/dev/video*')
+    indices = sorted(int(node[len('/dev/video'):]) for node in nodes if node[len('/dev/video'):].isdigit())
+    return indices or list(range(max_devices))
+
+
+def device_signature():
+    # Changes when a camera is plugged in or out (on platforms exposing device nodes)
+    return tuple(sorted(glob.glob('/dev/video*')))
+
+
+def probe_camera(index):
+    import cv2
+
+    cap = cv2.VideoCapture(index)
+    try:
+        return cap.isOpened()
+    finally:
+        cap.release()
+
+
+class CameraDiscovery(QObject):
+    """
+    Finds the connected cameras in the background.
+
+    Every candidate index is probed on its own thread, so absent or slow devices
+    do not delay the others; a probe that takes longer than `probe_timeout`
+    seconds is given up on (its thread is left to finish on its own). `found` is
+    emitted for each camera as soon as it opens, `finished` with the sorted list
+    once all probes are done.
+
+    Results are cached for `ttl` seconds, and dropped earlier when the set of
+    video devices changes or `invalidate` is called.
+    """
+
+    found = Signal(int)
+    finished = Signal(list)
+
+    def __init__(self, probe_timeout=3.0, ttl=60.0, max_devices=8, parent=None):
+        super().__init__(parent)
+        self.probe_timeout = probe_timeout
+        self.ttl = ttl
+        self.max_devices = max_devices
+
+        self._lock = threading.Lock()
+        self._cameras = None  # cached result
+        self._cached_at = 0.0
+        self._signature = None
+        self._running = False
+
+    def cached(self):
+        """
+        The cached cameras, or None if they have to be scanned again.
+        """
+        with self._lock:
+            if (self._cameras is not None and time.monotonic() - self._cached_at < self.ttl
+                    and self._signature == device_signature()):
+                return list(self._cameras)
+            return None
+
+    def invalidate(self):
+        with self._lock:
+            self._cameras = None
+
+    def discover(self):
+        """
+        Reports the cameras through `found` and `finished`: right away from the cache,
+        otherwise from a background scan. Never blocks the caller.
+        """
+        cameras = self.cached()
+        if cameras is not None:
+            for index in cameras:
+                self.found.emit(index)
+            self.finished.emit(cameras)
+            return
+        with self._lock:
+            if self._running: # the scan in progress reports to the connected slots
+                return
+            self._running = True
+        threading.Thread(target=self._scan, name='camera-discovery', daemon=True).start()
+
+    def _scan(self):
+        signature = device_signature()
+        results = queue.Queue()
+
+        def probe(index):
+            try:
+                results.put((index, probe_camera(index)))
+            except Exception:
+                results.put((index, False))
+
+        indices = candidate_indices(self.max_devices)
+        for index in indices:
+            threading.Thread(target=probe, args=(index,), name='probe-camera-%d' % index, daemon=True).start()
+
+        cameras = []
+        deadline = time.monotonic() + self.probe_timeout
+        for _ in indices:
+            try:
+                index, opened = results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break # the remaining probes timed out
+            if opened:
+                cameras.append(index)
+                self.found.emit(index)
+
+        cameras.sort()
+        with self._lock:
+            self._cameras = cameras
+            self._cached_at = time.monotonic()
+            self._signature = signature
+            self._running = False
+        self.finished.emit(cameras)
+
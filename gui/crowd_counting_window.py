@@ -2,37 +2,70 @@ import sys
 from PySide6.QtWidgets import (QVBoxLayout, QHBoxLayout, QGridLayout, 
                                QWidget, QLabel, QGroupBox, QFormLayout, QLineEdit, 
                                QSpinBox, QPushButton, QSlider)
-from PySide6.QtGui import QImage, QPixmap, QGuiApplication, QIcon
-from PySide6.QtCore import Qt, QRunnable, Slot, QThreadPool, QSize
+from PySide6.QtGui import QGuiApplication, QIcon
+from PySide6.QtCore import Qt, QRunnable, Slot, QThreadPool, QSize, QObject, Signal, QTimer
 
 import os
 import cv2
 import time
-import pandas as pd
-from ultralytics import YOLO
+import threading
 
 # Add the parent directory to sys.path
 current_directory = os.path.dirname(os.path.abspath(__file__))
 parent_directory = os.path.dirname(current_directory)
 sys.path.append(parent_directory)
 
-# Load the YOLO model and COCO labels
-model = YOLO('trained_models/best.pt')
-with open("coco.txt", "r") as my_file:
-    class_list = my_file.read().split("\n")
+from detector.densityestimator import render_heatmap
+from frame_view import FrameView
+from detector.modelmanager import model_manager
+from detector.detectioncache import DetectionCache
+from video.seekindex import SeekIndex, FrameSeeker, FrameCache
+
+# Models are loaded in the background by the shared model manager, one
+# instance per weights file for all windows
+MODEL_WEIGHTS = {
+    'YOLO': ('trained_models/best.pt', 'yolo'),
+    'CSRNet': ('trained_models/csrnet.pth', 'csrnet'),
+}
+
+# Address of a running detection service (see detector/detectionservice.py); when
+# set, the YOLO detections come from the service instead of a model in this process
+DETECTION_SERVICE = os.environ.get('CROWD_DETECTION_SERVICE')
+if DETECTION_SERVICE:
+    MODEL_WEIGHTS['YOLO'] = (DETECTION_SERVICE, 'service')
 
 def get_person_coordinates(frame):
-    results = model.predict(frame, verbose=False)
-    a = results[0].boxes.data.detach().cpu()
-    px = pd.DataFrame(a).astype("float")
-
-    person_coords = []
-    for _, row in px.iterrows():
-        x1, y1, x2, y2 = row[0], row[1], row[2], row[3]
-        class_id = int(row[5])
-        if class_list[class_id] == 'person':
-            person_coords.append([x1, y1, x2, y2])
-    return person_coords
+    boxes, _ = model_manager.get(*MODEL_WEIGHTS['YOLO']).detect(frame)
+    return boxes
+
+class LatestFrameSignal(QObject):
+    """
+    Hands the newest frame and counts from the worker thread to the UI thread.
+
+    At most one `updated` signal is queued at a time: publishing while the UI has not
+    taken the previous payload replaces it, so a slow UI only ever renders the newest frame.
+    """
+    updated = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._pending = False
+
+    def publish(self, **payload):
+        with self._lock:
+            self._latest = payload
+            if self._pending:
+                return
+            self._pending = True
+        self.updated.emit()
+
+    def take(self):
+        with self._lock:
+            payload, self._latest = self._latest, None
+            self._pending = False
+        return payload
 
 class VideoCountWorker(QRunnable):
     def __init__(self, main_window_instance):
@@ -41,124 +74,187 @@ class VideoCountWorker(QRunnable):
         self._is_running = False
         self._is_paused = False
 
-        self.cap = None
+        # Pause blocks the worker on this condition until resume or stop
+        self._state_changed = threading.Condition()
 
-        if self.main_window_instance.stream_mode == 'file' and self.main_window_instance.video_path:
-            self.cap = cv2.VideoCapture(self.main_window_instance.video_path)
-        elif self.main_window_instance.stream_mode == 'camera':
-            if self.cap is not None: # realease any previously opened camera
-                self.cap.release()
-            self.cap = cv2.VideoCapture(self.main_window_instance.camera_index)
+        # Created on the UI thread, so its connected slots run there (queued)
+        self.signals = LatestFrameSignal()
+
+        self.cap = None
+        self.seeker = None # reads, seeks and caches the (downscaled) frames of self.cap
+        index = self.open_stream()
         self.frame = None
 
 
         # For the slider
-        if self.main_window_instance.stream_mode == 'file':
-            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if index is not None:
+            self.total_frames = index.frame_count
         else:
             self.total_frames = 0
 
 
+    def open_stream(self):
+        # Opens the capture and its seeker; returns the seek index of a file, else None
+        index = None
+        if self.main_window_instance.stream_mode == 'file' and self.main_window_instance.video_path:
+            self.cap = cv2.VideoCapture(self.main_window_instance.video_path)
+            # Keyframe index, built on the first open of the file and stored next to it
+            index = SeekIndex.load(self.main_window_instance.video_path)
+            self.seeker = FrameSeeker(self.cap, index)
+        elif self.main_window_instance.stream_mode == 'camera':
+            self.cap = cv2.VideoCapture(self.main_window_instance.camera_index)
+            self.seeker = FrameSeeker(self.cap, cache=FrameCache(max_bytes=0)) # nothing to seek back to
+        return index
+
+    def release_stream(self):
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = None
+        self.seeker = None
+
     @Slot()
     def run(self):
         """
         Counts the number of people and draws rectangles around them.
         """
-        start_time = time.time()
-        
         fps = 0
         totalFrames = 0
 
+        self.require_seeker()
         self._is_running = True
+
+        # Wait for the model, usually already loaded and warmed up since the window opened.
+        # A failed load is dropped by the model manager, so the next Play loads it again
+        try:
+            handle = self.main_window_instance.model_handle = model_manager.preload(
+                *MODEL_WEIGHTS[self.main_window_instance.model_name])
+            model = handle.result()
+        except Exception as e:
+            self._is_running = False
+            self.release_stream()
+            self.signals.publish(error="failed: %s" % e)
+            return
+        model_load = "%.2f s + %.2f s" % (handle.load_seconds or 0, handle.warmup_seconds or 0)
+        cached = self.open_detection_cache()
+        start_time = time.time()
+
         while self._is_running:
-            ret, self.frame = self.cap.read()
-            if not ret:
+            # Resized to 500x280 by the seeker
+            frame_number, self.frame = self.seeker.read()
+            if self.frame is None:
                 break
+            if self.main_window_instance.model_name == 'CSRNet':
+                # Density map: the count is the sum of the map, drawn as a heatmap
+                count, density = model.estimate(self.frame)
+                self.frame = render_heatmap(self.frame, density)
+                people_count = int(round(count))
+            else:
+                # Frames counted before (earlier runs, or before seeking back) come from the cache
+                detections = cached.get(frame_number) if cached is not None else None
+                if detections is None:
+                    detections = model.detect(self.frame)
+                    if cached is not None:
+                        cached.put(frame_number, *detections)
+                person_coords, _ = detections
+
+                # Draw rectangles and count people, on a copy: the seeker's frames are its cached ones
+                self.frame = self.frame.copy()
+                for bbox in person_coords:
+                    x1, y1, x2, y2 = map(int, bbox)
+                    cv2.rectangle(self.frame, (x1, y1), (x2, y2), (0, 255, 0), 1)
+                people_count = len(person_coords)
 
-            self.frame = cv2.resize(self.frame, (500, 280))
-            person_coords = get_person_coordinates(self.frame)
-
-            # Draw rectangles and count people
-            for bbox in person_coords:
-                x1, y1, x2, y2 = map(int, bbox)
-                cv2.rectangle(self.frame, (x1, y1), (x2, y2), (0, 255, 0), 1)
-            
             # Display the count on the frame
-            people_count = len(person_coords)
             cv2.putText(self.frame, f"Total People: {people_count}", (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
 
-            # GUI update
-            self.main_window_instance.current_count_label.setText("%d" % people_count)
-
-            # Display the frame
-            self.display_frame(self.frame)
-
             totalFrames += 1
             num_seconds_till_now = time.time() - start_time
             fps = totalFrames / num_seconds_till_now
-            self.main_window_instance.fps_label.setText("%.2f" % fps)
 
-            while(self._is_paused):
-                pass
+            # GUI update, done by the UI thread
+            self.display_frame(self.frame, count=people_count, fps=fps, model_load=model_load)
 
-        self.cap.release()
+            # Sleep while paused; pause time does not count towards the FPS
+            with self._state_changed:
+                if self._is_paused:
+                    paused_at = time.time()
+                    while self._is_paused and self._is_running:
+                        self._state_changed.wait()
+                    start_time += time.time() - paused_at
+
+        self._is_running = False
+        self.release_stream()
+        if cached is not None:
+            cached.close()
         cv2.destroyAllWindows()
+
+    def require_seeker(self):
+        # Reopens the stream released by the end of a run or a failed model load;
+        # file mode without a file (or an unknown mode) has nothing to read or seek in
+        if self.seeker is None:
+            self.open_stream()
+        if self.seeker is None:
+            raise RuntimeError("no video to read: stream mode %r needs a video path or a camera"
+                               % self.main_window_instance.stream_mode)
+
+    def open_detection_cache(self):
+        # Detections of video files are cached on disk; camera frames never come back
+        weights, backend = MODEL_WEIGHTS[self.main_window_instance.model_name]
+        if self.main_window_instance.stream_mode != 'file' or backend != 'yolo':
+            return None
+        return DetectionCache().open(self.main_window_instance.video_path, weights, (500, 280))
     
     def stop(self):
-        self._is_running = False
+        with self._state_changed:
+            self._is_running = False
+            self._state_changed.notify_all()
 
     def pause(self):
-        self._is_paused = True
+        with self._state_changed:
+            self._is_paused = True
 
     def resume(self):
-        self._is_paused = False
+        with self._state_changed:
+            self._is_paused = False
+            self._state_changed.notify_all()
 
 
-    def display_frame(self, frame):
-        # Convert frame to QImage and display it
-        label_size = self.main_window_instance.stream_display.size()
-        label_width, label_height = label_size.width(), label_size.height()
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_resized = cv2.resize(frame, (label_width, label_height))
-        h, w, ch = frame_resized.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(frame_resized.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        self.main_window_instance.stream_display.setPixmap(QPixmap.fromImage(qt_image))
-
-        # Update the slider position
-        current_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-        self.update_slider(current_frame)
+    def display_frame(self, frame, **results):
+        # Safe to call from any thread: the frame is drawn by the UI thread,
+        # see CrowdCountingWindow.show_latest_frame
+        self.signals.publish(frame=frame, position=self.seeker.position, **results)
 
     def slider_released(self):
         self.seek_video(self.main_window_instance.slider.value())
 
     
     def seek_video(self, frame_number):
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, self.frame = self.cap.read()
-        if ret:
+        # Served from the frame cache, or decoded from the keyframe before it;
+        # the counting continues from the next frame
+        self.require_seeker()
+        self.frame = self.seeker.frame_at(frame_number)
+        if self.frame is not None:
             self.display_frame(self.frame)
     
     def display_first_frame(self):
-        # Capture the first frame
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        ret, self.frame = self.cap.read()
-        if ret:
-            self.display_frame(self.frame)
-        # Reset the frames again
-        if self.main_window_instance.stream_mode == 'file': # when reading from a file, readjust the frame progress
-            self.cap.release()  # Release the current capture
-            self.cap = cv2.VideoCapture(self.main_window_instance.video_path)
-    
-    def update_slider(self, frame_number):
-        self.main_window_instance.slider.setValue(frame_number)
+        if self.main_window_instance.stream_mode == 'file':
+            self.seek_video(0)
+        else: # a camera cannot go back, show its current frame
+            self.require_seeker()
+            _, self.frame = self.seeker.read()
+            if self.frame is not None:
+                self.display_frame(self.frame)
 
 
 class CrowdCountingWindow(QWidget):
-    def __init__(self, stream_mode = 'file', video_path = None, camera_index = 0):
+    def __init__(self, stream_mode = 'file', video_path = None, camera_index = 0, model_name = 'YOLO'):
         super().__init__()
 
         self.setWindowTitle("Crowd Counting")
+        self.model_name = model_name # 'YOLO' (detection boxes) or 'CSRNet' (density map)
+
+        # Start loading (and warming up) the model while the window is set up
+        self.model_handle = model_manager.preload(*MODEL_WEIGHTS[model_name])
 
         # For video counter
         self.video_path = video_path
@@ -174,8 +270,7 @@ class CrowdCountingWindow(QWidget):
         
         # Main stream Display Area
         stream_layout = QVBoxLayout()
-        self.stream_display = QLabel()
-        self.stream_display.setStyleSheet("background-color: black;")
+        self.stream_display = FrameView()
         self.stream_display.setMinimumSize(800, 600)
         stream_layout.addWidget(self.stream_display)
 
@@ -191,6 +286,16 @@ class CrowdCountingWindow(QWidget):
         
         self.slider.sliderReleased.connect(self.video_counter_thread.slider_released)
 
+        # Frames and results arrive from the worker through a coalescing, queued signal
+        self.video_counter_thread.signals.updated.connect(self.show_latest_frame, Qt.QueuedConnection)
+
+        # The slider follows the playback position a few times per second, not per frame
+        self.frame_position = 0
+        self.slider_timer = QTimer(self)
+        self.slider_timer.setInterval(250)
+        self.slider_timer.timeout.connect(self.update_slider)
+        self.slider_timer.start()
+
         play_pause_stop_layout = QHBoxLayout()
         self.start_button = QPushButton()
         self.start_button.setIcon(QIcon('gui/icons/play.png'))
@@ -275,9 +380,11 @@ class CrowdCountingWindow(QWidget):
         self.current_count_label = QLabel("0")
         self.fps_label = QLabel("0")
         self.result3_label = QLabel("0")
+        self.model_load_label = QLabel("loading..")
         
         results_layout.addRow("Current Count:", self.current_count_label)
         results_layout.addRow("Approx. FPS:", self.fps_label)
+        results_layout.addRow("Model load + warm-up:", self.model_load_label)
         
         side_panel_layout.addWidget(results_group)
         
@@ -323,6 +430,28 @@ class CrowdCountingWindow(QWidget):
 
         
 
+    @Slot()
+    def show_latest_frame(self):
+        results = self.video_counter_thread.signals.take()
+        if results is None:
+            return
+        if 'error' in results: # the model could not be loaded
+            self.model_load_label.setText(results['error'])
+            return
+
+        # The view wraps the BGR frame as is and scales it when painting
+        self.stream_display.set_frame(results['frame'])
+        self.frame_position = results['position']
+
+        if 'count' in results:
+            self.current_count_label.setText("%d" % results['count'])
+            self.fps_label.setText("%.2f" % results['fps'])
+            self.model_load_label.setText(results['model_load'])
+
+    def update_slider(self):
+        if not self.slider.isSliderDown() and self.slider.value() != self.frame_position:
+            self.slider.setValue(self.frame_position)
+
     def play_clicked(self):
         if self.video_counter_thread._is_paused: # When there is an active thread already and paused
             self.video_counter_thread.resume()
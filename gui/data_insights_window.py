@@ -1,8 +1,154 @@
-from PySide6.QtWidgets import (QWidget)
+import sys
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QLabel)
+from PySide6.QtGui import QPainter, QPen, QColor, QPolygonF
+from PySide6.QtCore import Qt, QPointF, QRectF
+
+import os
+import time
+
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from video.rollups import RollupStore
+
+# (label, seconds before the latest data), None for everything
+TIME_RANGES = [("Last hour", 3600), ("Last day", 86400), ("Last week", 7 * 86400),
+               ("Last month", 30 * 86400), ("All", None)]
+
+class RollupChart(QWidget):
+    """
+    Plots a rollup query: the mean people count as a line, entries and exits as bars.
+
+    The query returns at most one bucket per pixel, so painting stays cheap
+    whatever the time range.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(800, 400)
+        self.result = None
+        self.start = 0
+        self.end = 1
+
+    def set_data(self, result, start, end):
+        self.result = result
+        self.start = start
+        self.end = max(end, start + 1)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#202124"))
+        margin = 40
+        plot = QRectF(margin, 10, self.width() - 2 * margin, self.height() - 40)
+        painter.setPen(QPen(QColor("#606060")))
+        painter.drawRect(plot)
+
+        if self.result is None or len(self.result['start']) == 0:
+            painter.drawText(plot, Qt.AlignCenter, "No data")
+            painter.end()
+            return
+
+        starts = self.result['start']
+        x_scale = plot.width() / (self.end - self.start)
+        bar_width = max(1.0, self.result['bucket_seconds'] * x_scale - 1)
+
+        # Crossings in the lower third, entries up and exits down from its middle
+        crossings = max(int(self.result['enter'].max()), int(self.result['exit'].max()), 1)
+        axis = plot.bottom() - plot.height() / 6
+        bar_scale = plot.height() / 6 / crossings
+        for x_value, enter, exit in zip(starts, self.result['enter'], self.result['exit']):
+            x = plot.left() + (x_value - self.start) * x_scale
+            if enter:
+                painter.fillRect(QRectF(x, axis - enter * bar_scale, bar_width, enter * bar_scale), QColor("#3498db"))
+            if exit:
+                painter.fillRect(QRectF(x, axis, bar_width, exit * bar_scale), QColor("#f26d21"))
+
+        # Mean people count in the upper two thirds
+        people = self.result['mean_people']
+        top = max(float(people.max()), 1.0)
+        line_height = plot.height() * 2 / 3 - 10
+        points = QPolygonF([QPointF(plot.left() + (x_value - self.start + self.result['bucket_seconds'] / 2) * x_scale,
+                                    plot.top() + 10 + line_height * (1 - value / top))
+                            for x_value, value in zip(starts, people)])
+        painter.setPen(QPen(QColor("#2ecc71"), 2))
+        painter.drawPolyline(points)
+
+        painter.setPen(QPen(QColor("#B0B0B0")))
+        painter.drawText(QRectF(0, plot.top(), margin - 4, 20), Qt.AlignRight, "%.1f" % top)
+        painter.drawText(QRectF(0, axis - 10, margin - 4, 20), Qt.AlignRight, "%d" % crossings)
+        time_format = "%Y-%m-%d %H:%M"
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 5, 200, 20), Qt.AlignLeft,
+                         time.strftime(time_format, time.localtime(self.start)))
+        painter.drawText(QRectF(plot.right() - 200, plot.bottom() + 5, 200, 20), Qt.AlignRight,
+                         time.strftime(time_format, time.localtime(self.end)))
+        painter.end()
 
 
 class DataInsightsWindow(QWidget):
-    def __init__(self):
+    def __init__(self, store_directory='cache/insights'):
         super().__init__()
-        
-        self.setWindowTitle("Data Insights")
\ No newline at end of file
+
+        self.setWindowTitle("Data Insights")
+
+        # Rollups of the runs logged with --event-log --insights (see video/rollups.py)
+        self.store = RollupStore(store_directory)
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+
+        self.range_combo = QComboBox()
+        for label, _ in TIME_RANGES:
+            self.range_combo.addItem(label)
+        self.range_combo.setCurrentIndex(3) # Last month
+        self.range_combo.currentIndexChanged.connect(self.update_view)
+        controls.addWidget(self.range_combo)
+
+        # Runs added since the window opened show up on refresh
+        self.refresh_button = QPushButton("Refresh")
+        self.refresh_button.clicked.connect(self.update_view)
+        controls.addWidget(self.refresh_button)
+
+        self.info_label = QLabel()
+        controls.addWidget(self.info_label)
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        legend = QLabel("<span style='color:#2ecc71'>mean people</span> &nbsp; "
+                        "<span style='color:#3498db'>entries</span> &nbsp; "
+                        "<span style='color:#f26d21'>exits</span>")
+        layout.addWidget(legend)
+
+        self.chart = RollupChart()
+        layout.addWidget(self.chart)
+
+        self.resize(1000, 500)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_view()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # The width decides the resolution of the query
+        if self.isVisible():
+            self.update_view()
+
+    def update_view(self):
+        started = time.perf_counter()
+        time_range = self.store.time_range()
+        if time_range is None:
+            self.chart.set_data(None, 0, 1)
+            self.info_label.setText("No runs yet: count a video with --event-log DIR --insights %s" % self.store.directory)
+            return
+
+        first, last = time_range
+        span = TIME_RANGES[self.range_combo.currentIndex()][1]
+        start = first if span is None else max(first, last - span)
+        result = self.store.query(start, last, width=max(self.chart.width() - 80, 1))
+        self.chart.set_data(result, start, last)
+
+        self.info_label.setText("%d %s buckets, %.1f ms" % (len(result['start']), result['resolution'],
+                                                            (time.perf_counter() - started) * 1e3))
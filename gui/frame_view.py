@@ -0,0 +1,78 @@
+import time
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtCore import Qt, QRect, QTimer
+
+
+class FrameView(QWidget):
+    """
+    Displays OpenCV frames without converting or copying them.
+
+    The BGR buffer is wrapped as a QImage (Format_BGR888) and scaled by the painter
+    when the widget is painted, keeping its aspect ratio. New frames only schedule a
+    repaint, at most once per display refresh and only while the widget is visible;
+    frames arriving in between replace the pending one.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)  # paintEvent fills the whole widget
+
+        self._frame = None  # keeps the buffer wrapped by self._image alive
+        self._image = None
+        self._dirty = False
+        self._last_paint = 0.0
+
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.timeout.connect(self.update)
+
+        # Number of frames received and painted, to check the throttling
+        self.frames_received = 0
+        self.frames_painted = 0
+
+    def refresh_interval(self):
+        # Milliseconds between two refreshes of the screen showing the widget
+        screen = self.screen()
+        rate = screen.refreshRate() if screen is not None else 60.0
+        return 1000.0 / max(rate, 1.0)
+
+    def set_frame(self, frame):
+        """
+        Shows a BGR frame (H, W, 3) uint8 array; the array must not be modified afterwards.
+        """
+        if not frame.flags['C_CONTIGUOUS']:
+            frame = frame.copy()
+        height, width = frame.shape[:2]
+        self._frame = frame
+        self._image = QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888)
+        self.frames_received += 1
+        self._dirty = True
+        self._schedule_repaint()
+
+    def _schedule_repaint(self):
+        if not self.isVisible() or self._repaint_timer.isActive():
+            return
+        elapsed = (time.perf_counter() - self._last_paint) * 1000.0
+        self._repaint_timer.start(max(0, int(self.refresh_interval() - elapsed)))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._dirty:
+            self._schedule_repaint()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self._image is not None:
+            target = self._image.size().scaled(self.size(), Qt.KeepAspectRatio)
+            x = (self.width() - target.width()) // 2
+            y = (self.height() - target.height()) // 2
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(QRect(x, y, target.width(), target.height()), self._image)
+        painter.end()
+
+        self._dirty = False
+        self._last_paint = time.perf_counter()
+        self.frames_painted += 1
@@ -5,12 +5,13 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PySide6.QtGui import QIcon, QAction, QFont
 from PySide6.QtCore import QSize, Qt
 
-from crowd_counting_window import CrowdCountingWindow
-from model_comparison_window import ModelComparisonWindow
-from data_insights_window import DataInsightsWindow
-from settings_window import SettingsWindow
 import qdarktheme
-import cv2
+
+from camera_discovery import CameraDiscovery
+
+# The feature windows, OpenCV and the ML code are imported when first needed,
+# so that the dashboard appears without loading them (see benchmarks/bench_gui_startup.py);
+# the counting window starts loading its model in the background when it opens
 
 class FixedWidthSpacer(QWidget):
     def __init__(self, width=5):
@@ -154,10 +155,14 @@ class CrowdCountingPushButton(QWidget):
 
         self.camera_combo = QComboBox()
         self.camera_combo.currentIndexChanged.connect(self.currentIndexChanged_camera_combo)
-        # self.camera_combo.addItems(["0", "1", "2"])
         self.camera_combo.hide()
         dropdown_widget_layout.addWidget(self.camera_combo)
 
+        # Cameras are probed in the background and added to the combo as they are found
+        self.camera_discovery = CameraDiscovery(parent=self)
+        self.camera_discovery.found.connect(self.add_camera)
+        self.camera_discovery.finished.connect(self.cameras_discovered)
+
 
         self.video_radio = QRadioButton("Video/Image Input")
         self.video_radio.toggled.connect(self.toggle_video_radio)
@@ -195,14 +200,16 @@ class CrowdCountingPushButton(QWidget):
 
     def toggle_camera_radio(self):
         if self.camera_radio.isChecked():
-            self.detect_cameras()
+            if self.camera_combo.count() == 0:
+                self.camera_combo.setPlaceholderText("Searching for cameras..")
+            self.camera_discovery.discover()
             self.camera_combo.show()
             self.selected_stream_mode = 'camera'
         else:
             self.camera_combo.hide()
     
     def currentIndexChanged_camera_combo(self):
-        self.select_camera_index = self.camera_combo.currentIndex()
+        self.select_camera_index = self.camera_combo.currentData()
     
     def toggle_video_radio(self):
         if self.video_radio.isChecked():
@@ -217,33 +224,44 @@ class CrowdCountingPushButton(QWidget):
             self.video_path = file_path
     
     def start_crowd_counting(self):
-        if self.selected_stream_mode == 'camera':
-            self.crowd_counting_window = CrowdCountingWindow(stream_mode='camera', camera_index=self.select_camera_index)
+        from crowd_counting_window import CrowdCountingWindow
+
+        model_name = self.model_combo.currentText()
+        if model_name not in ('YOLO', 'CSRNet'):
+            QMessageBox.warning(self, 'Warning', f'{model_name} is not available yet!')
+        elif self.selected_stream_mode == 'camera':
+            if self.select_camera_index is None:
+                QMessageBox.warning(self, 'Warning', 'No camera selected!')
+                return
+            self.crowd_counting_window = CrowdCountingWindow(stream_mode='camera', camera_index=self.select_camera_index,
+                                                             model_name=model_name)
             self.crowd_counting_window.show()
         elif self.selected_stream_mode == 'file':
                 if self.video_path:
-                    self.crowd_counting_window = CrowdCountingWindow(stream_mode='file', video_path=self.video_path)
+                    self.crowd_counting_window = CrowdCountingWindow(stream_mode='file', video_path=self.video_path,
+                                                                     model_name=model_name)
                     self.crowd_counting_window.show()
                 else:
                     QMessageBox.warning(self, 'Warning', 'Video/Image file not selected!')
         else:
             QMessageBox.warning(self, 'Warning', 'Input source not selected!')
 
-    def detect_cameras(self):
-        index = 0
-        available_cameras = []
-        
-        # Try opening cameras in increasing order of index
-        while True:
-            cap = cv2.VideoCapture(index)
-            if not cap.isOpened():
-                break
-            available_cameras.append(f"Camera {index}")
-            cap.release()
-            index += 1
-        
-        # Populate the combo box
-        self.camera_combo.addItems(available_cameras)
+    def add_camera(self, index):
+        # Keeps the combo sorted by camera index, each camera once
+        if self.camera_combo.findData(index) != -1:
+            return
+        position = 0
+        while position < self.camera_combo.count() and self.camera_combo.itemData(position) < index:
+            position += 1
+        self.camera_combo.insertItem(position, f"Camera {index}", index)
+
+    def cameras_discovered(self, cameras):
+        # Drop the cameras that were unplugged since the previous scan
+        for position in reversed(range(self.camera_combo.count())):
+            if self.camera_combo.itemData(position) not in cameras:
+                self.camera_combo.removeItem(position)
+        if not cameras:
+            self.camera_combo.setPlaceholderText("No camera found")
 
 class DashboardWindow(QMainWindow):
     def __init__(self):
@@ -380,14 +398,17 @@ class DashboardWindow(QMainWindow):
 
     
     def start_model_comparison(self):
+        from model_comparison_window import ModelComparisonWindow
         self.model_comparison_window = ModelComparisonWindow()
         self.model_comparison_window.show()
 
     def start_data_insights(self):
+        from data_insights_window import DataInsightsWindow
         self.data_insights_window = DataInsightsWindow()
         self.data_insights_window.show()
 
     def start_settings(self):
+        from settings_window import SettingsWindow
         self.settings_window = SettingsWindow()
         self.settings_window.show()
 
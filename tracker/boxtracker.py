@@ -0,0 +1,99 @@
+# import the necessary packages
+import warnings
+import numpy as np
+import cv2
+
+class DlibBoxTracker:
+	def __init__(self):
+		# one dlib correlation tracker per tracked box
+		self.trackers = []
+
+	def start(self, frame, boxes):
+		# dlib is only needed by this tracker, import it on demand
+		import dlib
+
+		# construct a dlib rectangle object from each bounding box and
+		# start one correlation tracker per box
+		self.trackers = []
+		for (x1, y1, x2, y2) in boxes:
+			tracker = dlib.correlation_tracker()
+			rect = dlib.rectangle(int(x1), int(y1), int(x2), int(y2))
+			tracker.start_track(frame, rect)
+			self.trackers.append(tracker)
+
+	def update(self, frame):
+		# update every tracker and grab the updated positions
+		rects = []
+		for tracker in self.trackers:
+			tracker.update(frame)
+			pos = tracker.get_position()
+			startX = int(pos.left())
+			startY = int(pos.top())
+			endX = int(pos.right())
+			endY = int(pos.bottom())
+			rects.append((startX, startY, endX, endY))
+
+		return rects
+
+class FlowBoxTracker:
+	def __init__(self, pointsPerSide=3, winSize=(15, 15), maxLevel=2):
+		# store the number of keypoints sampled along each side of a
+		# box along with the pyramidal Lucas-Kanade parameters
+		self.pointsPerSide = pointsPerSide
+		self.winSize = winSize
+		self.maxLevel = maxLevel
+
+		# relative positions of the keypoints inside a box, restricted
+		# to the inner part of the box to avoid sampling background
+		f = np.linspace(0.25, 0.75, pointsPerSide, dtype=np.float32)
+		fx, fy = np.meshgrid(f, f)
+		self.offsets = np.stack([fx.ravel(), fy.ravel()], axis=1)
+
+		self.boxes = np.zeros((0, 4), dtype=np.float32)
+		self.prevGray = None
+
+	def _points(self):
+		# sample the keypoints of every box at once, the result has
+		# shape (numBoxes * pointsPerBox, 1, 2) as expected by OpenCV
+		origin = self.boxes[:, None, :2]
+		size = self.boxes[:, None, 2:] - self.boxes[:, None, :2]
+		points = origin + self.offsets[None, :, :] * size
+		return points.reshape(-1, 1, 2).astype(np.float32)
+
+	def start(self, frame, boxes):
+		self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+		self.prevGray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+	def update(self, frame):
+		gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+		if len(self.boxes) == 0:
+			self.prevGray = gray
+			return []
+
+		# move every keypoint of every box with a single pyramidal
+		# Lucas-Kanade call
+		points = self._points()
+		nextPoints, status, _ = cv2.calcOpticalFlowPyrLK(self.prevGray,
+			gray, points, None, winSize=self.winSize, maxLevel=self.maxLevel)
+
+		# shift each box by the median displacement of its tracked
+		# keypoints; boxes that lost all of their keypoints stay put
+		pointsPerBox = len(self.offsets)
+		displacement = (nextPoints - points).reshape(-1, pointsPerBox, 2)
+		displacement[status.reshape(-1, pointsPerBox) == 0] = np.nan
+		with warnings.catch_warnings():
+			warnings.simplefilter("ignore", RuntimeWarning)
+			shift = np.nanmedian(displacement, axis=1)
+		shift = np.nan_to_num(shift)
+		self.boxes += np.hstack([shift, shift])
+		self.prevGray = gray
+
+		return np.rint(self.boxes).astype("int")
+
+def create_box_tracker(name="dlib"):
+	# build the box tracker used between two detections
+	if name == "dlib":
+		return DlibBoxTracker()
+	if name == "flow":
+		return FlowBoxTracker()
+	raise ValueError("unknown box tracker: {}".format(name))
@@ -1,17 +1,15 @@
 # import the necessary packages
-from scipy.spatial import distance as dist
+from tracker.matching import match_centroids
+from tracker.trackstore import TrackStore
 from collections import OrderedDict
 import numpy as np
 
 class CentroidTracker:
-	def __init__(self, maxDisappeared=50, maxDistance=50):
-		# initialize the next unique object ID along with two ordered
-		# dictionaries used to keep track of mapping a given object
-		# ID to its centroid and number of consecutive frames it has
-		# been marked as "disappeared", respectively
-		self.nextObjectID = 0
-		self.objects = OrderedDict()
-		self.disappeared = OrderedDict()
+	def __init__(self, maxDisappeared=50, maxDistance=50, matcher="greedy"):
+		# initialize the array-backed store holding, per tracked object,
+		# its unique ID, its centroid, the number of consecutive frames
+		# it has been marked as "disappeared" and its counted flag
+		self.store = TrackStore()
 
 		# store the number of maximum consecutive frames a given
 		# object is allowed to be marked as "disappeared" until we
@@ -23,141 +21,118 @@ class CentroidTracker:
 		# distance we'll start to mark the object as "disappeared"
 		self.maxDistance = maxDistance
 
+		# store the engine used to match existing objects to the new
+		# centroids: "greedy" (gated by a spatial index), "dense" (full
+		# distance matrix) or "hungarian" (optimal assignment)
+		self.matcher = matcher
+
+		# IDs deregistered during the last update, so that callers can
+		# drop the state they keep for those objects
+		self.deregistered = []
+
+	@property
+	def nextObjectID(self):
+		return self.store.nextObjectID
+
+	@property
+	def objects(self):
+		# mapping of object ID to centroid, in registration order; it
+		# is built on demand, use `updateArrays` in per-frame code
+		slots = self.store.activeSlots()
+		return OrderedDict(zip(self.store.ids[slots].tolist(),
+			self.store.centroids[slots]))
+
+	@property
+	def disappeared(self):
+		slots = self.store.activeSlots()
+		return OrderedDict(zip(self.store.ids[slots].tolist(),
+			self.store.disappeared[slots].tolist()))
+
 	def register(self, centroid):
 		# when registering an object we use the next available object
 		# ID to store the centroid
-		self.objects[self.nextObjectID] = centroid
-		self.disappeared[self.nextObjectID] = 0
-		self.nextObjectID += 1
+		return self.store.register([centroid])[0]
 
 	def deregister(self, objectID):
-		# to deregister an object ID we delete the object ID from
-		# both of our respective dictionaries
-		del self.objects[objectID]
-		del self.disappeared[objectID]
+		# to deregister an object ID we release its slot in the store
+		self.store.deregister([self.store.slotOf(objectID)])
+		self.deregistered.append(objectID)
+
+	def _markDisappeared(self, slots):
+		# increment the disappeared counter of the given objects and
+		# deregister the ones that have been missing for too long
+		self.store.disappeared[slots] += 1
+		expired = slots[self.store.disappeared[slots] > self.maxDisappeared]
+		if len(expired):
+			self.deregistered.extend(self.store.ids[expired].tolist())
+			self.store.deregister(expired)
+
+	def updateArrays(self, rects):
+		self.deregistered = []
+
+		# grab the slots of the tracked objects in registration order
+		slots = self.store.activeSlots()
 
-	def update(self, rects):
 		# check to see if the list of input bounding box rectangles
 		# is empty
 		if len(rects) == 0:
-			# loop over any existing tracked objects and mark them
-			# as disappeared
-			for objectID in list(self.disappeared.keys()):
-				self.disappeared[objectID] += 1
-
-				# if we have reached a maximum number of consecutive
-				# frames where a given object has been marked as
-				# missing, deregister it
-				if self.disappeared[objectID] > self.maxDisappeared:
-					self.deregister(objectID)
-
-			# return early as there are no centroids or tracking info
-			# to update
-			return self.objects
-
-		# initialize an array of input centroids for the current frame
-		inputCentroids = np.zeros((len(rects), 2), dtype="int")
-
-		# loop over the bounding box rectangles
-		for (i, (startX, startY, endX, endY)) in enumerate(rects):
-			# use the bounding box coordinates to derive the centroid
-			cX = int((startX + endX) / 2.0)
-			cY = int((startY + endY) / 2.0)
-			inputCentroids[i] = (cX, cY)
+			# mark all existing tracked objects as disappeared and
+			# return early as there are no centroids to update
+			self._markDisappeared(slots)
+			return self.store.activeSlots()
+
+		# use the bounding box coordinates to derive the centroids of
+		# the current frame
+		rects = np.asarray(rects, dtype="float").reshape(-1, 4)
+		inputCentroids = ((rects[:, :2] + rects[:, 2:]) / 2.0).astype("int")
 
 		# if we are currently not tracking any objects take the input
 		# centroids and register each of them
-		if len(self.objects) == 0:
-			for i in range(0, len(inputCentroids)):
-				self.register(inputCentroids[i])
+		if len(slots) == 0:
+			self.store.register(inputCentroids)
 
 		# otherwise, are are currently tracking objects so we need to
 		# try to match the input centroids to existing object
 		# centroids
 		else:
-			# grab the set of object IDs and corresponding centroids
-			objectIDs = list(self.objects.keys())
-			objectCentroids = list(self.objects.values())
-
-			# compute the distance between each pair of object
-			# centroids and input centroids, respectively -- our
-			# goal will be to match an input centroid to an existing
-			# object centroid
-			D = dist.cdist(np.array(objectCentroids), inputCentroids)
-
-			# in order to perform this matching we must (1) find the
-			# smallest value in each row and then (2) sort the row
-			# indexes based on their minimum values so that the row
-			# with the smallest value as at the *front* of the index
-			# list
-			rows = D.min(axis=1).argsort()
-
-			# next, we perform a similar process on the columns by
-			# finding the smallest value in each column and then
-			# sorting using the previously computed row index list
-			cols = D.argmin(axis=1)[rows]
-
-			# in order to determine if we need to update, register,
-			# or deregister an object we need to keep track of which
-			# of the rows and column indexes we have already examined
-			usedRows = set()
-			usedCols = set()
-
-			# loop over the combination of the (row, column) index
-			# tuples
-			for (row, col) in zip(rows, cols):
-				# if we have already examined either the row or
-				# column value before, ignore it
-				if row in usedRows or col in usedCols:
-					continue
-
-				# if the distance between centroids is greater than
-				# the maximum distance, do not associate the two
-				# centroids to the same object
-				if D[row, col] > self.maxDistance:
-					continue
-
-				# otherwise, grab the object ID for the current row,
-				# set its new centroid, and reset the disappeared
-				# counter
-				objectID = objectIDs[row]
-				self.objects[objectID] = inputCentroids[col]
-				self.disappeared[objectID] = 0
-
-				# indicate that we have examined each of the row and
-				# column indexes, respectively
-				usedRows.add(row)
-				usedCols.add(col)
-
-			# compute both the row and column index we have NOT yet
-			# examined
-			unusedRows = set(range(0, D.shape[0])).difference(usedRows)
-			unusedCols = set(range(0, D.shape[1])).difference(usedCols)
+			# match the existing object centroids to the input centroids;
+			# only pairs that are at most maxDistance apart are candidates,
+			# so we never build the full distance matrix for large crowds
+			rows, cols = match_centroids(self.store.centroids[slots],
+				inputCentroids, self.maxDistance, self.matcher)
+
+			# set the new centroids of the matched objects and reset
+			# their disappeared counters
+			matched = slots[rows]
+			self.store.centroids[matched] = inputCentroids[cols]
+			self.store.disappeared[matched] = 0
 
 			# in the event that the number of object centroids is
 			# equal or greater than the number of input centroids
 			# we need to check and see if some of these objects have
 			# potentially disappeared
-			if D.shape[0] >= D.shape[1]:
-				# loop over the unused row indexes
-				for row in unusedRows:
-					# grab the object ID for the corresponding row
-					# index and increment the disappeared counter
-					objectID = objectIDs[row]
-					self.disappeared[objectID] += 1
-
-					# check to see if the number of consecutive
-					# frames the object has been marked "disappeared"
-					# for warrants deregistering the object
-					if self.disappeared[objectID] > self.maxDisappeared:
-						self.deregister(objectID)
+			if len(slots) >= len(inputCentroids):
+				unusedRows = np.ones(len(slots), dtype=bool)
+				unusedRows[rows] = False
+				self._markDisappeared(slots[unusedRows])
 
 			# otherwise, if the number of input centroids is greater
 			# than the number of existing object centroids we need to
-			# register each new input centroid as a trackable object
+			# register each new input centroid as a trackable object;
+			# they get their IDs in input order (the former dict-based
+			# tracker used set iteration order and an unstable argsort,
+			# so its matches are the same only up to tie-breaking and
+			# the registration order of new IDs)
 			else:
-				for col in unusedCols:
-					self.register(inputCentroids[col])
+				unusedCols = np.ones(len(inputCentroids), dtype=bool)
+				unusedCols[cols] = False
+				self.store.register(inputCentroids[unusedCols])
 
-		# return the set of trackable objects
+		# return the slots of the tracked objects
+		return self.store.activeSlots()
+
+	def update(self, rects):
+		# update the tracked objects and return them as a mapping of
+		# object ID to centroid
+		self.updateArrays(rects)
 		return self.objects
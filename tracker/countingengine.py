@@ -0,0 +1,170 @@
+# import the necessary packages
+import json
+import numpy as np
+import cv2
+
+# zones are stored as bits of a 64-bit raster mask
+MAX_ZONES = 64
+
+class CountingEngine:
+	def __init__(self, lines=(), zones=()):
+		# each line is a dictionary with a "name", its "start" and "end"
+		# points and optionally the two direction "labels"; crossing
+		# from the side where cross(end - start, p - start) < 0 to the
+		# side where it is > 0 gets the first label -- for a line drawn
+		# from left to right (image y axis pointing down) that is a
+		# downwards crossing, hence the default ("down", "up")
+		self.lineNames = [line["name"] for line in lines]
+		self.lineLabels = [tuple(line.get("labels", ("down", "up"))) for line in lines]
+		self.starts = np.array([line["start"] for line in lines], dtype="float").reshape(-1, 2)
+		self.ends = np.array([line["end"] for line in lines], dtype="float").reshape(-1, 2)
+
+		# each zone is a dictionary with a "name" and a "polygon" given
+		# as a list of (x, y) points
+		if len(zones) > MAX_ZONES:
+			raise ValueError("at most {} zones are supported".format(MAX_ZONES))
+		self.zoneNames = [zone["name"] for zone in zones]
+		self.polygons = [np.array(zone["polygon"], dtype="int32").reshape(-1, 2) for zone in zones]
+		self.zoneMask = None
+
+		# the last centroid seen in each tracker slot, along with the ID
+		# of the object that held the slot, so that slot reuse never
+		# produces a crossing between two different objects
+		self.lastCentroids = np.zeros((0, 2), dtype="float")
+		self.lastIDs = np.zeros(0, dtype="int64")
+
+		# per slot and line, bit 0 (first label) and bit 1 (second
+		# label) mark the directions already counted for the object in
+		# the slot: a track jittering on a line is counted at most once
+		# per direction
+		self.countedBits = np.zeros((0, len(self.lineNames)), dtype="uint8")
+
+		# the number of crossings per (line, label) and the occupancy
+		# of each zone on the last frame
+		self.counts = {(name, label): 0 for (name, labels) in
+			zip(self.lineNames, self.lineLabels) for label in labels}
+		self.occupancy = {name: 0 for name in self.zoneNames}
+
+	@classmethod
+	def fromConfig(cls, path):
+		# load the lines and zones from a JSON file of the form
+		# {"lines": [...], "zones": [...]}
+		with open(path, "r") as configFile:
+			config = json.load(configFile)
+		return cls(config.get("lines", ()), config.get("zones", ()))
+
+	def labelsOf(self, name):
+		# the two direction labels of a line
+		return self.lineLabels[self.lineNames.index(name)]
+
+	def buildZoneMask(self, W, H):
+		# rasterize the zones once: bit k of a pixel is set when the
+		# pixel lies inside zone k, so the occupancy of all zones is a
+		# single lookup per tracked object
+		self.zoneMask = np.zeros((H, W), dtype="uint64")
+		for (k, polygon) in enumerate(self.polygons):
+			inside = np.zeros((H, W), dtype="uint8")
+			cv2.fillPoly(inside, [polygon], 1)
+			self.zoneMask |= inside.astype("uint64") << np.uint64(k)
+
+	def _ensureCapacity(self, size):
+		if size <= len(self.lastIDs):
+			return
+		extra = max(size, 2 * len(self.lastIDs)) - len(self.lastIDs)
+		self.lastCentroids = np.concatenate([self.lastCentroids, np.zeros((extra, 2))])
+		self.lastIDs = np.concatenate([self.lastIDs, np.full(extra, -1, dtype="int64")])
+		self.countedBits = np.concatenate([self.countedBits,
+			np.zeros((extra, len(self.lineNames)), dtype="uint8")])
+
+	def crossings(self, previous, current):
+		# test every (track, line) pair at once: the movement P -> C of
+		# a track crosses the segment A -> B if P and C lie on opposite
+		# sides of AB and A and B lie on opposite sides of PC
+		P = previous[:, None, :]
+		C = current[:, None, :]
+		A = self.starts[None, :, :]
+		B = self.ends[None, :, :]
+
+		def cross(o, a, b):
+			return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - \
+				(a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+		sideP = cross(A, B, P) > 0
+		sideC = cross(A, B, C) > 0
+		sideA = cross(P, C, A) > 0
+		sideB = cross(P, C, B) > 0
+
+		# a centroid lying exactly on the line belongs to its negative
+		# side, so a track touching the line is counted only once
+		crossed = (sideP != sideC) & (sideA != sideB)
+		return crossed, sideC
+
+	def update(self, slots, objectIDs, centroids):
+		# return the (objectID, line, label) crossings of this frame and
+		# refresh the zone occupancy
+		slots = np.asarray(slots, dtype="int64")
+		objectIDs = np.asarray(objectIDs, dtype="int64")
+		centroids = np.asarray(centroids, dtype="float").reshape(-1, 2)
+		events = []
+
+		if len(slots):
+			self._ensureCapacity(int(slots.max()) + 1)
+
+			# only tracks that held the same slot on the previous frame
+			# have a movement to test
+			known = self.lastIDs[slots] == objectIDs
+			self.countedBits[slots[~known]] = 0
+			if len(self.lineNames) and known.any():
+				crossed, positive = self.crossings(self.lastCentroids[slots[known]],
+					centroids[known])
+
+				# drop the crossings in a direction already counted
+				bits = np.where(positive, 1, 2).astype("uint8")
+				knownSlots = slots[known]
+				crossed &= (self.countedBits[knownSlots] & bits) == 0
+				tracks, lines = np.nonzero(crossed)
+				self.countedBits[knownSlots[tracks], lines] |= bits[tracks, lines]
+
+				ids = objectIDs[known]
+				for (t, l) in zip(tracks.tolist(), lines.tolist()):
+					label = self.lineLabels[l][0 if positive[t, l] else 1]
+					self.counts[(self.lineNames[l], label)] += 1
+					events.append((int(ids[t]), self.lineNames[l], label))
+
+			self.lastCentroids[slots] = centroids
+			self.lastIDs[slots] = objectIDs
+
+		if self.zoneNames:
+			self.occupancy = self.zoneOccupancy(centroids)
+
+		return events
+
+	def zoneOccupancy(self, centroids):
+		# count the tracked objects inside each zone with one raster
+		# lookup per object
+		if len(centroids) == 0:
+			return {name: 0 for name in self.zoneNames}
+		H, W = self.zoneMask.shape
+		x = np.clip(centroids[:, 0].astype("int"), 0, W - 1)
+		y = np.clip(centroids[:, 1].astype("int"), 0, H - 1)
+		bits = self.zoneMask[y, x]
+		shifts = np.arange(len(self.zoneNames), dtype="uint64")
+		inside = (bits[:, None] >> shifts[None, :]) & np.uint64(1)
+		return dict(zip(self.zoneNames, inside.sum(axis=0).tolist()))
+
+	def draw(self, frame):
+		# draw the zone outlines and the counting lines with their counts
+		for (name, polygon) in zip(self.zoneNames, self.polygons):
+			cv2.polylines(frame, [polygon], True, (0, 255, 255), 1)
+			x, y = polygon[0]
+			cv2.putText(frame, "{}: {}".format(name, self.occupancy[name]), (int(x) + 5, int(y) + 15),
+				cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
+
+		for (name, labels, start, end) in zip(self.lineNames, self.lineLabels, self.starts, self.ends):
+			start = tuple(int(v) for v in start)
+			end = tuple(int(v) for v in end)
+			cv2.line(frame, start, end, (0, 0, 0), 2)
+			text = "{} {}: {} {}: {}".format(name, labels[0], self.counts[(name, labels[0])],
+				labels[1], self.counts[(name, labels[1])])
+			cv2.putText(frame, text, (start[0] + 5, start[1] - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.4,
+				(0, 0, 0), 1)
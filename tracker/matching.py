@@ -0,0 +1,132 @@
+# import the necessary packages
+from scipy.spatial import distance as dist
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.optimize import linear_sum_assignment
+import numpy as np
+
+# cost of a pair outside the gate when solving the optimal assignment
+_GATED_OUT_COST = 1e9
+
+def candidate_pairs(objectCentroids, inputCentroids, maxDistance):
+	# use a KD-tree over the input centroids to find every (object,
+	# input) pair that is at most maxDistance apart, without building
+	# the full distance matrix
+	objectTree = cKDTree(objectCentroids)
+	inputTree = cKDTree(inputCentroids)
+	pairs = objectTree.sparse_distance_matrix(inputTree,
+		maxDistance * (1 + 1e-9) + 1e-9, output_type="ndarray")
+	rows = pairs["i"].astype("int")
+	cols = pairs["j"].astype("int")
+
+	# recompute the distances the same way cdist does so that the
+	# gated and dense matchers see bit-identical values
+	delta = objectCentroids[rows].astype("float") - inputCentroids[cols]
+	D = np.sqrt((delta ** 2).sum(axis=1))
+	keep = D <= maxDistance
+
+	return rows[keep], cols[keep], D[keep]
+
+def _greedy(rows, cols, D):
+	# for every object, find its closest input centroid -- ties are
+	# broken towards the lowest column index, like argmin does
+	order = np.lexsort((cols, D, rows))
+	rows, cols, D = rows[order], cols[order], D[order]
+	first = np.ones(len(rows), dtype=bool)
+	first[1:] = rows[1:] != rows[:-1]
+	rows, cols, D = rows[first], cols[first], D[first]
+
+	# visit the objects by increasing distance to their closest input
+	# (ties in registration order); an input is claimed by the first
+	# object that reaches it and any later object whose closest input
+	# is taken stays unmatched
+	order = np.lexsort((rows, D))
+	rows, cols = rows[order], cols[order]
+	_, winners = np.unique(cols, return_index=True)
+	winners.sort()
+
+	return rows[winners], cols[winners]
+
+def greedy_match(objectCentroids, inputCentroids, maxDistance, gated=True):
+	# match every object to its closest input centroid, visiting the
+	# objects in order of that distance; with gated=False the full
+	# distance matrix is built, otherwise only the pairs found by the
+	# spatial index are considered -- both give the same matches
+	objectCentroids = np.asarray(objectCentroids)
+	inputCentroids = np.asarray(inputCentroids)
+	if len(objectCentroids) == 0 or len(inputCentroids) == 0:
+		return np.zeros(0, dtype="int"), np.zeros(0, dtype="int")
+
+	if gated:
+		rows, cols, D = candidate_pairs(objectCentroids, inputCentroids,
+			maxDistance)
+	else:
+		full = dist.cdist(objectCentroids, inputCentroids)
+		rows = np.arange(full.shape[0])
+		cols = full.argmin(axis=1)
+		D = full[rows, cols]
+		keep = D <= maxDistance
+		rows, cols, D = rows[keep], cols[keep], D[keep]
+
+	return _greedy(rows, cols, D)
+
+def hungarian_match(objectCentroids, inputCentroids, maxDistance):
+	# find the assignment that matches as many objects as possible
+	# within maxDistance with the smallest total distance; the gated
+	# pairs split into independent connected components that are
+	# solved separately, which keeps each cost matrix small
+	objectCentroids = np.asarray(objectCentroids)
+	inputCentroids = np.asarray(inputCentroids)
+	numRows, numCols = len(objectCentroids), len(inputCentroids)
+	if numRows == 0 or numCols == 0:
+		return np.zeros(0, dtype="int"), np.zeros(0, dtype="int")
+
+	rows, cols, D = candidate_pairs(objectCentroids, inputCentroids,
+		maxDistance)
+	graph = coo_matrix((np.ones(len(rows)), (rows, numRows + cols)),
+		shape=(numRows + numCols, numRows + numCols))
+	_, labels = connected_components(graph, directed=False)
+
+	# an edge whose component has a single object and a single input
+	# is matched directly
+	pairLabels = labels[rows]
+	rowCounts = np.bincount(labels[:numRows], minlength=labels.max() + 1)
+	colCounts = np.bincount(labels[numRows:], minlength=labels.max() + 1)
+	simple = (rowCounts[pairLabels] == 1) & (colCounts[pairLabels] == 1)
+	matchedRows = [rows[simple]]
+	matchedCols = [cols[simple]]
+
+	# solve the remaining components one at a time
+	rows, cols, D, pairLabels = rows[~simple], cols[~simple], D[~simple], pairLabels[~simple]
+	order = np.argsort(pairLabels, kind="stable")
+	rows, cols, D, pairLabels = rows[order], cols[order], D[order], pairLabels[order]
+	bounds = np.flatnonzero(np.diff(pairLabels)) + 1
+	for (r, c, d) in zip(np.split(rows, bounds), np.split(cols, bounds),
+		np.split(D, bounds)):
+		if len(r) == 0:
+			continue
+		uRows, rIdx = np.unique(r, return_inverse=True)
+		uCols, cIdx = np.unique(c, return_inverse=True)
+		cost = np.full((len(uRows), len(uCols)), _GATED_OUT_COST)
+		cost[rIdx, cIdx] = d
+		aRows, aCols = linear_sum_assignment(cost)
+		valid = cost[aRows, aCols] < _GATED_OUT_COST
+		matchedRows.append(uRows[aRows[valid]])
+		matchedCols.append(uCols[aCols[valid]])
+
+	return np.concatenate(matchedRows), np.concatenate(matchedCols)
+
+def match_centroids(objectCentroids, inputCentroids, maxDistance,
+	method="greedy"):
+	# dispatch to the requested matching engine: "greedy" (gated by a
+	# spatial index), "dense" (full distance matrix, same results as
+	# "greedy") or "hungarian" (optimal assignment)
+	if method == "greedy":
+		return greedy_match(objectCentroids, inputCentroids, maxDistance)
+	if method == "dense":
+		return greedy_match(objectCentroids, inputCentroids, maxDistance,
+			gated=False)
+	if method == "hungarian":
+		return hungarian_match(objectCentroids, inputCentroids, maxDistance)
+	raise ValueError("unknown matching method: {}".format(method))
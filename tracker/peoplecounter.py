@@ -0,0 +1,162 @@
+# import the necessary packages
+from tracker.centroidtracker import CentroidTracker
+from tracker.trackableobject import TrackableObject
+from tracker.boxtracker import create_box_tracker
+import cv2
+
+class PeopleCounter:
+	def __init__(self, W, H, maxDisappeared=40, maxDistance=40,
+		tracker="dlib", annotate=True, matcher="greedy", counting=None):
+		# store the frame dimensions used to place the counting line
+		# and whether the boxes, IDs and counts are drawn on the frames
+		self.W = W
+		self.H = H
+		self.annotate = annotate
+
+		# an optional CountingEngine with configured lines and zones,
+		# counted on top of the built-in rule around the middle of the
+		# frame, which alone drives the enter/exit totals
+		self.counting = counting
+
+		# instantiate our centroid tracker, then the box tracker that
+		# follows the detections between two detection frames ("dlib"
+		# correlation trackers or batched "flow"), followed by a
+		# dictionary to map each unique object ID to a TrackableObject
+		self.ct = CentroidTracker(maxDisappeared=maxDisappeared,
+			maxDistance=maxDistance, matcher=matcher)
+		self.boxTracker = create_box_tracker(tracker)
+		self.trackableObjects = {}
+
+		# initialize the total number of frames processed thus far, along
+		# with the total number of objects that have moved either up or down
+		self.totalFrames = 0
+		self.totalDown = 0
+		self.totalUp = 0
+
+		# the number of people boxes (detected or tracked) on the last
+		# frame
+		self.lastCount = 0
+
+		# the net count (in minus out) as of the last counted exit; the
+		# running totals above replace the per-count lists so that the
+		# memory use does not grow over long runs
+		self.total = []
+
+	def update(self, frame, per_corr):
+		# initialize the list of (objectID, line, direction) crossings
+		# counted on this frame
+		events = []
+
+		# initialize the list of bounding box rectangles returned by
+		# either the object detector or the box trackers
+		rects = []
+
+		# check to see if we were given detections for this frame, in
+		# which case they (re)initialize the box trackers; the
+		# caller passes None on tracker-only frames
+		if per_corr is not None:
+			for bbox in per_corr:
+				x1, y1, x2, y2 = bbox
+				rects.append([x1, y1, x2, y2])
+			self.boxTracker.start(frame, rects)
+
+		# otherwise, we should utilize our object *trackers* rather than
+		# object *detectors* to obtain a higher frame processing throughput
+		else:
+			rects = self.boxTracker.update(frame)
+
+		H = self.H
+		self.lastCount = len(rects)
+
+		# use the centroid tracker to associate the old object
+		# centroids with the newly computed object centroids
+		slots = self.ct.updateArrays(rects)
+		store = self.ct.store
+		objectIDs = store.ids[slots].tolist()
+		centroids = store.centroids[slots]
+
+		# with configured lines and zones, the engine tests all tracks
+		# against all lines at once
+		if self.counting is not None:
+			events.extend(self.updateCounting(frame, slots, objectIDs, centroids))
+
+		# loop over the tracked objects
+		for (slot, objectID, centroid) in zip(slots, objectIDs, centroids):
+			to = self.trackableObjects.get(objectID)
+
+			# if there is no existing trackable object, create one
+			if to is None:
+				to = TrackableObject(objectID, centroid)
+				self.trackableObjects[objectID] = to
+
+			# otherwise, use the difference between the y-coordinate of
+			# the current centroid and the mean of previous centroids to
+			# determine the direction the object is moving in
+			else:
+				direction = to.append(centroid)
+
+				# the counted flags live in the tracker's store
+				if not store.counted[slot]:
+					if direction < 0 and centroid[1] < H // 2 - 20:
+						self.totalUp += 1
+						store.counted[slot] = True
+						events.append((objectID, "line", "up"))
+					elif 0 < direction < 1.1 and centroid[1] > 144:
+						self.totalDown += 1
+						store.counted[slot] = True
+						events.append((objectID, "line", "down"))
+
+						self.total = [self.totalDown - self.totalUp]
+
+		# drop the trackable objects of the IDs the centroid tracker
+		# has deregistered, so that long runs do not accumulate them
+		for objectID in self.ct.deregistered:
+			self.trackableObjects.pop(objectID, None)
+
+		if self.annotate:
+			self.draw(frame, rects if per_corr is not None else [], zip(objectIDs, centroids))
+
+		self.totalFrames += 1
+
+		# return the crossings counted on this frame
+		return events
+
+	def updateCounting(self, frame, slots, objectIDs, centroids):
+		# the zone mask is rasterized once, at the size of the frames
+		# the tracker sees
+		if self.counting.zoneMask is None:
+			(H, W) = frame.shape[:2]
+			self.counting.buildZoneMask(W, H)
+
+		# the crossings are counted per line by the engine, the totals
+		# stay those of the built-in rule
+		return self.counting.update(slots, objectIDs, centroids)
+
+	def draw(self, frame, detections, objects):
+		# objects is an iterable of (objectID, centroid) pairs
+		W, H = self.W, self.H
+
+		# draw the boxes of a detection frame and the counting line
+		for (x1, y1, x2, y2) in detections:
+			cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 255), 1)
+		cv2.line(frame, (0, H // 2 - 10), (W, H // 2 - 10), (0, 0, 0), 2)
+
+		# draw both the ID of the object and the centroid of the
+		# object on the output frame
+		for (objectID, centroid) in objects:
+			text = "ID {}".format(objectID)
+			cv2.putText(frame, text, (centroid[0] - 10, centroid[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+				(255, 255, 255), 2)
+			cv2.circle(frame, (centroid[0], centroid[1]), 4, (255, 255, 255), -1)
+
+		if self.counting is not None:
+			self.counting.draw(frame)
+
+		info_status = [
+			("Enter", self.totalUp),
+			("Exit ", self.totalDown),
+		]
+
+		for (i, (k, v)) in enumerate(info_status):
+			text = "{}: {}".format(k, v)
+			cv2.putText(frame, text, (10, H - ((i * 20) + 20)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
@@ -1,10 +1,46 @@
+# import the necessary packages
+import numpy as np
+
 class TrackableObject:
-	def __init__(self, objectID, centroid):
-		# store the object ID, then initialize a list of centroids
-		# using the current centroid
+	# a fixed set of attributes keeps the per-object footprint small
+	__slots__ = ("objectID", "centroids", "numCentroids", "ySum",
+		"direction")
+
+	def __init__(self, objectID, centroid, historySize=32):
+		# store the object ID, then initialize a fixed-size ring buffer
+		# holding the most recent centroids, starting with the current
+		# centroid
 		self.objectID = objectID
-		self.centroids = [centroid]
+		self.centroids = np.zeros((historySize, 2), dtype="int")
+		self.numCentroids = 0
+
+		# keep a running sum of the y-coordinates of *all* centroids so
+		# that the mean and the direction are updated in O(1), no
+		# matter how long the object has been tracked
+		self.ySum = 0.0
+		self.direction = 0.0
+		self.append(centroid)
+
+		# whether the object has already been counted is kept in the
+		# `counted` array of the CentroidTracker's TrackStore
+
+	def append(self, centroid):
+		# the direction is the difference between the y-coordinate of
+		# the new centroid and the mean of the previous centroids
+		if self.numCentroids > 0:
+			self.direction = centroid[1] - self.ySum / self.numCentroids
+
+		# overwrite the oldest centroid once the buffer is full
+		self.centroids[self.numCentroids % len(self.centroids)] = centroid
+		self.numCentroids += 1
+		self.ySum += centroid[1]
+
+		return self.direction
 
-		# initialize a boolean used to indicate if the object has
-		# already been counted or not
-		self.counted = False
\ No newline at end of file
+	def history(self):
+		# return the buffered centroids, oldest first
+		size = len(self.centroids)
+		if self.numCentroids <= size:
+			return self.centroids[:self.numCentroids].copy()
+		start = self.numCentroids % size
+		return np.concatenate([self.centroids[start:], self.centroids[:start]])
@@ -0,0 +1,86 @@
+# import the necessary packages
+import numpy as np
+
+class TrackStore:
+	def __init__(self, capacity=64):
+		# per-track state is kept in contiguous arrays indexed by slot:
+		# the object ID, its last centroid, the number of consecutive
+		# frames it has been missing and whether it has been counted
+		self.ids = np.full(capacity, -1, dtype="int64")
+		self.centroids = np.zeros((capacity, 2), dtype="int")
+		self.disappeared = np.zeros(capacity, dtype="int32")
+		self.counted = np.zeros(capacity, dtype=bool)
+		self.active = np.zeros(capacity, dtype=bool)
+
+		# free slots form a stack so that deregistered slots are reused
+		# before the arrays have to grow
+		self.free = np.arange(capacity - 1, -1, -1, dtype="int64")
+		self.numFree = capacity
+
+		# the next unique object ID
+		self.nextObjectID = 0
+
+	def __len__(self):
+		return len(self.ids) - self.numFree
+
+	def _grow(self, required):
+		# double the capacity until at least `required` slots are free
+		capacity = len(self.ids)
+		newCapacity = capacity
+		while newCapacity - len(self) < required:
+			newCapacity *= 2
+
+		extra = newCapacity - capacity
+		self.ids = np.concatenate([self.ids, np.full(extra, -1, dtype="int64")])
+		self.centroids = np.concatenate([self.centroids, np.zeros((extra, 2), dtype="int")])
+		self.disappeared = np.concatenate([self.disappeared, np.zeros(extra, dtype="int32")])
+		self.counted = np.concatenate([self.counted, np.zeros(extra, dtype=bool)])
+		self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+
+		# the new slots go below the existing free slots on the stack
+		newSlots = np.arange(newCapacity - 1, capacity - 1, -1, dtype="int64")
+		free = np.empty(newCapacity, dtype="int64")
+		free[:extra] = newSlots
+		free[extra:extra + self.numFree] = self.free[:self.numFree]
+		self.free = free
+		self.numFree += extra
+
+	def register(self, centroids):
+		# register one new object per centroid, handing out consecutive
+		# object IDs in input order, and return their slots
+		centroids = np.asarray(centroids).reshape(-1, 2)
+		count = len(centroids)
+		if count > self.numFree:
+			self._grow(count)
+
+		# pop the slots from the top of the free stack
+		slots = self.free[self.numFree - count:self.numFree][::-1].copy()
+		self.numFree -= count
+
+		self.ids[slots] = np.arange(self.nextObjectID, self.nextObjectID + count)
+		self.centroids[slots] = centroids
+		self.disappeared[slots] = 0
+		self.counted[slots] = False
+		self.active[slots] = True
+		self.nextObjectID += count
+
+		return slots
+
+	def deregister(self, slots):
+		# release the slots and push them back onto the free stack
+		slots = np.asarray(slots, dtype="int64")
+		self.active[slots] = False
+		self.ids[slots] = -1
+		self.free[self.numFree:self.numFree + len(slots)] = slots
+		self.numFree += len(slots)
+
+	def activeSlots(self):
+		# return the slots of all tracked objects, ordered by object ID
+		# (i.e. registration order)
+		slots = np.flatnonzero(self.active)
+		return slots[np.argsort(self.ids[slots], kind="stable")]
+
+	def slotOf(self, objectID):
+		# look up the slot of a single object ID
+		slots = np.flatnonzero(self.ids == objectID)
+		return int(slots[0]) if len(slots) else None
@@ -0,0 +1,239 @@
+import contextlib
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+STAGES = ("decode", "inference", "tracking", "output")
+
+# per-frame table: fixed-width columns, buffered in preallocated arrays
+FRAME_COLUMNS = (
+    ("frame", np.int64),  # index of the frame in the source
+    ("time", np.float64),  # seconds from the start of the source
+    ("people", np.int32),  # people boxes on the frame (detected or tracked)
+    ("detected", np.bool_),  # the detector ran on this frame
+    ("enter", np.int64),  # cumulative counts
+    ("exit", np.int64),
+) + tuple(("{}_ms".format(stage), np.float32) for stage in STAGES)
+
+
+class StageTimer:
+    """
+    Accumulates the time spent in each processing stage, possibly on several threads.
+
+    `take` returns the milliseconds accumulated per stage since its previous call,
+    which the counting loop calls once per frame.
+    """
+
+    def __init__(self, stages=STAGES):
+        self.stages = stages
+        self._seconds = dict.fromkeys(stages, 0.0)
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self._seconds[stage] += seconds
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def iterate(self, stage, iterable):
+        """
+        Yields the items of `iterable`, timing the production of each one.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add(stage, time.perf_counter() - start)
+            yield item
+
+    def take(self):
+        with self._lock:
+            values = [self._seconds[stage] * 1e3 for stage in self.stages]
+            self._seconds = dict.fromkeys(self.stages, 0.0)
+        return values
+
+
+class EventLog:
+    """
+    Streaming columnar log of a counting run.
+
+    Writes two tables to a directory: "frames" (one row per processed frame: the
+    counts and the per-stage timings) and "events" (one row per line crossing:
+    track ID, line, direction, frame and time). Rows are buffered into row groups
+    of `row_group_size` rows; full groups are handed to a writer thread, so the
+    counting loop only fills arrays and memory stays bounded by a few row groups.
+
+    The tables are Parquet files (zstd-compressed), or Arrow IPC files with
+    `format="arrow"`. Needs pyarrow.
+    """
+
+    def __init__(self, directory, format="parquet", row_group_size=65536, metadata=None):
+        """
+        Args:
+            directory: Output directory, created if needed.
+            format: "parquet" or "arrow".
+            row_group_size: Rows per row group (record batch for Arrow).
+            metadata: Dict of strings stored in the schemas, e.g. the source and the model.
+        """
+        import pyarrow as pa
+
+        if format not in ("parquet", "arrow"):
+            raise ValueError("unknown event log format {!r}, expected 'parquet' or 'arrow'".format(format))
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.format = format
+        self.row_group_size = row_group_size
+        self.frames_logged = 0
+        self.events_logged = 0
+
+        metadata = {str(key): str(value) for key, value in (metadata or {}).items()}
+        self.frame_schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in FRAME_COLUMNS],
+                                      metadata=metadata)
+        self.event_schema = pa.schema([
+            ("frame", pa.int64()),
+            ("time", pa.float64()),
+            ("track_id", pa.int64()),
+            # repeated strings, dictionary-encoded by Parquet
+            ("line", pa.string()),
+            ("direction", pa.string()),
+        ], metadata=metadata)
+
+        self._sinks = []
+        self._writers = {
+            "frames": self._open_writer("frames", self.frame_schema),
+            "events": self._open_writer("events", self.event_schema),
+        }
+        self._new_frame_buffers()
+        self._new_event_buffers()
+
+        # at most two row groups wait for the writer; beyond that the counting
+        # loop waits instead of buffering without bound
+        self._queue = queue.Queue(maxsize=2)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_loop, name="event-log", daemon=True)
+        self._thread.start()
+
+    def _open_writer(self, name, schema):
+        import pyarrow as pa
+
+        path = os.path.join(self.directory, "{}.{}".format(name, self.format))
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(path, schema, compression="zstd")
+        sink = pa.OSFile(path, "wb")
+        self._sinks.append(sink)
+        return pa.ipc.new_file(sink, schema)
+
+    def _new_frame_buffers(self):
+        self._frames = {name: np.empty(self.row_group_size, dtype) for name, dtype in FRAME_COLUMNS}
+        self._num_frames = 0
+
+    def _new_event_buffers(self):
+        self._events = {"frame": [], "time": [], "track_id": [], "line": [], "direction": []}
+
+    def log_frame(self, frame, seconds, people, detected, enter, exit, timings=None):
+        """
+        Adds the row of a processed frame.
+
+        Args:
+            timings: Milliseconds per stage (see STAGES), e.g. from `StageTimer.take`.
+        """
+        i = self._num_frames
+        columns = self._frames
+        columns["frame"][i] = frame
+        columns["time"][i] = seconds
+        columns["people"][i] = people
+        columns["detected"][i] = detected
+        columns["enter"][i] = enter
+        columns["exit"][i] = exit
+        for stage, value in zip(STAGES, timings or (0.0,) * len(STAGES)):
+            columns["{}_ms".format(stage)][i] = value
+        self._num_frames += 1
+        self.frames_logged += 1
+        if self._num_frames == self.row_group_size:
+            self.flush()
+
+    def log_events(self, frame, seconds, events):
+        """
+        Adds the (track ID, line, direction) crossings counted on a frame.
+        """
+        for track_id, line, direction in events:
+            self._events["frame"].append(frame)
+            self._events["time"].append(seconds)
+            self._events["track_id"].append(track_id)
+            self._events["line"].append(line)
+            self._events["direction"].append(direction)
+        self.events_logged += len(events)
+        if len(self._events["frame"]) >= self.row_group_size:
+            self._flush_events()
+
+    def flush(self):
+        """
+        Hands the buffered rows to the writer thread as row groups.
+        """
+        import pyarrow as pa
+
+        if self._num_frames:
+            n = self._num_frames
+            table = pa.Table.from_arrays([pa.array(self._frames[name][:n]) for name, _ in FRAME_COLUMNS],
+                                         schema=self.frame_schema)
+            self._put("frames", table)
+            self._new_frame_buffers()
+        self._flush_events()
+
+    def _flush_events(self):
+        import pyarrow as pa
+
+        if self._events["frame"]:
+            table = pa.Table.from_pydict(self._events, schema=self.event_schema)
+            self._put("events", table)
+            self._new_event_buffers()
+
+    def _put(self, name, table):
+        if self._error is not None:
+            raise RuntimeError("event log writer failed") from self._error
+        self._queue.put((name, table))
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            name, table = item
+            try:
+                if self.format == "parquet":
+                    self._writers[name].write_table(table, row_group_size=self.row_group_size)
+                else:
+                    self._writers[name].write_table(table, max_chunksize=self.row_group_size)
+            except Exception as e:
+                self._error = e
+
+    def close(self):
+        """
+        Writes the remaining rows and closes the files.
+        """
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        for writer in self._writers.values():
+            writer.close()
+        for sink in self._sinks:
+            sink.close()
+        if self._error is not None:
+            raise RuntimeError("event log writer failed") from self._error
+
+    def stats(self):
+        return {"directory": self.directory, "frames": self.frames_logged, "events": self.events_logged}
@@ -0,0 +1,129 @@
+import cv2
+import numpy as np
+
+
+class DetectionSchedule:
+    """
+    Decides per processed frame whether the person detector has to run.
+
+    The default schedule runs the detector every `detect_interval` processed
+    frames; the correlation trackers carry the boxes in between.
+    """
+
+    def __init__(self, detect_interval=30):
+        self.detect_interval = detect_interval
+        self.frames = 0
+        self.inferences = 0
+
+    def should_detect(self, frame):
+        """
+        Args:
+            frame: Processed frame, in stream order.
+
+        Returns:
+            bool: True if the detections of this frame will be used.
+        """
+        detect = self.frames % self.detect_interval == 0
+        self.frames += 1
+        self.inferences += detect
+        return detect
+
+    def stats(self):
+        """
+        Returns:
+            dict: Processed frames, detector runs, and the detector runs saved compared to
+            running the detector on every `detect_interval`-th frame.
+        """
+        baseline = -(-self.frames // self.detect_interval)
+        return {
+            "frames": self.frames,
+            "inferences": self.inferences,
+            "inferences_saved": max(0, baseline - self.inferences),
+        }
+
+
+class MotionGate(DetectionSchedule):
+    """
+    Detection schedule that skips the detector while the scene is static.
+
+    Every frame is downscaled to grayscale and compared against a slowly updated
+    background (running average, or MOG2 background subtraction). If the fraction
+    of changed pixels stays below `min_changed_fraction`, the frame is considered
+    static and only the trackers are updated. When motion is present the detector
+    runs every `detect_interval` frames, and immediately when motion starts after
+    a static stretch so that newcomers are picked up without delay. It also runs
+    when motion stops and then every `static_interval` static frames, so that the
+    trackers drop the people who left instead of carrying their last boxes.
+
+    `pixel_threshold` is the gray level change marking a pixel as changed for
+    "diff", and MOG2's `varThreshold` (squared distance to the background model,
+    in variances) for "mog2".
+    """
+
+    def __init__(self, detect_interval=30, pixel_threshold=25, min_changed_fraction=0.002,
+                 downscale_width=160, background_alpha=0.05, method="diff", static_interval=None):
+        super().__init__(detect_interval)
+        # detector runs during a static stretch, 10 times sparser than with motion by default
+        self.static_interval = static_interval or 10 * detect_interval
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.downscale_width = downscale_width
+        self.background_alpha = background_alpha
+        self.method = method
+
+        self.background = None
+        self.subtractor = None
+        if method == "mog2":
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(varThreshold=pixel_threshold, detectShadows=False)
+        elif method != "diff":
+            raise ValueError("unknown motion detection method: {}".format(method))
+
+        self.static_frames = 0
+        self._since_detection = None
+        self._was_static = True
+
+    def changed_fraction(self, frame):
+        """
+        Returns:
+            float: Fraction of (downscaled) pixels that differ from the background.
+        """
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.downscale_width, max(1, h * self.downscale_width // w)),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        if self.subtractor is not None:
+            mask = self.subtractor.apply(gray)
+            return np.count_nonzero(mask) / mask.size
+
+        if self.background is None:
+            self.background = gray.astype(np.float32)
+            return 1.0
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, self.background_alpha)
+        return np.count_nonzero(diff > self.pixel_threshold) / diff.size
+
+    def should_detect(self, frame):
+        moving = self.changed_fraction(frame) >= self.min_changed_fraction
+        self.frames += 1
+
+        if not moving:
+            self.static_frames += 1
+            detect = (not self._was_static or self._since_detection is None
+                      or self._since_detection + 1 >= self.static_interval)
+            self._was_static = True
+        else:
+            detect = (self._was_static or self._since_detection is None
+                      or self._since_detection + 1 >= self.detect_interval)
+            self._was_static = False
+        if detect:
+            self.inferences += 1
+            self._since_detection = 0
+        else:
+            self._since_detection += 1
+        return detect
+
+    def stats(self):
+        stats = super().stats()
+        stats["static_frames"] = self.static_frames
+        return stats
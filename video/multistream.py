@@ -0,0 +1,355 @@
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+from tracker.peoplecounter import PeopleCounter
+from video.motiongate import DetectionSchedule
+
+
+class FrameMailbox:
+    """
+    Bounded frame buffer between a stream's reader and its counting loop.
+
+    With the "block" policy a full mailbox blocks the reader (files: every frame is
+    counted). With the "drop" policy the oldest frame is dropped instead (cameras:
+    the counting loop always gets recent frames and never falls further behind).
+    """
+
+    def __init__(self, maxsize=4, policy="block"):
+        if policy not in ("block", "drop"):
+            raise ValueError("unknown frame-drop policy {!r}, expected 'block' or 'drop'".format(policy))
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._items = collections.deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """
+        Adds a frame; returns False once the mailbox is closed.
+        """
+        with self._cond:
+            while self.policy == "block" and len(self._items) >= self.maxsize and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        """
+        Returns the oldest frame, or None once the mailbox is closed and empty.
+        """
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            item = self._items.popleft() if self._items else None
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class InferenceScheduler:
+    """
+    One model shared by many streams, fed with batches of frames from all of them.
+
+    Streams submit the frames that need detection and wait on the returned future.
+    The scheduler thread collects pending requests round-robin across the streams
+    (at most `max_per_stream` per stream per batch, starting from a rotating stream),
+    so a busy stream cannot starve the others, and runs them through the model as
+    one batch. Waiting up to `max_wait` seconds for more requests trades a little
+    latency for fuller batches.
+    """
+
+    def __init__(self, detector, max_batch=8, max_wait=0.005, max_per_stream=1):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_per_stream = max_per_stream
+
+        self._pending = collections.OrderedDict()  # stream name -> deque of (frame, future, submit time)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._next_stream = 0
+
+        self.batches = 0
+        self.frames = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = collections.Counter()
+        # submit-to-result times of the most recent requests, in seconds
+        self.latencies = collections.deque(maxlen=10000)
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, stream, frame):
+        """
+        Queues a frame of a stream for detection.
+
+        Returns:
+            Future: Resolves to the (boxes, scores) of the frame, see `filter_person_boxes`.
+        """
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("inference scheduler is closed")
+            self._pending.setdefault(stream, collections.deque()).append((frame, future, time.perf_counter()))
+            self.max_queue_depth = max(self.max_queue_depth, self._num_pending())
+            self._cond.notify_all()
+        return future
+
+    def detect(self, stream, frame):
+        """
+        Blocking version of `submit`.
+        """
+        return self.submit(stream, frame).result()
+
+    def _take_batch(self):
+        # one round-robin pass per iteration, starting at a rotating stream
+        batch = []
+        streams = list(self._pending)
+        start = self._next_stream % len(streams)
+        self._next_stream += 1
+        taken = collections.Counter()
+        while len(batch) < self.max_batch:
+            progress = False
+            for stream in streams[start:] + streams[:start]:
+                requests = self._pending[stream]
+                if requests and taken[stream] < self.max_per_stream and len(batch) < self.max_batch:
+                    batch.append(requests.popleft())
+                    taken[stream] += 1
+                    progress = True
+            if not progress:
+                break
+        for stream in streams:
+            if not self._pending[stream]:
+                del self._pending[stream]
+        return batch
+
+    def _num_pending(self):
+        return sum(len(requests) for requests in self._pending.values())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+                # give the other streams a moment to fill the batch
+                deadline = time.monotonic() + self.max_wait
+                while self._num_pending() < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+
+            frames = [frame for frame, _, _ in batch]
+            try:
+                results = self.detector.detect_batch(frames)
+            except BaseException as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.frames += len(batch)
+            self.batch_sizes[len(batch)] += 1
+            done = time.perf_counter()
+            for (_, future, submitted), result in zip(batch, results):
+                self.latencies.append(done - submitted)
+                future.set_result(result)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def stats(self):
+        with self._cond:
+            queue_depth = self._num_pending()
+        latencies = np.array(self.latencies) * 1e3
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+        return {
+            "batches": self.batches,
+            "inferences": self.frames,
+            "mean_batch": round(self.frames / self.batches, 2) if self.batches else 0.0,
+            "batch_sizes": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "latency_p50_ms": round(float(p50), 2),
+            "latency_p95_ms": round(float(p95), 2),
+            "latency_p99_ms": round(float(p99), 2),
+        }
+
+
+def open_source(source):
+    """
+    Opens a video file, or a camera given by its index (an int or a string of digits).
+    """
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source)), True
+    return cv2.VideoCapture(source), False
+
+
+class StreamCounter:
+    """
+    Counts people on one source, with its own tracker and counts, using the shared scheduler.
+
+    A reader thread decodes and resizes the sampled frames into a mailbox; a counting
+    thread runs the detection schedule, sends the detection frames to the scheduler
+    and updates the stream's PeopleCounter.
+    """
+
+    def __init__(self, name, source, scheduler, skip=3, size=(500, 280), detect_interval=30,
+                 policy=None, queue_size=4, tracker="flow", matcher="greedy", max_seconds=0):
+        self.name = name
+        self.source = source
+        self.scheduler = scheduler
+        self.skip = skip
+        self.size = tuple(size)
+        self.max_seconds = max_seconds
+
+        self.cap, live = open_source(source)
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise IOError("cannot open source: {}".format(source))
+        # live sources drop frames when counting falls behind, files never do
+        self.mailbox = FrameMailbox(queue_size, policy or ("drop" if live else "block"))
+
+        W = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        H = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.counter = PeopleCounter(W, H, maxDisappeared=40, maxDistance=40, tracker=tracker,
+                                     annotate=False, matcher=matcher)
+        self.schedule = DetectionSchedule(detect_interval)
+
+        self.frames_read = 0
+        self.error = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for target, role in ((self._read, "read"), (self._count, "count")):
+            thread = threading.Thread(target=target, name="{}-{}".format(self.name, role), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.mailbox.close()
+
+    def join(self):
+        # also releases the capture of a stream that was never started
+        for thread in self._threads:
+            thread.join()
+        self.cap.release()
+
+    def _read(self):
+        start = time.time()
+        try:
+            while not self._stop.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                self.frames_read += 1
+                if self.frames_read % self.skip != 0:
+                    continue
+                if not self.mailbox.put(cv2.resize(frame, self.size)):
+                    break
+                if self.max_seconds and time.time() - start > self.max_seconds:
+                    break
+        finally:
+            self.mailbox.close()
+
+    def _count(self):
+        try:
+            while True:
+                frame = self.mailbox.get()
+                if frame is None:
+                    break
+                boxes = None
+                if self.schedule.should_detect(frame):
+                    boxes, _ = self.scheduler.detect(self.name, frame)
+                self.counter.update(frame, boxes)
+        except BaseException as e:
+            self.error = e
+            self.stop()
+
+    def summary(self):
+        summary = {
+            "source": str(self.source),
+            "frames": self.counter.totalFrames,
+            "dropped": self.mailbox.dropped,
+            "enter": self.counter.totalUp,
+            "exit": self.counter.totalDown,
+        }
+        summary.update(self.schedule.stats())
+        return summary
+
+
+def count_streams(sources, detector, max_batch=8, max_wait=0.005, **stream_options):
+    """
+    Counts people on several sources at once with one shared, batched model.
+
+    Args:
+        sources: Video files and/or camera indices.
+        detector: PersonDetector shared by all streams.
+        max_batch: Maximum number of frames (from all streams) per predict call.
+        max_wait: Seconds the scheduler waits for more frames to fill a batch.
+        **stream_options: Passed to every StreamCounter (skip, size, detect_interval,
+            policy, queue_size, tracker, matcher, max_seconds).
+
+    Returns:
+        dict: Per-stream summaries, the scheduler statistics and the total throughput.
+    """
+    scheduler = InferenceScheduler(detector, max_batch=max_batch, max_wait=max_wait)
+    streams = []
+
+    start = time.time()
+    try:
+        for i, source in enumerate(sources):
+            streams.append(StreamCounter("stream{}".format(i), source, scheduler, **stream_options))
+        for stream in streams:
+            stream.start()
+        for stream in streams:
+            stream.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # stops what is still running (on an interrupt, or when a source fails to
+        # open) and releases every capture opened so far, started or not
+        for stream in streams:
+            stream.stop()
+        for stream in streams:
+            stream.join()
+        scheduler.close()
+    elapsed = time.time() - start
+
+    for stream in streams:
+        if stream.error is not None:
+            raise RuntimeError("stream {} failed: {!r}".format(stream.source, stream.error)) from stream.error
+
+    frames = sum(stream.counter.totalFrames for stream in streams)
+    summary = {
+        "mode": "multistream",
+        "streams": [stream.summary() for stream in streams],
+        "frames": frames,
+        "elapsed": round(elapsed, 3),
+        "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    summary.update(scheduler.stats())
+    return summary
@@ -0,0 +1,156 @@
+import queue
+import threading
+
+# marks the end of a stage's output
+_END = object()
+
+
+class StagedPipeline:
+    """
+    Runs the stages of a video pipeline on their own threads, connected by bounded queues.
+
+    Each stage is an iterable that is consumed on a worker thread; its items are
+    pushed into a bounded queue and handed to the next stage in order. A full queue
+    blocks the producing stage, so a slow consumer throttles everything upstream
+    instead of letting frames pile up in memory. OpenCV and PyTorch release the GIL
+    while decoding, encoding and running the model, so the stages overlap and the
+    throughput approaches that of the slowest stage.
+    """
+
+    def __init__(self, maxsize=8, poll_interval=0.1):
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+        self._abort = threading.Event()
+        self._threads = []
+        self._error = None
+
+    def stage(self, name, iterable):
+        """
+        Starts consuming `iterable` on a worker thread.
+
+        Args:
+            name: Thread name, used in error messages.
+            iterable: Items produced by this stage. It may itself read from the
+                iterator returned by a previous `stage` call.
+
+        Returns:
+            iterator: The stage's items, in production order.
+        """
+        outbox = queue.Queue(maxsize=self.maxsize)
+
+        def run():
+            try:
+                for item in iterable:
+                    if not self._put(outbox, item):
+                        return
+            except BaseException as e:
+                self._fail(name, e)
+            finally:
+                self._put(outbox, _END)
+
+        self._start(name, run)
+        return self._iterate(outbox)
+
+    def sink(self, name, fn):
+        """
+        Starts a worker thread that calls `fn(item)` for every item put into the sink.
+
+        Args:
+            name: Thread name, used in error messages.
+            fn: Consumer callable, e.g. `writer.write`.
+
+        Returns:
+            Sink: Object with `put(item)` and `close()`.
+        """
+        inbox = queue.Queue(maxsize=self.maxsize)
+
+        def run():
+            try:
+                for item in self._iterate(inbox):
+                    fn(item)
+            except BaseException as e:
+                self._fail(name, e)
+
+        thread = self._start(name, run)
+        return Sink(self, inbox, thread)
+
+    def close(self):
+        """
+        Stops all stages and waits for their threads to exit.
+        """
+        self._abort.set()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _start(self, name, target):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+        return thread
+
+    def _fail(self, name, error):
+        if self._error is None:
+            self._error = RuntimeError("pipeline stage '{}' failed: {!r}".format(name, error))
+            self._error.__cause__ = error
+        self._abort.set()
+
+    def _put(self, q, item):
+        # block while the queue is full (backpressure) but give up once the
+        # pipeline is aborted so that no thread is left waiting forever
+        while True:
+            if self._abort.is_set() and item is not _END:
+                return False
+            try:
+                q.put(item, timeout=self.poll_interval)
+                return True
+            except queue.Full:
+                if self._abort.is_set():
+                    return False
+
+    def _iterate(self, q):
+        while True:
+            try:
+                item = q.get(timeout=self.poll_interval)
+            except queue.Empty:
+                if self._abort.is_set():
+                    break
+                continue
+            if item is _END:
+                break
+            yield item
+        if self._error is not None:
+            raise self._error
+
+
+class Sink:
+    """
+    Input end of a `StagedPipeline.sink` stage.
+    """
+
+    def __init__(self, pipeline, inbox, thread):
+        self._pipeline = pipeline
+        self._inbox = inbox
+        self._thread = thread
+
+    def put(self, item):
+        """
+        Queues an item, blocking while the sink is full.
+        """
+        if not self._pipeline._put(self._inbox, item) and self._pipeline._error is not None:
+            raise self._pipeline._error
+
+    def close(self):
+        """
+        Flushes the remaining items and waits for the sink thread to finish.
+        """
+        self._pipeline._put(self._inbox, _END)
+        self._thread.join()
+        if self._pipeline._error is not None:
+            raise self._pipeline._error
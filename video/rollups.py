@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# bucket sizes in seconds, finest first
+RESOLUTIONS = (("second", 1), ("minute", 60), ("hour", 3600), ("day", 86400))
+
+BUCKET = np.dtype([
+    ("start", "<i8"),  # epoch seconds (UTC) of the start of the bucket
+    ("frames", "<i8"),  # processed frames in the bucket
+    ("people_sum", "<f8"),  # sum of the per-frame people counts, for the mean
+    ("people_max", "<i4"),
+    ("enter", "<i8"),  # crossings in the bucket
+    ("exit", "<i8"),
+])
+
+
+def _aggregate(starts, frames, people_sum, people_max, enter, exit):
+    # Merges the rows sharing a bucket start; the starts must be sorted
+    boundaries = np.flatnonzero(np.diff(starts)) + 1
+    first = np.concatenate(([0], boundaries))
+    buckets = np.empty(len(first), dtype=BUCKET)
+    buckets["start"] = starts[first]
+    buckets["frames"] = np.add.reduceat(frames, first)
+    buckets["people_sum"] = np.add.reduceat(people_sum, first)
+    buckets["people_max"] = np.maximum.reduceat(people_max, first)
+    buckets["enter"] = np.add.reduceat(enter, first)
+    buckets["exit"] = np.add.reduceat(exit, first)
+    return buckets
+
+
+def _merge(existing, new):
+    merged = np.concatenate([existing, new])
+    merged = merged[np.argsort(merged["start"], kind="stable")]
+    return _aggregate(merged["start"], merged["frames"], merged["people_sum"], merged["people_max"],
+                      merged["enter"], merged["exit"])
+
+
+def choose_resolution(span, width):
+    """
+    The finest resolution giving at most `width` buckets over `span` seconds (one
+    per pixel of the plot), or the coarsest one.
+    """
+    for name, seconds in RESOLUTIONS:
+        if span / seconds <= width:
+            return name, seconds
+    return RESOLUTIONS[-1]
+
+
+def read_frames_table(directory):
+    """
+    Reads the frames table of an event log (see `video.eventlog.EventLog`).
+
+    Returns:
+        tuple: (columns, metadata) with the columns as NumPy arrays.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = os.path.join(directory, "frames.parquet")
+    if os.path.exists(path):
+        table = pq.read_table(path, columns=["time", "people", "enter", "exit"])
+    else:
+        with pa.OSFile(os.path.join(directory, "frames.arrow"), "rb") as source:
+            table = pa.ipc.open_file(source).read_all().select(["time", "people", "enter", "exit"])
+    metadata = {key.decode(): value.decode() for key, value in (table.schema.metadata or {}).items()}
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    return columns, metadata
+
+
+class RollupStore:
+    """
+    Pre-aggregated counts over time, at second, minute, hour and day resolution.
+
+    Each finished run is added once: its per-frame rows are bucketed at every
+    resolution and merged into the stored rollups (an append when the run comes
+    after the stored ones, which only writes the new buckets). The per-second
+    buckets of each run are also kept in "runs/", so that a run logged again into
+    the same directory replaces the earlier one: the rollups are then rebuilt from
+    the kept runs, the maximum of a bucket not being something one can subtract.
+    Each resolution is
+    one sorted array of BUCKET records in "<resolution>.buckets", memory-mapped
+    for queries, so a query reads only the buckets of its range at the resolution
+    it needs, whatever the amount of raw data behind them.
+    """
+
+    def __init__(self, directory="cache/insights"):
+        self.directory = directory
+        self._mapped = {}  # resolution name -> (file size and mtime, memory-mapped buckets)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + ".buckets")
+
+    def _runs_path(self):
+        return os.path.join(self.directory, "runs.json")
+
+    def _run_path(self, key):
+        return os.path.join(self.directory, "runs", hashlib.sha1(key.encode()).hexdigest() + ".buckets")
+
+    def runs(self):
+        """
+        The runs added so far: event log directory -> processing start, recording start
+        and number of frames.
+        """
+        try:
+            with open(self._runs_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def buckets(self, name):
+        """
+        All the buckets of a resolution, memory-mapped (reopened when the store changed).
+        """
+        path = self._path(name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return np.empty(0, dtype=BUCKET)
+        # a partly written record at the end (interrupted append) is ignored
+        count = stat.st_size // BUCKET.itemsize
+        if count == 0:
+            return np.empty(0, dtype=BUCKET)
+        version = (stat.st_size, stat.st_mtime_ns)
+        cached = self._mapped.get(name)
+        if cached is None or cached[0] != version:
+            cached = self._mapped[name] = (version, np.memmap(path, dtype=BUCKET, mode="r", shape=(count,)))
+        return cached[1]
+
+    def _store(self, name, new):
+        path = self._path(name)
+        existing = self.buckets(name)
+        if len(existing) and new["start"][0] < existing["start"][-1]:
+            # a run older than the last stored bucket: rewrite the rollup, atomically
+            # so that readers see the old or the new one
+            merged = _merge(np.array(existing), new)
+            tmp = path + ".tmp"
+            merged.tofile(tmp)
+            os.replace(tmp, path)
+            return
+
+        offset = len(existing)
+        if offset and new["start"][0] == existing["start"][-1]:
+            # the run continues the last stored bucket: rewrite that one in place
+            new = _merge(np.array(existing[-1:]), new)
+            offset -= 1
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(offset * BUCKET.itemsize)
+            f.write(new.tobytes())
+            f.truncate()
+
+    @staticmethod
+    def _rollups(seconds):
+        # (name, buckets) at every resolution, each rolled up from the previous one
+        new = seconds
+        for name, size in RESOLUTIONS:
+            if size > 1:
+                new = _aggregate(new["start"] // size * size, new["frames"], new["people_sum"],
+                                 new["people_max"], new["enter"], new["exit"])
+            yield name, new
+
+    @staticmethod
+    def _second_buckets(times, people, enter, exit):
+        times = np.asarray(times, dtype=np.float64)
+        if len(times) == 0:
+            return np.empty(0, dtype=BUCKET)
+        seconds = np.floor(times).astype(np.int64)
+        rows = (np.ones(len(times), dtype=np.int64), np.asarray(people, dtype=np.float64),
+                np.asarray(people, dtype=np.int32), np.asarray(enter, dtype=np.int64),
+                np.asarray(exit, dtype=np.int64))
+        return _aggregate(seconds, *rows)
+
+    def add_frames(self, times, people, enter, exit):
+        """
+        Adds per-frame rows to every resolution.
+
+        Args:
+            times: Epoch seconds of the frames, ascending.
+            people: People count of each frame.
+            enter: Entries counted on each frame (not cumulative).
+            exit: Exits counted on each frame.
+        """
+        if len(times) == 0:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for name, new in self._rollups(self._second_buckets(times, people, enter, exit)):
+            self._store(name, new)
+
+    def rebuild(self):
+        """
+        Rewrites every resolution from the kept per-second buckets of the runs.
+        """
+        paths = [self._run_path(key) for key in self.runs()]
+        runs = [np.fromfile(path, dtype=BUCKET) for path in paths if os.path.exists(path)]
+        seconds = np.concatenate(runs) if runs else np.empty(0, dtype=BUCKET)
+        if len(seconds):
+            rollups = self._rollups(_merge(seconds[:0], seconds))
+        else:
+            rollups = ((name, seconds) for name, _ in RESOLUTIONS)
+        for name, buckets in rollups:
+            path = self._path(name)
+            tmp = path + ".tmp"
+            buckets.tofile(tmp)
+            os.replace(tmp, path)
+
+    def add_run(self, directory, recorded=None):
+        """
+        Adds the frames of an event log, unless it was added before. A different run
+        logged into the same directory since replaces the one added from it.
+
+        Args:
+            directory: Event log directory.
+            recorded: Epoch seconds at which the source was recorded. Defaults to the
+                start of the processing, which is only right for live sources.
+
+        Returns:
+            bool: True if the run was added.
+        """
+        key = os.path.abspath(directory)
+        runs = self.runs()
+        columns, metadata = read_frames_table(directory)
+        started = float(metadata.get("started", os.path.getmtime(directory)))
+        recorded = started if recorded is None else float(recorded)
+        if key in runs and (runs[key]["started"], runs[key].get("recorded", started)) == (started, recorded):
+            return False
+
+        # the log has cumulative counts, the rollups per-frame increments
+        enter = np.diff(columns["enter"], prepend=0)
+        exit = np.diff(columns["exit"], prepend=0)
+        seconds = self._second_buckets(recorded + columns["time"], columns["people"], enter, exit)
+        os.makedirs(os.path.dirname(self._run_path(key)), exist_ok=True)
+        seconds.tofile(self._run_path(key))
+
+        replaced = key in runs
+        runs[key] = {"started": started, "recorded": recorded, "frames": int(len(columns["time"]))}
+        with open(self._runs_path(), "w") as f:
+            json.dump(runs, f, indent=1)
+        if replaced:
+            self.rebuild()
+        elif len(seconds):
+            for name, new in self._rollups(seconds):
+                self._store(name, new)
+        return True
+
+    def sync(self, root="runs"):
+        """
+        Adds the event logs under `root` that were not added yet.
+
+        Returns:
+            int: Number of runs added.
+        """
+        added = 0
+        if not os.path.isdir(root):
+            return added
+        for name in sorted(os.listdir(root)):
+            directory = os.path.join(root, name)
+            if any(os.path.exists(os.path.join(directory, "frames." + ext)) for ext in ("parquet", "arrow")):
+                added += self.add_run(directory)
+        return added
+
+    def time_range(self):
+        """
+        (first, last) epoch seconds with data, or None if the store is empty.
+        """
+        buckets = self.buckets("second")
+        if len(buckets) == 0:
+            return None
+        return int(buckets["start"][0]), int(buckets["start"][-1]) + 1
+
+    def query(self, start, end, width=800):
+        """
+        The counts between two times, at the resolution fitting a plot `width` pixels wide.
+
+        Returns:
+            dict: The resolution name and size, and per bucket: the start time, the
+            mean and max people count, the entries and the exits.
+        """
+        name, size = choose_resolution(max(end - start, 1), width)
+        buckets = self.buckets(name)
+        first, last = np.searchsorted(buckets["start"], [start // size * size, end])
+        selected = np.array(buckets[first:last])
+        return {
+            "resolution": name,
+            "bucket_seconds": size,
+            "start": selected["start"],
+            "mean_people": selected["people_sum"] / np.maximum(selected["frames"], 1),
+            "max_people": selected["people_max"],
+            "enter": selected["enter"],
+            "exit": selected["exit"],
+        }
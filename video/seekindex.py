@@ -0,0 +1,252 @@
+import bisect
+import collections
+import json
+import os
+import threading
+
+import cv2
+
+INDEX_VERSION = 1
+
+
+def index_path(video_path):
+    """
+    The index is stored next to the video: "<video>.seekindex.json".
+    """
+    return video_path + ".seekindex.json"
+
+
+def _scan_keyframes(video_path):
+    # Reads the packets of the video stream without decoding them (needs PyAV);
+    # packets come in decode order, frame indices are in presentation order
+    import av
+
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        pts, keyframe_pts = [], []
+        for packet in container.demux(stream):
+            if packet.pts is None:
+                continue
+            pts.append(packet.pts)
+            if packet.is_keyframe:
+                keyframe_pts.append(packet.pts)
+        time_base = float(stream.time_base)
+
+    pts.sort()
+    order = {value: i for i, value in enumerate(pts)}
+    keyframes = sorted(order[value] for value in keyframe_pts)
+    timestamps = [round((pts[i] - pts[0]) * time_base, 6) for i in keyframes]
+    return keyframes, timestamps, len(pts)
+
+
+class SeekIndex:
+    """
+    Keyframe positions of a video file, built once and persisted next to the video.
+
+    Keyframes are found by demuxing the file with PyAV, which reads the packet
+    headers only and takes a fraction of the decoding time. Without PyAV the index
+    has no keyframes and seeks fall back to OpenCV's own seeking.
+    """
+
+    def __init__(self, frame_count, fps, keyframes=(), timestamps=()):
+        self.frame_count = frame_count
+        self.fps = fps
+        self.keyframes = list(keyframes)  # frame indices, ascending
+        self.timestamps = list(timestamps)  # seconds from the first frame, per keyframe
+
+    @classmethod
+    def build(cls, video_path):
+        cap = cv2.VideoCapture(video_path)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+        try:
+            keyframes, timestamps, frame_count = _scan_keyframes(video_path)
+        except ImportError:
+            keyframes, timestamps = [], []
+        return cls(frame_count, fps, keyframes, timestamps)
+
+    @classmethod
+    def load(cls, video_path):
+        """
+        Returns the persisted index of the video, building (and saving) it if it is
+        missing or the video changed since.
+        """
+        stat = os.stat(video_path)
+        path = index_path(video_path)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if (data["version"], data["size"], data["mtime"]) == (INDEX_VERSION, stat.st_size, stat.st_mtime):
+                return cls(data["frame_count"], data["fps"], data["keyframes"], data["timestamps"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = cls.build(video_path)
+        data = {
+            "version": INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "frame_count": index.frame_count,
+            "fps": index.fps,
+            "keyframes": index.keyframes,
+            "timestamps": index.timestamps,
+        }
+        try:
+            with open(path, "w") as f:
+                json.dump(data, f)
+        except OSError:
+            pass  # read-only location: the index is rebuilt next time
+        return index
+
+    def keyframe_before(self, frame_number):
+        """
+        Index of the last keyframe at or before `frame_number`, None if unknown.
+        """
+        i = bisect.bisect_right(self.keyframes, frame_number) - 1
+        return self.keyframes[i] if i >= 0 else None
+
+    def max_gop(self):
+        """
+        Largest number of frames between two keyframes: the most frames a seek decodes.
+        """
+        bounds = self.keyframes + [self.frame_count]
+        return max((b - a for a, b in zip(bounds, bounds[1:])), default=self.frame_count)
+
+
+class FrameCache:
+    """
+    LRU cache of decoded frames, bounded by the total size of the frames.
+
+    Cached frames are made read-only, so they can be handed out without copies.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames = collections.OrderedDict()
+
+    def get(self, frame_number):
+        frame = self._frames.get(frame_number)
+        if frame is None:
+            self.misses += 1
+            return None
+        self._frames.move_to_end(frame_number)
+        self.hits += 1
+        return frame
+
+    def put(self, frame_number, frame):
+        old = self._frames.pop(frame_number, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        frame.flags.writeable = False
+        self._frames[frame_number] = frame
+        self.nbytes += frame.nbytes
+        while self.nbytes > self.max_bytes and len(self._frames) > 1:
+            _, evicted = self._frames.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def __len__(self):
+        return len(self._frames)
+
+
+class FrameSeeker:
+    """
+    Sequential reads and random access on one capture, without reopening it.
+
+    Frames are returned downscaled to `size` and kept in a FrameCache, so going
+    back to a recently shown position does not decode anything. A cache miss
+    seeks to the keyframe before the target (or keeps decoding forward when the
+    capture is already between that keyframe and the target) and decodes up to
+    the target: at most one keyframe interval of frames. The last `keep_before`
+    of them are cached too, for scrubbing backwards.
+
+    Seeks and reads may come from different threads (the slider and the counting
+    worker); they are serialized. The frames returned are the cached arrays,
+    read-only: copy a frame before drawing on it.
+    """
+
+    def __init__(self, cap, index=None, size=(500, 280), cache=None, keep_before=8):
+        self.cap = cap
+        self.index = index
+        self.size = tuple(size)
+        self.cache = cache if cache is not None else FrameCache()
+        self.keep_before = keep_before
+
+        self.position = 0  # index of the frame returned by the next read()
+        self._cap_position = 0  # index of the frame the capture decodes next
+        self._lock = threading.Lock()
+
+    def _grab_to(self, frame_number):
+        # Moves the capture to `frame_number`, decoding as few frames as possible
+        keyframe = self.index.keyframe_before(frame_number) if self.index is not None else None
+        if keyframe is None:
+            if not 0 <= frame_number - self._cap_position <= self.keep_before:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                self._cap_position = frame_number
+        elif not keyframe <= self._cap_position <= frame_number:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            self._cap_position = keyframe
+
+        while self._cap_position < frame_number:
+            if not self.cap.grab():
+                return False
+            if frame_number - self._cap_position <= self.keep_before:
+                ret, frame = self.cap.retrieve()
+                if ret:
+                    self.cache.put(self._cap_position, cv2.resize(frame, self.size))
+            self._cap_position += 1
+        return True
+
+    def _decode(self, frame_number):
+        if self._cap_position != frame_number and not self._grab_to(frame_number):
+            return None
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self._cap_position += 1
+        frame = cv2.resize(frame, self.size)
+        self.cache.put(frame_number, frame)
+        return frame
+
+    def read(self):
+        """
+        Returns the frame at `position` and advances.
+
+        Returns:
+            tuple: (frame number, frame), the frame being None at the end of the stream
+            and otherwise read-only.
+        """
+        with self._lock:
+            frame_number = self.position
+            frame = self.cache.get(frame_number)
+            if frame is None:
+                frame = self._decode(frame_number)
+                if frame is None:
+                    return frame_number, None
+            self.position += 1
+            return frame_number, frame
+
+    def frame_at(self, frame_number):
+        """
+        Returns the frame `frame_number` (read-only) and continues reading after it;
+        None if it cannot be decoded.
+        """
+        with self._lock:
+            frame = self.cache.get(frame_number)
+            if frame is None:
+                frame = self._decode(frame_number)
+                if frame is None:
+                    return None
+            self.position = frame_number + 1
+            return frame
+
+    def stats(self):
+        return {
+            "cached_frames": len(self.cache),
+            "cached_bytes": self.cache.nbytes,
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+        }
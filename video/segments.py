@@ -0,0 +1,217 @@
+import multiprocessing
+import os
+
+import cv2
+import numpy as np
+
+from detector.persondetector import PersonDetector
+from tracker.peoplecounter import PeopleCounter
+from video.motiongate import DetectionSchedule
+
+# per-process model, created by the pool initializer
+_detector = None
+
+
+def plan_segments(total_frames, num_segments):
+    """
+    Splits [0, total_frames) into contiguous segments of roughly equal length.
+
+    Returns:
+        list: (start, end) frame index pairs.
+    """
+    num_segments = max(1, min(num_segments, total_frames))
+    bounds = np.linspace(0, total_frames, num_segments + 1).astype(int)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(num_segments)]
+
+
+def _init_worker(weights, num_threads):
+    global _detector
+    import torch
+
+    # every process gets its own model; keep them from oversubscribing the cores
+    torch.set_num_threads(num_threads)
+    _detector = PersonDetector(weights)
+
+
+def count_segment(task):
+    """
+    Counts the crossings of one segment in a worker process.
+
+    The worker starts `overlap` frames before the segment so that tracks that are
+    already in the scene at the boundary have some history. Crossings counted
+    during that warm-up are reported separately and only used for stitching.
+
+    Args:
+        task: Tuple (video_path, start, end, overlap, skip, size, max_distance).
+
+    Returns:
+        dict: Segment bounds, crossing events and the boundary track snapshots.
+    """
+    video_path, start, end, overlap, skip, size, max_distance = task
+    warm_start = max(0, start - overlap)
+
+    cap = cv2.VideoCapture(video_path)
+    W = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    H = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.set(cv2.CAP_PROP_POS_FRAMES, warm_start)
+
+    counter = PeopleCounter(W, H, maxDisappeared=40, maxDistance=max_distance, annotate=False)
+    schedule = DetectionSchedule()
+    events = []
+    warmup_events = []
+    head = None
+    tail = None
+    frames = 0
+
+    for index in range(warm_start, end):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        # keep the sampling phase of read_sampled_frames over the whole file
+        if (index + 1) % skip != 0:
+            continue
+
+        frame = cv2.resize(frame, size)
+        boxes = None
+        if schedule.should_detect(frame):
+            boxes, _ = _detector.detect(frame)
+        if index >= start:
+            frames += 1
+        for (objectID, _, direction) in counter.update(frame, boxes):
+            if index >= start:
+                events.append((index, objectID, direction))
+            else:
+                warmup_events.append((index, objectID, direction))
+
+        # snapshot the tracks at the last sampled frame before each boundary;
+        # the neighbouring segment takes its snapshot at the same frame
+        if index < start:
+            head = (index, _snapshot(counter))
+        elif end - index <= skip:
+            tail = (index, _snapshot(counter))
+
+    cap.release()
+    return {
+        "start": start,
+        "end": end,
+        "frames": frames,
+        "events": events,
+        "warmup_events": warmup_events,
+        "head": head,
+        "tail": tail,
+    }
+
+
+def _snapshot(counter):
+    store = counter.ct.store
+    slots = store.activeSlots()
+    return {objectID: (tuple(centroid), counted)
+            for (objectID, centroid, counted) in zip(store.ids[slots].tolist(), store.centroids[slots].tolist(),
+                                                     store.counted[slots].tolist())}
+
+
+def _match_tracks(previous, current, max_distance):
+    # greedily pair the tracks of both snapshots by centroid distance
+    pairs = []
+    if not previous or not current:
+        return pairs
+    prev_ids = list(previous.keys())
+    cur_ids = list(current.keys())
+    P = np.array([previous[i][0] for i in prev_ids], dtype=float)
+    C = np.array([current[i][0] for i in cur_ids], dtype=float)
+    D = np.linalg.norm(P[:, None, :] - C[None, :, :], axis=2)
+    used_prev, used_cur = set(), set()
+    for flat in np.argsort(D, axis=None, kind="stable"):
+        row, col = np.unravel_index(flat, D.shape)
+        if D[row, col] > max_distance:
+            break
+        if row in used_prev or col in used_cur:
+            continue
+        used_prev.add(row)
+        used_cur.add(col)
+        pairs.append((prev_ids[row], cur_ids[col]))
+    return pairs
+
+
+def stitch_segments(results, max_distance=40):
+    """
+    Merges the per-segment crossings into one list without double counting.
+
+    At every boundary the tail snapshot of the earlier segment and the head
+    snapshot of the later one are taken at the same frame, so their tracks can be
+    paired by centroid distance. A paired track that the earlier segment already
+    counted is not counted again by the later segment, and a paired track that
+    only the later segment counted during its warm-up is credited at the boundary.
+
+    Args:
+        results: Outputs of `count_segment`, in any order.
+        max_distance: Maximum centroid distance between two paired tracks.
+
+    Returns:
+        list: (frame_index, direction) crossings, sorted by frame.
+    """
+    results = sorted(results, key=lambda r: r["start"])
+    crossings = [(index, direction) for (index, _, direction) in results[0]["events"]]
+
+    for previous, current in zip(results, results[1:]):
+        suppressed = set()
+        if previous["tail"] is not None and current["head"] is not None:
+            prev_tracks = previous["tail"][1]
+            cur_tracks = current["head"][1]
+            warmup_counted = {objectID: (index, direction)
+                              for (index, objectID, direction) in current["warmup_events"]}
+            for (prev_id, cur_id) in _match_tracks(prev_tracks, cur_tracks, max_distance):
+                if prev_tracks[prev_id][1]:
+                    suppressed.add(cur_id)
+                elif cur_id in warmup_counted:
+                    crossings.append((current["start"], warmup_counted[cur_id][1]))
+
+        crossings.extend((index, direction) for (index, objectID, direction) in current["events"]
+                         if objectID not in suppressed)
+
+    crossings.sort(key=lambda c: c[0])
+    return crossings
+
+
+def count_video_segments(video_path, weights, num_segments=None, workers=None, overlap_seconds=2.0,
+                         skip=3, size=(500, 280), max_distance=40):
+    """
+    Counts the crossings of a video file by processing time segments in parallel.
+
+    Args:
+        video_path: Input video file.
+        weights: Model weights, loaded once per worker process.
+        num_segments: Number of segments, defaults to the number of workers.
+        workers: Number of worker processes, defaults to the number of cores.
+        overlap_seconds: Warm-up window processed before each segment boundary.
+        skip: Keep one frame out of `skip`.
+        size: (width, height) the frames are resized to for detection.
+        max_distance: Maximum centroid distance used by the tracker and the stitching.
+
+    Returns:
+        dict: totalUp, totalDown, the number of processed frames and the stitched
+        (frame_index, direction) crossings.
+    """
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+
+    workers = workers or os.cpu_count() or 1
+    num_segments = num_segments or workers
+    overlap = int(round(overlap_seconds * video_fps))
+    tasks = [(video_path, start, end, overlap, skip, tuple(size), max_distance)
+             for (start, end) in plan_segments(total_frames, num_segments)]
+
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(weights, num_threads)) as pool:
+        results = pool.map(count_segment, tasks, chunksize=1)
+
+    crossings = stitch_segments(results, max_distance)
+    return {
+        "totalUp": sum(1 for (_, direction) in crossings if direction == "up"),
+        "totalDown": sum(1 for (_, direction) in crossings if direction == "down"),
+        "frames": sum(r["frames"] for r in results),
+        "crossings": crossings,
+    }
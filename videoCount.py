@@ -1,34 +1,74 @@
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
 import cv2
-import pandas as pd
-import numpy as np
-from ultralytics import YOLO
-from tracker.centroidtracker import CentroidTracker
-from tracker.trackableobject import TrackableObject
+from detector.modelmanager import model_manager
+from detector.detectioncache import DetectionCache
+from detector.tileddetector import TiledDetector
+from detector.densityestimator import DensityEstimator, render_heatmap
+from detector.modelregistry import ModelRegistry, VARIANTS
+from tracker.peoplecounter import PeopleCounter
+from tracker.countingengine import CountingEngine
+from video.pipeline import StagedPipeline
+from video.segments import count_video_segments
+from video.multistream import count_streams
+from video.motiongate import DetectionSchedule, MotionGate
+from video.eventlog import EventLog, StageTimer
+from video.rollups import RollupStore
 from imutils.video import FPS
-import numpy as np
-import dlib
 import logging
 import time
 
-# execution start time
-start_time = time.time()
-
 # setup logger
 logging.basicConfig(level = logging.INFO, format = "[INFO] %(message)s")
 logger = logging.getLogger(__name__)
 
-model = YOLO('yolov8x.pt')
+model_weights = 'yolov8x.pt'
+
+# the model is loaded on first use, not at import time
+detector = None
 
 
 ## Input Video
 test_video = 'Input/input.mp4'
-logger.info("Starting the video..")
-cap = cv2.VideoCapture(test_video)
 
 
-my_file = open("coco.txt", "r")
-data = my_file.read()
-class_list = data.split("\n")
+def load_detector(weights=None):
+    """
+    Returns the person detector, loading (and warming up) the model on first use.
+
+    Args:
+        weights: Model weights; switching to different weights reloads the model.
+    """
+    global detector, model_weights
+    if weights is not None and weights != model_weights:
+        model_weights = weights
+        detector = None
+    if detector is None:
+        detector = model_manager.get(model_weights)
+    return detector
+
+
+def use_detection_service(address):
+    """
+    Sends the detections to the local detection service instead of loading a model
+    in this process (see `detector.detectionservice`).
+
+    Args:
+        address: Unix socket path or host:port of the running service.
+    """
+    global detector, model_weights
+    detector = model_manager.get(address, "service")
+    model_weights = detector.weights
+    return detector
+
+
+def _select_detector(args):
+    if args.service:
+        return use_detection_service(args.service)
+    return load_detector(ModelRegistry().path(args.model, args.variant))
 
 
 #function for detect person coordinate
@@ -40,154 +80,556 @@ def get_person_coordinates(frame):
         frame: Input frame for object detection.
 
     Returns:
-        list: List of person bounding box coordinates in the format [x1, y1, x2, y2].
+        numpy.ndarray: Array of shape (N, 4) with person bounding boxes in the format [x1, y1, x2, y2].
     """
-    results = model.predict(frame, verbose=False)
-    a = results[0].boxes.data.detach().cpu()
-    px = pd.DataFrame(a).astype("float")
-
-    list_corr = []
-    for index, row in px.iterrows():
-        x1 = row[0]
-        y1 = row[1]
-        x2 = row[2]
-        y2 = row[3]
-        d = int(row[5])
-        c = class_list[d]
-        if 'person' in c:
-            list_corr.append([x1, y1, x2, y2])
-    return list_corr
+    boxes, _ = load_detector().detect(frame)
+    return boxes
 
 
-def people_counter():
+def get_person_coordinates_batch(frames):
     """
-    Counts the number of people entering and exiting based on object tracking.
-    """
-    count = 0
+    Batched version of `get_person_coordinates`: runs all frames through the model in one call.
 
-    writer = None
-    ct = CentroidTracker(maxDisappeared=40, maxDistance=40)
-    trackers = []
-    trackableObjects = {}
+    Args:
+        frames: List of input frames for object detection.
 
-    # Initialize the total number of frames processed thus far, along
-    # with the total number of objects that have moved either up or down
-    totalFrames = 0
-    totalDown = 0
-    totalUp = 0
+    Returns:
+        list: One (N, 4) array of person bounding boxes per frame, in input order.
+    """
+    return [boxes for boxes, _ in load_detector().detect_batch(frames)]
 
-    # Initialize empty lists to store the counting data
-    total = []
-    move_out = []
-    move_in = []
 
-    # Initialize video writer
-    W = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    H = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    writer = cv2.VideoWriter('Final_output.mp4', fourcc, 30, (W, H), True)
+def read_sampled_frames(cap, skip=3, size=(500, 280)):
+    """
+    Reads every `skip`-th frame of a capture and resizes it for detection.
 
-    fps = FPS().start()
+    Args:
+        cap: Opened cv2.VideoCapture.
+        skip: Keep one frame out of `skip`.
+        size: (width, height) the kept frames are resized to.
+
+    Yields:
+        numpy.ndarray: Resized frames, in capture order.
+    """
+    count = 0
     while True:
         ret, frame = cap.read()
         if not ret:
             break
         count += 1
-        if count % 3 != 0:
+        if count % skip != 0:
+            continue
+        yield cv2.resize(frame, size)
+
+
+def detect_frames(frames, batch_size=1, schedule=None, cache=None, frame_numbers=None, timer=None):
+    """
+    Runs person detection on the frames selected by a detection schedule.
+
+    Frames whose detections would not be used (tracker-only frames) never reach the
+    model. With `batch_size` > 1, frames are held back until `batch_size` frames need
+    detection, which are then sent to the model in a single predict call.
+
+    Args:
+        frames: Iterable of frames.
+        batch_size: Number of frames sent to the model in a single predict call.
+        schedule: DetectionSchedule (or MotionGate) deciding which frames are detected.
+            Defaults to a detection every 30 frames.
+        cache: VideoDetections of the video; cached frames skip the model, the
+            others are added to it.
+        frame_numbers: Iterable with the frame number of each frame, required with `cache`.
+        timer: StageTimer the detector time is added to, as the "inference" stage.
+
+    Yields:
+        tuple: (frame, per_corr) pairs in input order, per_corr is None on tracker-only frames.
+    """
+    if schedule is None:
+        schedule = DetectionSchedule()
+
+    if frame_numbers is None:
+        frame_numbers = itertools.count()
+
+    pending = []
+    selected = []
+    numbers = []
+    for frame, frame_number in zip(frames, frame_numbers):
+        detect = schedule.should_detect(frame)
+        if not detect and not selected:
+            # nothing waiting on the model, pass the frame straight through
+            yield frame, None
             continue
 
-        frame = cv2.resize(frame, (500, 280))
-
-        per_corr = get_person_coordinates(frame)
-
-        rects = []
-        if totalFrames % 30 == 0:
-            trackers = []
-            for bbox in per_corr:
-                x1, y1, x2, y2 = bbox
-                rects.append([x1, y1, x2, y2])
-                tracker = dlib.correlation_tracker()
-                rect = dlib.rectangle(int(x1), int(y1), int(x2), int(y2))
-                tracker.start_track(frame, rect)
-                cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 255), 1)
-                trackers.append(tracker)
+        pending.append((frame, detect))
+        if detect:
+            selected.append(frame)
+            numbers.append(frame_number)
+        if len(selected) == batch_size:
+            yield from _flush_detections(pending, selected, numbers, cache, timer)
+            pending = []
+            selected = []
+            numbers = []
+
+    if pending:
+        yield from _flush_detections(pending, selected, numbers, cache, timer)
+
+
+def _detect_cached(frames, numbers, cache):
+    # frames found in the cache skip the model, the others are detected in one batch
+    results = [cache.get(frame_number) for frame_number in numbers]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        detected = load_detector().detect_batch([frames[i] for i in missing])
+        for i, (boxes, scores) in zip(missing, detected):
+            cache.put(numbers[i], boxes, scores)
+            results[i] = (boxes, scores)
+    return [boxes for boxes, _ in results]
+
+
+def _flush_detections(pending, selected, numbers, cache=None, timer=None):
+    with timer.measure("inference") if timer is not None else contextlib.nullcontext():
+        if cache is not None:
+            detections = iter(_detect_cached(selected, numbers, cache))
+        elif len(selected) == 1:
+            detections = iter([get_person_coordinates(selected[0])])
         else:
-            for tracker in trackers:
-                tracker.update(frame)
-                pos = tracker.get_position()
-                startX = int(pos.left())
-                startY = int(pos.top())
-                endX = int(pos.right())
-                endY = int(pos.bottom())
-                rects.append((startX, startY, endX, endY))
-
-        cv2.line(frame, (0, H // 2 - 10), (W, H // 2 - 10), (0, 0, 0), 2)
-
-        objects = ct.update(rects)
-
-        for (objectID, centroid) in objects.items():
-            to = trackableObjects.get(objectID)
-
-            if to is None:
-                to = TrackableObject(objectID, centroid)
-            else:
-                y = [c[1] for c in to.centroids]
-                direction = centroid[1] - np.mean(y)
-                to.centroids.append(centroid)
-
-                if not to.counted:
-                    if direction < 0 and centroid[1] < H // 2 - 20:
-                        totalUp += 1
-                        move_out.append(totalUp)
-                        to.counted = True
-                    elif 0 < direction < 1.1 and centroid[1] > 144:
-                        totalDown += 1
-                        move_in.append(totalDown)
-                        to.counted = True
-
-                        total = []
-                        total.append(len(move_in) - len(move_out))
-
-            trackableObjects[objectID] = to
-
-            text = "ID {}".format(objectID)
-            cv2.putText(frame, text, (centroid[0] - 10, centroid[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
-                        (255, 255, 255), 2)
-            cv2.circle(frame, (centroid[0], centroid[1]), 4, (255, 255, 255), -1)
-
-        info_status = [
-            ("Enter", totalUp),
-            ("Exit ", totalDown),
-        ]
-
-        
-        for (i, (k, v)) in enumerate(info_status):
-            text = "{}: {}".format(k, v)
-            cv2.putText(frame, text, (10, H - ((i * 20) + 20)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
-
-        writer.write(frame)
-        cv2.imshow("People Count", frame)
-
-        if cv2.waitKey(1) & 0xFF == 27:
-            break
+            detections = iter(get_person_coordinates_batch(selected))
+    for frame, detect in pending:
+        yield frame, next(detections) if detect else None
 
-        totalFrames += 1
-        fps.update()
 
-        end_time = time.time()
-        num_seconds = (end_time - start_time)
-        if num_seconds > 28800:
+def people_counter(video_path=test_video, batch_size=1, pipelined=False, queue_size=8, skip=3, schedule=None,
+                   tracker="dlib", size=(500, 280), output_path='Final_output.mp4', display=True,
+                   max_seconds=28800, matcher="greedy", counting=None, detection_cache=None,
+                   event_log=None, event_log_format="parquet"):
+    """
+    Counts the number of people entering and exiting based on object tracking.
+
+    Args:
+        video_path: Input video file.
+        batch_size: Number of sampled frames sent to the model in a single predict call.
+            Detections are fed to the tracker in frame order, so the counts do not depend on it.
+        pipelined: Run decoding, inference and encoding on their own threads, connected
+            by bounded queues, while tracking and counting stay on the calling thread.
+        queue_size: Maximum number of frames buffered between two pipeline stages.
+        skip: Keep one frame out of `skip`.
+        schedule: DetectionSchedule deciding which frames run the detector, e.g. a
+            MotionGate that falls back to tracker-only updates on static frames.
+        tracker: Box tracker used between detections, "dlib" (one correlation tracker
+            per person) or "flow" (all boxes moved by one batched optical-flow call).
+        size: (width, height) the frames are resized to before detection.
+        output_path: Annotated output video, or None to skip writing it.
+        display: Show the annotated frames in a window; False runs headless.
+        max_seconds: Stop after this many seconds of processing, 0 for no limit.
+        matcher: Centroid matching engine, "greedy", "dense" or "hungarian" (see `tracker.matching`).
+        counting: CountingEngine with the counting lines and zones, in the coordinates of the
+            resized frames, counted per line in the summary; the enter/exit totals always
+            come from the built-in line around the middle of the frame.
+        detection_cache: DetectionCache; detections of frames seen in an earlier run with
+            the same model and size are read from it, so re-runs only cost the tracking.
+        event_log: Directory for the columnar log of the run (per-frame counts and stage
+            timings, crossing events), see `video.eventlog.EventLog`; None for no log.
+        event_log_format: "parquet" or "arrow".
+
+    Returns:
+        dict: Run summary with the counts, the throughput and the detector usage.
+    """
+    # execution start time
+    start_time = time.time()
+
+    logger.info("Starting the video..")
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("cannot open video: {}".format(video_path))
+
+    W = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    H = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    # time spent per stage, logged per frame
+    timer = StageTimer()
+
+    # Initialize video writer
+    writer = None
+    if output_path:
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        writer = cv2.VideoWriter(output_path, fourcc, 30, tuple(size), True)
+
+    counter = PeopleCounter(W, H, maxDisappeared=40, maxDistance=40, tracker=tracker,
+                            annotate=display or writer is not None, matcher=matcher, counting=counting)
+
+    if schedule is None:
+        schedule = DetectionSchedule()
+
+    # the log and the cache are closed even if counting fails, so that what was
+    # written stays readable
+    cached = None
+    log = None
+    pipeline = None
+    try:
+        if detection_cache is not None:
+            # tiling changes the detections, it is part of the cache key
+            config = ""
+            if isinstance(load_detector(), TiledDetector):
+                config = "tiles {} {} {} {}".format(detector.tile_size, detector.overlap, detector.iou_threshold,
+                                                    detector.full_frame)
+            cached = detection_cache.open(video_path, model_weights, tuple(size), config)
+
+        if event_log:
+            log = EventLog(event_log, format=event_log_format,
+                           metadata={"input": video_path, "model": model_weights, "skip": skip,
+                                     "fps": source_fps, "started": start_time})
+
+        frames = timer.iterate("decode", read_sampled_frames(cap, skip=skip, size=tuple(size)))
+        # capture index of each sampled frame, the key of its cached detections
+        frame_numbers = itertools.count(skip - 1, skip)
+        encoder = None
+        write = writer.write if writer is not None else None
+        if pipelined:
+            pipeline = StagedPipeline(maxsize=queue_size)
+            frames = pipeline.stage("decode", frames)
+            detections = pipeline.stage("inference", detect_frames(frames, batch_size, schedule, cached, frame_numbers, timer))
+            if writer is not None:
+                encoder = pipeline.sink("encode", writer.write)
+                write = encoder.put
+        else:
+            detections = detect_frames(frames, batch_size, schedule, cached, frame_numbers, timer)
+
+        fps = FPS().start()
+        for frame, per_corr in detections:
+            with timer.measure("tracking"):
+                events = counter.update(frame, per_corr)
+
+            with timer.measure("output"):
+                if write is not None:
+                    write(frame)
+
+                if display:
+                    cv2.imshow("People Count", frame)
+
+                    if cv2.waitKey(1) & 0xFF == 27:
+                        break
+
+            if log is not None:
+                frame_number = counter.totalFrames * skip - 1
+                seconds = frame_number / source_fps
+                log.log_frame(frame_number, seconds, counter.lastCount, per_corr is not None,
+                              counter.totalUp, counter.totalDown, timer.take())
+                if events:
+                    log.log_events(frame_number, seconds, events)
+
+            fps.update()
+
+            end_time = time.time()
+            num_seconds = (end_time - start_time)
+            if max_seconds and num_seconds > max_seconds:
+                break
+
+        if encoder is not None:
+            encoder.close()
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        cap.release()
+        if writer is not None:
+            writer.release()
+        if display:
+            cv2.destroyAllWindows()
+        if cached is not None:
+            cached.close()
+        if log is not None:
+            log.close()
+
+    fps.stop()
+    logger.info("Elapsed time: {:.2f}".format(fps.elapsed()))
+    logger.info("Approx. FPS: {:.2f} (batch size {})".format(fps.fps(), batch_size))
+    logger.info("Enter: {}, Exit: {}".format(counter.totalUp, counter.totalDown))
+    logger.info("Detector runs: {inferences} of {frames} frames ({inferences_saved} saved by gating)".format(**schedule.stats()))
+
+    summary = {
+        "input": video_path,
+        "model": model_weights,
+        "mode": "pipelined" if pipelined else "serial",
+        "frames": counter.totalFrames,
+        "elapsed": round(fps.elapsed(), 3),
+        "fps": round(fps.fps(), 2),
+        "enter": counter.totalUp,
+        "exit": counter.totalDown,
+    }
+    if counting is not None:
+        summary["lines"] = {"{}/{}".format(name, label): value for ((name, label), value) in counting.counts.items()}
+        summary["zones"] = dict(counting.occupancy)
+    summary.update(schedule.stats())
+    if cached is not None:
+        summary["detection_cache"] = cached.stats()
+    if log is not None:
+        summary["event_log"] = log.stats()
+    return summary
+
+
+def people_counter_segmented(video_path=test_video, workers=None, overlap_seconds=2.0, skip=3,
+                             size=(500, 280), weights=None):
+    """
+    Offline counting of a long recording, split into time segments processed in parallel.
+
+    Each worker process loads its own model and counts one segment; tracks crossing a
+    segment boundary are stitched using an overlap window (see `video.segments`).
+    There is no display, no annotated output video and no run-time limit.
+
+    Args:
+        video_path: Input video file.
+        workers: Number of worker processes, defaults to the number of cores.
+        overlap_seconds: Length of the warm-up window before each segment boundary.
+        skip: Keep one frame out of `skip`.
+        size: (width, height) the frames are resized to before detection.
+        weights: Model weights loaded by every worker, defaults to `model_weights`.
+
+    Returns:
+        dict: Run summary with the counts and the throughput.
+    """
+    weights = weights or model_weights
+    start_time = time.time()
+    logger.info("Counting {} in segments..".format(video_path))
+    result = count_video_segments(video_path, weights, workers=workers, overlap_seconds=overlap_seconds,
+                                  skip=skip, size=tuple(size))
+    elapsed = time.time() - start_time
+
+    logger.info("Elapsed time: {:.2f}".format(elapsed))
+    logger.info("Enter: {}, Exit: {}".format(result["totalUp"], result["totalDown"]))
+    return {
+        "input": video_path,
+        "model": weights,
+        "mode": "segmented",
+        "frames": result["frames"],
+        "elapsed": round(elapsed, 3),
+        "fps": round(result["frames"] / elapsed, 2) if elapsed > 0 else 0.0,
+        "enter": result["totalUp"],
+        "exit": result["totalDown"],
+    }
+
+
+def density_counter(video_path=test_video, estimator=None, skip=3, size=(500, 280),
+                    output_path='Final_output.mp4', display=True, max_seconds=28800):
+    """
+    Estimates the number of people on every sampled frame with a density map (CSRNet).
+
+    There is no detection or tracking, so the time per frame does not grow with the crowd,
+    but there are no enter/exit counts either: the summary reports the per-frame counts.
+
+    Args:
+        video_path: Input video file.
+        estimator: DensityEstimator, defaults to one with the default CSRNet weights.
+        skip: Keep one frame out of `skip`.
+        size: (width, height) of the displayed and written frames.
+        output_path: Output video with the heatmap overlay, or None to skip writing it.
+        display: Show the frames in a window; False runs headless.
+        max_seconds: Stop after this many seconds of processing, 0 for no limit.
+
+    Returns:
+        dict: Run summary with the per-frame count statistics and the throughput.
+    """
+    if estimator is None:
+        estimator = DensityEstimator()
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("cannot open video: {}".format(video_path))
+
+    writer = None
+    if output_path:
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        writer = cv2.VideoWriter(output_path, fourcc, 30, tuple(size), True)
+
+    counts = []
+    fps = FPS().start()
+    start_time = time.time()
+    for frame in read_sampled_frames(cap, skip=skip, size=tuple(size)):
+        count, density = estimator.estimate(frame)
+        counts.append(count)
+
+        if writer is not None or display:
+            frame = render_heatmap(frame, density)
+            cv2.putText(frame, "Count: {:.0f}".format(count), (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+        if writer is not None:
+            writer.write(frame)
+        if display:
+            cv2.imshow("People Count", frame)
+            if cv2.waitKey(1) & 0xFF == 27:
+                break
+
+        fps.update()
+        if max_seconds and time.time() - start_time > max_seconds:
             break
 
     cap.release()
-    writer.release()
-    cv2.destroyAllWindows()
+    if writer is not None:
+        writer.release()
+    if display:
+        cv2.destroyAllWindows()
 
     fps.stop()
     logger.info("Elapsed time: {:.2f}".format(fps.elapsed()))
     logger.info("Approx. FPS: {:.2f}".format(fps.fps()))
 
+    return {
+        "input": video_path,
+        "model": estimator.weights,
+        "mode": "density",
+        "frames": len(counts),
+        "elapsed": round(fps.elapsed(), 3),
+        "fps": round(fps.fps(), 2),
+        "mean_count": round(sum(counts) / len(counts), 2) if counts else 0.0,
+        "max_count": round(max(counts), 2) if counts else 0.0,
+        "last_count": round(counts[-1], 2) if counts else 0.0,
+    }
+
+
+def parse_time(value):
+    """
+    Epoch seconds from epoch seconds or an ISO 8601 time (local time without a zone).
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError("not a time: {!r}".format(value))
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line; options may also come from a JSON config file.
+    """
+    config_parser = argparse.ArgumentParser(add_help=False)
+    config_parser.add_argument("--config", help="JSON file with default values for the options below")
+    config_args, remaining = config_parser.parse_known_args(argv)
+
+    parser = argparse.ArgumentParser(description="Count people crossing the counting line of a video.",
+                                     parents=[config_parser])
+    parser.add_argument("--input", default=test_video, help="input video file")
+    parser.add_argument("--backend", choices=["yolo", "csrnet"], default="yolo",
+                        help="detection and tracking (yolo) or per-frame density estimation (csrnet)")
+    parser.add_argument("--model", default=model_weights, help="YOLO weights")
+    parser.add_argument("--service", metavar="ADDRESS",
+                        help="use a running detection service (Unix socket path or host:port) instead of --model")
+    parser.add_argument("--variant", choices=VARIANTS, default="torch",
+                        help="run an exported (and optionally INT8-quantized) version of --model")
+    parser.add_argument("--density-model", default="trained_models/csrnet.pth", help="CSRNet weights")
+    parser.add_argument("--output", default="Final_output.mp4", help="annotated output video")
+    parser.add_argument("--no-video", action="store_true", help="do not write the annotated video")
+    parser.add_argument("--headless", action="store_true", help="do not open a display window")
+    parser.add_argument("--width", type=int, default=500, help="frame width used for detection")
+    parser.add_argument("--height", type=int, default=280, help="frame height used for detection")
+    parser.add_argument("--skip", type=int, default=3, help="process one frame out of SKIP")
+    parser.add_argument("--detect-interval", type=int, default=30,
+                        help="processed frames between two detector runs")
+    parser.add_argument("--batch-size", type=int, default=1, help="frames per predict call")
+    parser.add_argument("--pipelined", action="store_true", help="run decode/inference/encode on worker threads")
+    parser.add_argument("--queue-size", type=int, default=8, help="frames buffered between pipeline stages")
+    parser.add_argument("--tracker", choices=["dlib", "flow"], default="dlib", help="box tracker between detections")
+    parser.add_argument("--matcher", choices=["greedy", "dense", "hungarian"], default="greedy",
+                        help="centroid matching engine")
+    parser.add_argument("--motion-gate", choices=["diff", "mog2"], help="skip the detector on static frames")
+    parser.add_argument("--motion-threshold", type=int, default=25, help="per-pixel change threshold: gray levels for diff, varThreshold for mog2")
+    parser.add_argument("--motion-area", type=float, default=0.002,
+                        help="fraction of changed pixels that counts as motion")
+    parser.add_argument("--segments", action="store_true", help="offline mode: process time segments in parallel")
+    parser.add_argument("--workers", type=int, help="worker processes for --segments")
+    parser.add_argument("--overlap", type=float, default=2.0, help="segment overlap window in seconds")
+    parser.add_argument("--streams", nargs="+", metavar="SOURCE",
+                        help="count several video files / camera indices at once with one shared model")
+    parser.add_argument("--max-batch", type=int, default=8, help="frames from all streams per predict call")
+    parser.add_argument("--drop-policy", choices=["block", "drop"],
+                        help="when a stream falls behind: block its reader (files) or drop old frames (cameras)")
+    parser.add_argument("--max-seconds", type=float, default=28800, help="processing time limit, 0 for none")
+    parser.add_argument("--counting", help="JSON file with the counting lines and zones")
+    parser.add_argument("--tile-size", type=int, default=0,
+                        help="detect on overlapping tiles of this size (use with a larger --width/--height)")
+    parser.add_argument("--tile-overlap", type=float, default=0.2, help="fraction of a tile shared with its neighbours")
+    parser.add_argument("--detection-cache", default="cache/detections",
+                        help="directory of the detections cached across runs")
+    parser.add_argument("--no-detection-cache", action="store_true",
+                        help="always run the detector (the cache is also off with --service)")
+    parser.add_argument("--event-log", metavar="DIR",
+                        help="write per-frame counts, stage timings and crossing events to DIR")
+    parser.add_argument("--event-log-format", choices=["parquet", "arrow"], default="parquet",
+                        help="file format of --event-log")
+    parser.add_argument("--insights", metavar="DIR",
+                        help="also add the --event-log of the run to this rollup store "
+                             "(the Data Insights window reads cache/insights)")
+    parser.add_argument("--insights-start", metavar="TIME", type=parse_time,
+                        help="when the input was recorded (ISO 8601 local time or epoch seconds), "
+                             "for --insights; defaults to the start of the processing")
+
+    if config_args.config:
+        with open(config_args.config, "r") as config_file:
+            config = json.load(config_file)
+        parser.set_defaults(**{key.replace("-", "_"): value for key, value in config.items()})
+    args = parser.parse_args(remaining)
+
+    # options of the single-video detection path that the other modes would ignore
+    mode = ("--streams" if args.streams else "--backend csrnet" if args.backend == "csrnet"
+            else "--segments" if args.segments else None)
+    if mode is not None:
+        options = ["event_log", "insights", "tile_size", "motion_gate", "counting"]
+        if mode != "--streams":
+            options += ["matcher", "tracker", "service"]
+        used = ["--" + dest.replace("_", "-") for dest in options if getattr(args, dest) != parser.get_default(dest)]
+        if used:
+            parser.error("{} not supported with {}".format(", ".join(used), mode))
+    if args.insights and not args.event_log:
+        parser.error("--insights needs --event-log")
+    if args.insights_start is not None and not args.insights:
+        parser.error("--insights-start needs --insights")
+    return args
+
+
+def main(argv=None):
+    global detector
+    args = parse_args(argv)
+    size = (args.width, args.height)
+
+    if args.streams:
+        summary = count_streams(args.streams, _select_detector(args),
+                                max_batch=args.max_batch, skip=args.skip, size=size,
+                                detect_interval=args.detect_interval, policy=args.drop_policy,
+                                queue_size=args.queue_size, tracker=args.tracker, matcher=args.matcher,
+                                max_seconds=args.max_seconds)
+    elif args.backend == "csrnet":
+        summary = density_counter(args.input, DensityEstimator(args.density_model), skip=args.skip, size=size,
+                                  output_path=None if args.no_video else args.output,
+                                  display=not args.headless, max_seconds=args.max_seconds)
+    elif args.segments:
+        summary = people_counter_segmented(args.input, workers=args.workers, overlap_seconds=args.overlap,
+                                           skip=args.skip, size=size,
+                                           weights=ModelRegistry().path(args.model, args.variant))
+    else:
+        _select_detector(args)
+        if args.tile_size:
+            detector = TiledDetector(detector, tile_size=args.tile_size, overlap=args.tile_overlap)
+        if args.motion_gate:
+            schedule = MotionGate(args.detect_interval, pixel_threshold=args.motion_threshold,
+                                  min_changed_fraction=args.motion_area, method=args.motion_gate)
+        else:
+            schedule = DetectionSchedule(args.detect_interval)
+        counting = CountingEngine.fromConfig(args.counting) if args.counting else None
+        summary = people_counter(args.input, batch_size=args.batch_size, pipelined=args.pipelined,
+                                 queue_size=args.queue_size, skip=args.skip, schedule=schedule,
+                                 tracker=args.tracker, size=size,
+                                 output_path=None if args.no_video else args.output,
+                                 display=not args.headless, max_seconds=args.max_seconds,
+                                 matcher=args.matcher, counting=counting,
+                                 detection_cache=None if args.no_detection_cache or args.service else DetectionCache(args.detection_cache),
+                                 event_log=args.event_log, event_log_format=args.event_log_format)
+        if args.insights:
+            # the Data Insights window reads the rollups, not the logs
+            RollupStore(args.insights).add_run(args.event_log, recorded=args.insights_start)
+
+    # machine-readable run summary on stdout, the log goes to stderr
+    print(json.dumps(summary))
+    return summary
 
 
 if __name__ == "__main__":
-    people_counter()
+    main()